@@ -1,4 +1,4 @@
-from typing import cast
+from pathlib import Path
 
 import asyncer
 
@@ -13,6 +13,7 @@ from stark.core import (
 from stark.core.commands_context_processor import CommandsContextProcessor
 from stark.core.health_check import health_check
 from stark.core.processors.search_processor import SearchProcessor
+from stark.core.warmup import warmup
 from stark.general.blockage_detector import BlockageDetector
 from stark.general.localisation import Localizer
 from stark.interfaces.protocols import (
@@ -30,6 +31,7 @@ async def run(
     speech_synthesizer: SpeechSynthesizer,
     processors: list[CommandsContextProcessor] | None = None,
     localizer: Localizer | None = None,
+    grammar_snapshot: Path | str | None = None,
 ):
     if processors is None:
         if localizer:
@@ -47,15 +49,14 @@ async def run(
         )
 
         from stark.interfaces.microphone import Microphone
+        from stark.interfaces.recognizer_relay import SpeechRecognizerRelay
 
         recognizers = speech_recognizer if isinstance(speech_recognizer, list) else [speech_recognizer]
-        use_relay = len(recognizers) > 1
 
-        if use_relay:
-            from stark.interfaces.recognizer_relay import SpeechRecognizerRelay
+        if len(recognizers) > 1:
             effective_recognizer: SpeechRecognizer = SpeechRecognizerRelay(recognizers)
         else:
-            effective_recognizer = recognizers[0]
+            effective_recognizer = recognizers[0]  # may be a relay configured by the caller
 
         voice_assistant = VoiceAssistant(
             speech_recognizer=effective_recognizer,
@@ -65,10 +66,11 @@ async def run(
         effective_recognizer.delegate = voice_assistant
         context.delegate = voice_assistant
 
+        warmup(context.pattern_parser, manager.commands, snapshot=grammar_snapshot, anchor_index=manager.anchor_index)
         health_check(context.pattern_parser, manager.commands)
 
-        if use_relay:
-            cast(SpeechRecognizerRelay, effective_recognizer).start_speech_recognizers(main_task_group)
+        if isinstance(effective_recognizer, SpeechRecognizerRelay):
+            effective_recognizer.start_speech_recognizers(main_task_group)
         else:
             main_task_group.soonify(effective_recognizer.start_listening)()
 
@@ -10,6 +10,7 @@ from .commands_context import (
     CommandsContext,
     CommandsContextDelegate,
     CommandsContextLayer,
+    SearchPolicy,
 )
 from .commands_manager import CommandsManager
 from .patterns import Pattern, PatternParameter, rules
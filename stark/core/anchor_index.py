@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from re import _constants as sre_constants  # type: ignore[attr-defined]
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import TYPE_CHECKING
+
+from stark.core.patterns.pattern import Pattern
+from stark.general.cache import CacheStats, LRUCache
+from stark.general.localisation import LocaleString
+from stark.general.localisation.language_code import LanguageCode
+from stark.models.transcription_string import TranscriptionString
+from stark.tools.aho_corasick import AhoCorasick
+
+if TYPE_CHECKING:
+    from stark.core.command import Command
+    from stark.core.parsing import PatternParser
+    from stark.core.types import NLObject, Union
+
+logger = logging.getLogger(__name__)
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, sre_constants.POSSESSIVE_REPEAT}
+
+
+type Anchor = tuple[str, ...]  # alternatives, at least one of them must be present
+
+
+def required_anchors(regex_source: str) -> list[Anchor]:
+    """
+    Returns anchors that every match of the regex must contain: each anchor is a tuple of literal alternatives.
+
+    Unconditional parts of the pattern are considered: plain literals, groups, the body of repeats with a minimum
+    of at least one and alternations whose every branch has an anchor of its own (giving a multi-literal anchor).
+    Character classes, assertions, optional parts and case-insensitive parts break literal runs and contribute nothing.
+    """
+    parsed = sre_parse.parse(regex_source)
+    if parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE:
+        return []
+    return _sequence_anchors(parsed)
+
+
+def required_literals(regex_source: str) -> list[str]:
+    """Returns literal substrings that every match of the regex must contain (single-alternative anchors)."""
+    return [anchor[0] for anchor in required_anchors(regex_source) if len(anchor) == 1]
+
+
+def _sequence_anchors(sequence) -> list[Anchor]:
+    anchors: list[Anchor] = []
+    current: list[str] = []
+
+    def flush():
+        if current:
+            anchors.append(("".join(current),))
+            current.clear()
+
+    def walk(sequence):
+        for op, av in sequence:
+            if op is sre_constants.LITERAL:
+                current.append(chr(av))
+            elif op is sre_constants.SUBPATTERN:
+                _group, add_flags, _del_flags, subsequence = av
+                if add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+                    flush()
+                    continue
+                walk(subsequence)
+            elif op is sre_constants.ATOMIC_GROUP:
+                walk(av)
+            elif op in _REPEATS:
+                min_repeat, _max_repeat, subsequence = av
+                flush()
+                if min_repeat >= 1:
+                    walk(subsequence)
+                    flush()
+            elif op is sre_constants.BRANCH:
+                flush()
+                _, branches = av
+                alternatives: list[str] = []
+                for branch in branches:
+                    branch_literals = [anchor[0] for anchor in _sequence_anchors(branch) if len(anchor) == 1]
+                    if not branch_literals:
+                        break  # a branch without literals can match anything
+                    alternatives.append(max(branch_literals, key=len))
+                else:
+                    anchors.append(tuple(dict.fromkeys(alternatives)))
+            else:
+                flush()
+
+    walk(sequence)
+    flush()
+    return [anchor for anchor in anchors if all(alternative.strip() for alternative in anchor)]
+
+
+class CommandList(list["Command"]):
+    """
+    List of commands that counts the changes made in place, so the anchor index can tell in O(1) that it is stale.
+
+    Appending is not counted, the index notices it by the length; replacing, removing, inserting and reordering bump
+    `version`.
+    """
+
+    version: int
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def _changed(self):
+        self.version += 1
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __imul__(self, count):
+        self._changed()
+        return super().__imul__(count)
+
+    def insert(self, index, command):
+        super().insert(index, command)
+        self._changed()
+
+    def pop(self, index=-1):
+        self._changed()
+        return super().pop(index)
+
+    def remove(self, command):
+        super().remove(command)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+
+class CommandsAnchorIndex:
+    """
+    Index of required literal anchors of command patterns, used to narrow the commands before any regex runs.
+
+    Anchors are literals the compiled pattern of a command (after rules and `@key` resolution) can't match without.
+    The most selective anchor of every command goes into one Aho-Corasick automaton per language, so a single pass
+    over the utterance yields the commands whose anchors occur in it, then their remaining anchors are verified.
+    Commands without any anchor, and commands that are not indexed (e.g. hidden context commands), are always
+    candidates.
+
+    The index is owned by CommandsManager and updated on `append`/`extend`; anchors are resolved lazily per
+    language because compilation needs the PatternParser (registered types and localizer). Changes made to `commands`
+    directly are noticed and the index is rebuilt: in O(1) for a `CommandList`, which the manager uses, by comparing
+    the items for other lists of the same length.
+    """
+
+    commands: list[Command]
+
+    def __init__(self, commands: list[Command] | None = None):
+        self.commands = commands if commands is not None else CommandList()
+        self._positions: dict[Command, int] = {}
+        self._indexed: list[Command] = []  # mirrors `commands` as seen through add/extend
+        self._version = getattr(self.commands, "version", 0)
+        self._languages: dict[LanguageCode, _LanguageAnchors] = {}
+        self._pattern_parser: PatternParser | None = None
+        self._generation: int | None = None
+        self.extend(self.commands)
+
+    def add(self, command: Command):
+        self._indexed.append(command)
+        if command in self._positions:
+            return
+        self._positions[command] = len(self._positions)
+        for anchors in self._languages.values():
+            anchors.pending.append(command)
+
+    def extend(self, commands: list[Command]):
+        for command in commands:
+            self.add(command)
+
+    def _reindex(self):
+        self._positions.clear()
+        self._indexed.clear()
+        self._languages.clear()
+        self._version = getattr(self.commands, "version", 0)
+        self.extend(self.commands)
+
+    def _is_stale(self) -> bool:
+        """Whether `commands` was changed directly, bypassing the manager."""
+        if len(self._indexed) != len(self.commands):
+            return True
+        if isinstance(self.commands, CommandList):
+            return self.commands.version != self._version
+        return self._indexed != self.commands  # a plain list can only be compared item by item (by identity)
+
+    def candidates(
+        self,
+        string: str | LocaleString,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+    ) -> list[Command]:
+        if isinstance(string, TranscriptionString) and string.has_corrections:
+            return commands  # correction variants may replace the anchors
+
+        if self._is_stale():
+            self._reindex()
+
+        anchors = self._get_language(language_code, pattern_parser)
+        found = anchors.search(string)
+
+        if commands is self.commands:
+            return sorted(found, key=self._positions.__getitem__)
+        return [command for command in commands if command not in self._positions or command in found]
+
+    def _get_language(self, language_code: LanguageCode, pattern_parser: PatternParser) -> _LanguageAnchors:
+        if pattern_parser is not self._pattern_parser or pattern_parser.generation != self._generation:
+            self._languages.clear()  # compiled patterns changed, anchors must be extracted again
+            self._pattern_parser = pattern_parser
+            self._generation = pattern_parser.generation
+
+        if (anchors := self._languages.get(language_code)) is None:
+            anchors = _LanguageAnchors(language_code, list(self._positions))
+            self._languages[language_code] = anchors
+
+        anchors.update(pattern_parser)
+        return anchors
+
+
+class _AnchorAutomaton[T]:
+    """
+    Finds the items whose required anchors all occur in a string.
+
+    Each item is keyed by its most selective anchor: the one whose literals are shared by the fewest items. The choice
+    depends on all the items, so the keys and the automaton are rebuilt after items are added. Items without anchors
+    are always found.
+    """
+
+    def __init__(self):
+        self.anchors: dict[T, list[Anchor]] = {}
+        self.frequency: Counter[str] = Counter()
+        self.automaton = AhoCorasick()
+        self.by_literal: dict[str, list[T]] = {}
+        self.unanchored: list[T] = []
+
+    def add(self, item: T, anchors: list[Anchor]):
+        self.anchors[item] = anchors
+        self.frequency.update({literal for anchor in anchors for literal in anchor})
+
+    def search(self, string: str) -> set[T]:
+        found = set(self.unanchored)
+        for literal in self.automaton.search(string):
+            for item in self.by_literal[literal]:
+                if item in found:
+                    continue
+                # the key anchor is present, check the rest of the required anchors
+                if all(any(literal in string for literal in anchor) for anchor in self.anchors[item]):
+                    found.add(item)
+        return found
+
+    def _rebuild(self):
+        self.automaton = AhoCorasick()
+        self.by_literal = {}
+        self.unanchored = []
+        for item, anchors in self.anchors.items():
+            if not anchors:
+                self.unanchored.append(item)
+                continue
+            key_anchor = min(
+                anchors,
+                key=lambda anchor: (sum(self.frequency[literal] for literal in anchor), -min(map(len, anchor))),
+            )
+            for literal in key_anchor:
+                self.by_literal.setdefault(literal, []).append(item)
+                self.automaton.add(literal)
+
+
+class _LanguageAnchors(_AnchorAutomaton["Command"]):
+    """Anchors of all indexed commands in one language, extracted lazily as commands are added."""
+
+    def __init__(self, language_code: LanguageCode, pending: list[Command]):
+        super().__init__()
+        self.language_code = language_code
+        self.pending = pending
+
+    def update(self, pattern_parser: PatternParser):
+        if not self.pending:
+            return
+        for command in self.pending:
+            self.add(command, self._extract_anchors(command, pattern_parser))
+        self.pending.clear()
+        self._rebuild()
+
+    def _extract_anchors(self, command: Command, pattern_parser: PatternParser) -> list[Anchor]:
+        try:
+            source = pattern_parser._compile_pattern(command.get_pattern(self.language_code), language_code=self.language_code)
+            return required_anchors(source)
+        except Exception as e:
+            logger.debug(f"Can't extract anchors of {command}: {e}")
+            return []  # let the regular match surface the error
+
+
+class UnionBranchIndex:
+    """
+    Index of required literal anchors of the branches of a Union type in one language.
+
+    `Union.pattern` is an alternation of all the branches, so parsing a large union (e.g. `any_subclass` of a deep
+    hierarchy) scans the whole alternation for every substring. The index keeps the anchors of every branch (an
+    alternation anchor like `(kettle|teapot)` doubles as the set of the first tokens) and narrows the alternation to
+    the branches whose anchors all occur in the substring, so the scan scales with the viable branches only.
+    Branches without anchors (e.g. NLString) are always viable.
+
+    Viable branches are cached per substring, narrowed patterns per set of branches.
+    """
+
+    union_type: type[Union]
+    language_code: LanguageCode
+
+    def __init__(
+        self, union_type: type[Union], language_code: LanguageCode, pattern_parser: PatternParser, cache_size: int = 256
+    ):
+        self.union_type = union_type
+        self.language_code = language_code
+        self.branches = dict(enumerate(union_type._types, 1))  # numbered like the `$m<n>` parameters of the pattern
+        self._anchors = _AnchorAutomaton[int]()
+        for number, branch in self.branches.items():
+            self._anchors.add(number, self._extract_anchors(branch, pattern_parser))
+        self._anchors._rebuild()
+        self._viable: LRUCache[str, tuple[int, ...]] = LRUCache(maxsize=cache_size, name="parsing.union_branches")
+        self._patterns: dict[tuple[int, ...], Pattern] = {}
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._viable.stats
+
+    def viable_branches(self, string: str) -> tuple[int, ...]:
+        string = str(string)
+        if (viable := self._viable.get(string)) is None:
+            viable = tuple(sorted(self._anchors.search(string)))
+            self._viable.put(string, viable)
+        return viable
+
+    def pattern(self, string: str) -> Pattern | None:
+        """Returns the union pattern narrowed down to the branches viable for the string, None if there are none."""
+        viable = self.viable_branches(string)
+        if not viable:
+            return None
+        if len(viable) == len(self.branches):
+            return self.union_type.get_pattern()
+        if (pattern := self._patterns.get(viable)) is None:
+            pattern = Pattern("(" + "|".join(f"$m{number}:{self.branches[number].__name__}" for number in viable) + ")")
+            self._patterns[viable] = pattern
+        return pattern
+
+    def _extract_anchors(self, branch: type[NLObject], pattern_parser: PatternParser) -> list[Anchor]:
+        try:
+            pattern = pattern_parser._resolve_pattern(branch, self.language_code)
+            return required_anchors(pattern_parser._compile_pattern(pattern, language_code=self.language_code))
+        except Exception as e:
+            logger.debug(f"Can't extract anchors of {branch.__name__} in {self.union_type.__name__}: {e}")
+            return []  # always try the branch, let the regular match surface the error
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+
+import anyio
+
+from stark.core.anchor_index import CommandsAnchorIndex
+from stark.core.command import Command
+from stark.core.commands_context_processor import SearchPolicy
+from stark.core.commands_manager import SearchResult
+from stark.core.parsing import MatchResult, PatternParser
+from stark.core.processors.search_processor import BatchResultsKey, SearchProcessor, Utterances, batch_results_cache
+from stark.core.warmup import warmup
+from stark.general.cache import LRUCache
+from stark.general.iteration import achunked
+from stark.general.localisation import LocaleString
+
+type _ChunkResults = list[list[tuple[int, MatchResult, int]]]  # per utterance: (command position, match, index)
+
+
+@dataclass
+class BatchGrammar:
+    """Everything a batch worker needs to search, built in every worker process by a picklable factory."""
+
+    pattern_parser: PatternParser
+    commands: list[Command]
+    processor: SearchProcessor = field(default_factory=SearchProcessor)
+    anchor_index: CommandsAnchorIndex | None = None
+    results_cache: LRUCache[BatchResultsKey, list[SearchResult]] = field(default_factory=batch_results_cache)
+
+
+async def search_in_processes(
+    strings: Utterances,
+    grammar: Callable[[], BatchGrammar],
+    processes: int | None = None,
+    chunk_size: int = 256,
+    policy: SearchPolicy = SearchPolicy.ALL,
+    mp_context: multiprocessing.context.BaseContext | None = None,
+) -> AsyncGenerator[list[SearchResult]]:
+    """
+    `SearchProcessor.search_batch` spread over a process pool, yields the results of every utterance in order.
+
+    `grammar` is a picklable (module-level) factory, called once in every worker and once here: the commands can't
+    be sent between processes (their runners are usually closures), so the results refer to the commands by position
+    and are mapped back to the commands of the local grammar. The matched parameter objects are pickled, so their
+    types must be importable (module-level) classes.
+
+    Chunks of `chunk_size` utterances are sent to the workers, at most two chunks per worker are in flight. Workers
+    are spawned by default: a worker forked from a running event loop inherits its state and can't start its own.
+    """
+    processes = processes or os.cpu_count() or 1
+    commands = grammar().commands
+    executor = ProcessPoolExecutor(
+        processes,
+        mp_context=mp_context or multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(grammar,),
+    )
+    pending: deque[Future[_ChunkResults]] = deque()
+
+    def results(chunk_results: _ChunkResults) -> Iterable[list[SearchResult]]:
+        for utterance_results in chunk_results:
+            yield [
+                SearchResult(command=commands[position], match_result=match, index=index)
+                for position, match, index in utterance_results
+            ]
+
+    try:
+        async for chunk in achunked(strings, chunk_size):
+            pending.append(executor.submit(_search_chunk, chunk, policy))
+            if len(pending) >= processes * 2:
+                for utterance_results in results(await anyio.to_thread.run_sync(pending.popleft().result)):
+                    yield utterance_results
+        while pending:
+            for utterance_results in results(await anyio.to_thread.run_sync(pending.popleft().result)):
+                yield utterance_results
+    finally:
+        # waits for the running chunks off the loop, shielded so a cancelled caller still reaps the workers
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(partial(executor.shutdown, wait=True, cancel_futures=True))
+
+
+_worker_grammar: BatchGrammar | None = None
+
+
+def _init_worker(grammar: Callable[[], BatchGrammar]):
+    global _worker_grammar  # the state of the worker process
+    _worker_grammar = grammar()
+    warmup(_worker_grammar.pattern_parser, _worker_grammar.commands, anchor_index=_worker_grammar.anchor_index)
+
+
+def _search_chunk(strings: list[str | LocaleString], policy: SearchPolicy) -> _ChunkResults:
+    grammar = _worker_grammar
+    assert grammar is not None, "The worker is not initialized"
+    positions = {id(command): position for position, command in enumerate(grammar.commands)}
+
+    async def search() -> _ChunkResults:
+        return [
+            [(positions[id(result.command)], result.match_result, result.index) for result in utterance_results]
+            async for utterance_results in grammar.processor.search_batch(
+                strings,
+                grammar.pattern_parser,
+                grammar.commands,
+                grammar.anchor_index,
+                policy,
+                results_cache=grammar.results_cache,
+            )
+        ]
+
+    return anyio.run(search)
@@ -0,0 +1,734 @@
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable, Iterable, Iterator
+from re import _constants as sre_constants  # type: ignore[attr-defined]
+from re import _parser as sre_parse  # type: ignore[attr-defined]
+from typing import TYPE_CHECKING
+
+from stark.core.patterns.pattern import Pattern, PatternParameter
+from stark.general.cache import CacheStats, LRUCache
+from stark.general.localisation.language_code import LanguageCode
+
+if TYPE_CHECKING:
+    from stark.core.parsing import PatternParser
+
+logger = logging.getLogger(__name__)
+
+# parameters are compiled as single private-use characters and turned into nonterminals of the grammar
+_MARKER_BASE = 0xE000
+
+# flags that change the meaning of the parsed regex in ways the chart doesn't model
+_UNSUPPORTED_FLAGS = (
+    sre_constants.SRE_FLAG_IGNORECASE
+    | sre_constants.SRE_FLAG_LOCALE
+    | sre_constants.SRE_FLAG_MULTILINE
+    | sre_constants.SRE_FLAG_DOTALL
+    | sre_constants.SRE_FLAG_ASCII
+)
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+_BOUNDARY_REGEX = re.compile(r"\b")
+_NON_BOUNDARY_REGEX = re.compile(r"\B")
+
+type Captures = tuple[tuple[str, int, int], ...]
+type End = tuple[int, Captures]  # reachable end position with the captures of its first derivation
+type Ends = Iterable[End]  # in regex priority order
+type Follow = frozenset[str] | None  # characters that can follow a node's match, None if unrestricted
+
+
+class UnsupportedPattern(Exception):
+    pass
+
+
+def _union(a: Follow, b: Follow) -> Follow:
+    return None if a is None or b is None else a | b
+
+
+class _Stream:
+    """
+    Lazily evaluated, memoized ends of a node at a position.
+
+    Ends are pulled only as far as a consumer needs them (usually the first one, like a backtracking regex does), and
+    every consumer shares what was already pulled. Only the first derivation per end is kept: the continuation
+    after a node depends on the position alone, so later derivations with the same end can't match differently.
+    """
+
+    __slots__ = ("_items", "_seen", "_source")
+
+    def __init__(self, source: Iterator[End]):
+        self._items: list[End] = []
+        self._seen: set[int] = set()
+        self._source: Iterator[End] | None = source
+
+    def __iter__(self) -> Iterator[End]:
+        index = 0
+        while True:
+            if index < len(self._items):
+                yield self._items[index]
+                index += 1
+            elif not self._pull():
+                return
+
+    def _pull(self) -> bool:
+        while self._source is not None:
+            item = next(self._source, None)
+            if item is None:
+                self._source = None
+            elif item[0] not in self._seen:
+                self._seen.add(item[0])
+                self._items.append(item)
+                return True
+        return False
+
+
+class Chart:
+    """
+    Span table of a single string: for every (grammar node, start position, follow set), the ends the node reaches.
+
+    Type grammars are shared between all patterns of the parser, so once a type's spans are computed at a position,
+    every command and every nested parameter referencing that type reuses them.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.spans: dict[tuple, _Stream] = {}
+        self.masks: dict[tuple, int] = {}
+        self._follow_masks: dict[frozenset[str], int] = {}
+
+    def follow_mask(self, follow: frozenset[str]) -> int:
+        """Positions a continuation starting with one of the `follow` characters can start at (and the end)."""
+        if (mask := self._follow_masks.get(follow)) is None:
+            mask = 1 << len(self.text)
+            for i, char in enumerate(self.text):
+                if char in follow:
+                    mask |= 1 << i
+            self._follow_masks[follow] = mask
+        return mask
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class _Node:
+    """
+    Grammar node evaluated over a Chart.
+
+    `ends` yields the reachable ends in regex priority order (needed for the first match and its groups), `mask` is
+    the set of the same ends as a bitmask (CYK style, order-free and cheap to combine). Masks let sequences skip
+    continuations that can't add a new end and let the matcher skip positions where nothing matches at all.
+
+    `follow` is the set of characters the continuation after the node can start with. Character runs only end
+    where the continuation can start, so a `**` followed by ` and` ends only before spaces: in practice, positions
+    are word boundaries, the string is effectively tokenized by the grammar itself.
+    """
+
+    _first: tuple[Follow, bool] | None = None
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        key = (self, pos, follow)
+        if (stream := chart.spans.get(key)) is None:
+            stream = _Stream(self._ends(chart, pos, follow))
+            chart.spans[key] = stream
+        return stream
+
+    def _ends(self, chart: Chart, pos: int, follow: Follow) -> Iterator[End]:
+        raise NotImplementedError
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        key = (self, pos, follow)
+        if (mask := chart.masks.get(key)) is None:
+            mask = self._mask(chart, pos, follow)
+            chart.masks[key] = mask
+        return mask
+
+    def _mask(self, chart: Chart, pos: int, follow: Follow) -> int:
+        mask = 0
+        for end, _ in self.ends(chart, pos, follow):
+            mask |= 1 << end
+        return mask
+
+    def first(self) -> tuple[Follow, bool]:
+        """Characters a match can start with (None if unrestricted) and whether the node can match empty."""
+        if self._first is None:
+            self._first = (None, True)  # conservative while computing, guards recursive types
+            self._first = self._compute_first()
+        return self._first
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return None, True
+
+
+class _Text(_Node):
+    def __init__(self, text: str):
+        self.text = text
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        return ((pos + len(self.text), ()),) if chart.text.startswith(self.text, pos) else ()
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        return 1 << (pos + len(self.text)) if chart.text.startswith(self.text, pos) else 0
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return frozenset(self.text[0]), False
+
+
+class _CharSet(_Node):
+    def __init__(self, char_class: str):
+        self.char_class = char_class
+        self.regex = re.compile(char_class)
+        self.run = re.compile(char_class + "*")
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        return ((pos + 1, ()),) if self.regex.match(chart.text, pos) else ()
+
+    def run_end(self, chart: Chart, pos: int) -> int:
+        match = self.run.match(chart.text, pos)
+        assert match
+        return match.end()
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return None, False
+
+
+class _At(_Node):
+    def __init__(self, kind):
+        self.kind = kind
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        text = chart.text
+        match self.kind:
+            case sre_constants.AT_BEGINNING | sre_constants.AT_BEGINNING_STRING:
+                ok = pos == 0
+            case sre_constants.AT_END:
+                ok = pos == len(text) or (pos == len(text) - 1 and text[pos] == "\n")
+            case sre_constants.AT_END_STRING:
+                ok = pos == len(text)
+            case sre_constants.AT_BOUNDARY:
+                ok = _BOUNDARY_REGEX.match(text, pos) is not None
+            case _:  # AT_NON_BOUNDARY
+                ok = _NON_BOUNDARY_REGEX.match(text, pos) is not None
+        return ((pos, ()),) if ok else ()
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return frozenset(), True
+
+
+class _Seq(_Node):
+    def __init__(self, items: list[_Node]):
+        self.items = items
+        self._rest_first: list[tuple[Follow, bool]] | None = None
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        return self._from(chart, 0, pos, follow)
+
+    def _from(self, chart: Chart, index: int, pos: int, follow: Follow) -> Ends:
+        if index == len(self.items):
+            return ((pos, ()),)
+        key = (self, index, pos, follow)
+        if (stream := chart.spans.get(key)) is None:
+            stream = _Stream(self._iter_from(chart, index, pos, follow))
+            chart.spans[key] = stream
+        return stream
+
+    def _iter_from(self, chart: Chart, index: int, pos: int, follow: Follow) -> Iterator[End]:
+        item_follow = self._item_follow(index, follow)
+        if index + 1 == len(self.items):
+            yield from self.items[index].ends(chart, pos, item_follow)
+            return
+        seen = 0
+        for end, captures in self.items[index].ends(chart, pos, item_follow):
+            new = self._mask_from(chart, index + 1, end, follow) & ~seen
+            if not new:
+                continue  # every end of this continuation was already reached by a higher priority derivation
+            seen |= new
+            for rest_end, rest_captures in self._from(chart, index + 1, end, follow):
+                if new >> rest_end & 1:
+                    yield rest_end, captures + rest_captures
+                    new ^= 1 << rest_end
+                    if not new:
+                        break
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        return self._mask_from(chart, 0, pos, follow)
+
+    def _mask_from(self, chart: Chart, index: int, pos: int, follow: Follow) -> int:
+        if index == len(self.items):
+            return 1 << pos
+        key = (self, index, pos, follow)
+        if (mask := chart.masks.get(key)) is None:
+            mask = self.items[index].mask(chart, pos, self._item_follow(index, follow))
+            if index + 1 < len(self.items):
+                mask = self._continue_mask(chart, index + 1, mask, follow)
+            chart.masks[key] = mask
+        return mask
+
+    def _continue_mask(self, chart: Chart, index: int, positions: int, follow: Follow) -> int:
+        mask = 0
+        for position in _bits(positions):
+            mask |= self._mask_from(chart, index, position, follow)
+        return mask
+
+    def _item_follow(self, index: int, follow: Follow) -> Follow:
+        rest_first, rest_nullable = self._get_rest_first()[index]
+        return _union(rest_first, follow) if rest_nullable else rest_first
+
+    def _get_rest_first(self) -> list[tuple[Follow, bool]]:
+        # first set of items[index + 1:] for every index
+        if self._rest_first is None:
+            rest_first: list[tuple[Follow, bool]] = []
+            first: Follow = frozenset()
+            nullable = True
+            for item in reversed(self.items):
+                rest_first.append((first, nullable))
+                item_first, item_nullable = item.first()
+                first = _union(item_first, first) if item_nullable else item_first
+                nullable = nullable and item_nullable
+            self._rest_first = rest_first[::-1]
+        return self._rest_first
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        first: Follow = frozenset()
+        for item in self.items:
+            item_first, item_nullable = item.first()
+            first = _union(first, item_first)
+            if not item_nullable:
+                return first, False
+        return first, True
+
+
+class _Alt(_Node):
+    def __init__(self, branches: list[_Node]):
+        self.branches = branches
+
+    def _ends(self, chart: Chart, pos: int, follow: Follow) -> Iterator[End]:
+        for branch in self.branches:
+            yield from branch.ends(chart, pos, follow)
+
+    def _mask(self, chart: Chart, pos: int, follow: Follow) -> int:
+        mask = 0
+        for branch in self.branches:
+            mask |= branch.mask(chart, pos, follow)
+        return mask
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        first: Follow = frozenset()
+        nullable = False
+        for branch in self.branches:
+            branch_first, branch_nullable = branch.first()
+            first = _union(first, branch_first)
+            nullable = nullable or branch_nullable
+        return first, nullable
+
+
+class _Group(_Node):
+    def __init__(self, name: str | None, body: _Node):
+        self.name = name
+        self.body = body
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        if self.name is None:
+            return self.body.ends(chart, pos, follow)
+        return super().ends(chart, pos, follow)
+
+    def _ends(self, chart: Chart, pos: int, follow: Follow) -> Iterator[End]:
+        for end, captures in self.body.ends(chart, pos, follow):
+            yield end, (*captures, (self.name, pos, end))
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        return self.body.mask(chart, pos, follow)
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return self.body.first()
+
+
+class _Repeat(_Node):
+    def __init__(self, body: _Node, min_count: int, max_count: int, lazy: bool):
+        self.body = body
+        self.min = min_count
+        self.max = max_count
+        self.lazy = lazy
+
+    def _ends(self, chart: Chart, pos: int, follow: Follow) -> Iterator[End]:
+        if isinstance(self.body, _CharSet):
+            # single character body: every end up to the end of the run is reachable
+            run_end = min(self.body.run_end(chart, pos), pos + self.max)
+            if run_end - pos < self.min:
+                return
+            text = chart.text
+            ends = range(pos + self.min, run_end + 1) if self.lazy else range(run_end, pos + self.min - 1, -1)
+            for end in ends:
+                if follow is None or end == len(text) or text[end] in follow:
+                    yield end, ()
+            return
+        yield from self._iterate(chart, pos, 0)
+
+    def _iterate(self, chart: Chart, pos: int, count: int) -> Ends:
+        state = count if count < self.min or self.max != sre_constants.MAXREPEAT else self.min
+        key = (self, pos, state)
+        if (stream := chart.spans.get(key)) is None:
+            stream = _Stream(self._iter_iterations(chart, pos, count))
+            chart.spans[key] = stream
+        return stream
+
+    def _iter_iterations(self, chart: Chart, pos: int, count: int) -> Iterator[End]:
+        can_stop = count >= self.min
+        if can_stop and self.lazy:
+            yield pos, ()
+        if count < self.max:
+            for end, captures in self.body.ends(chart, pos):
+                if end == pos and can_stop:
+                    yield end, captures  # like re, an empty iteration is the last one
+                    continue
+                for rest_end, rest_captures in self._iterate(chart, end, count + 1):
+                    yield rest_end, captures + rest_captures
+        if can_stop and not self.lazy:
+            yield pos, ()
+
+    def _mask(self, chart: Chart, pos: int, follow: Follow) -> int:
+        if isinstance(self.body, _CharSet):
+            run_end = min(self.body.run_end(chart, pos), pos + self.max)
+            if run_end - pos < self.min:
+                return 0
+            mask = (1 << (run_end + 1)) - (1 << (pos + self.min))
+            return mask if follow is None else mask & chart.follow_mask(follow)
+
+        def step(positions: int) -> int:
+            reached = 0
+            for position in _bits(positions):
+                reached |= self.body.mask(chart, position)
+            return reached
+
+        reached = 1 << pos
+        for _ in range(self.min):
+            reached = step(reached)
+        # breadth-first: the first time a position is reached uses the fewest iterations
+        mask = frontier = reached
+        count = self.min
+        while frontier and count < self.max:
+            frontier = step(frontier) & ~mask
+            mask |= frontier
+            count += 1
+        return mask
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        body_first, body_nullable = self.body.first()
+        return body_first, body_nullable or self.min == 0
+
+
+class _Assert(_Node):
+    def __init__(self, body: _Node, negate: bool):
+        self.body = body
+        self.negate = negate
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        first = next(iter(self.body.ends(chart, pos)), None)
+        if self.negate:
+            return () if first else ((pos, ()),)
+        return ((pos, first[1]),) if first else ()  # groups captured in a lookahead are kept, like in re
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        return 1 << pos if bool(self.body.mask(chart, pos)) != self.negate else 0
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return frozenset(), True
+
+
+class _Param(_Node):
+    """Nonterminal: spans of a registered type, resolved lazily so recursive types don't recurse on build."""
+
+    def __init__(self, resolve: Callable[[], _Node]):
+        self._resolve = resolve
+        self._node: _Node | None = None
+
+    @property
+    def node(self) -> _Node:
+        if self._node is None:
+            self._node = self._resolve()
+        return self._node
+
+    def ends(self, chart: Chart, pos: int, follow: Follow = None) -> Ends:
+        return self.node.ends(chart, pos, follow)
+
+    def mask(self, chart: Chart, pos: int, follow: Follow = None) -> int:
+        return self.node.mask(chart, pos, follow)
+
+    def _compute_first(self) -> tuple[Follow, bool]:
+        return self.node.first()
+
+
+class ChartMatch:
+    """Result of ChartMatcher, mirrors the subset of `re.Match` used by the PatternParser."""
+
+    def __init__(self, string: str, start: int, end: int, captures: Captures, group_names: tuple[str, ...]):
+        self.string = string
+        self._span = (start, end)
+        self._group_names = group_names
+        self._groups = {name: (group_start, group_end) for name, group_start, group_end in captures}
+
+    def span(self, group: int | str = 0) -> tuple[int, int]:
+        if group == 0:
+            return self._span
+        return self._groups.get(str(group), (-1, -1))
+
+    def start(self, group: int | str = 0) -> int:
+        return self.span(group)[0]
+
+    def end(self, group: int | str = 0) -> int:
+        return self.span(group)[1]
+
+    def group(self, group: int | str = 0) -> str | None:
+        start, end = self.span(group)
+        return None if start == -1 else self.string[start:end]
+
+    def groupdict(self) -> dict[str, str | None]:
+        return {name: self.group(name) for name in self._group_names}
+
+    def __repr__(self) -> str:
+        return f"<ChartMatch span={self._span} match={self.group()!r}>"
+
+
+class ChartMatcher:
+    """Drop-in replacement for a compiled regex in PatternParser: `finditer` has `re.finditer` semantics."""
+
+    def __init__(self, engine: ChartEngine, root: _Node, pattern: str, group_names: tuple[str, ...]):
+        self.engine = engine
+        self.root = root
+        self.pattern = pattern
+        self.group_names = group_names
+
+    def finditer(self, string: str) -> Iterator[ChartMatch]:
+        text = str(string)
+        chart = self.engine.get_chart(text)
+        pos = 0
+        while pos <= len(text):
+            if not self.root.mask(chart, pos):
+                pos += 1
+                continue
+            ends = self.root.ends(chart, pos)
+            first = next(iter(ends), None)
+            if first is None:
+                pos += 1
+                continue
+            end, captures = first
+            if end == pos:
+                yield ChartMatch(text, pos, end, captures, self.group_names)
+                # same as re: after an empty match the next one at this position must advance
+                advancing = next(((e, c) for e, c in ends if e > pos), None)
+                if advancing is None:
+                    pos += 1
+                    continue
+                end, captures = advancing
+            yield ChartMatch(text, pos, end, captures, self.group_names)
+            pos = end
+
+
+class ChartEngine:
+    """
+    Chart parsing engine for PatternParser, selected with `ParsingEngine.CHART`.
+
+    The regex engine inlines the regex of every nested type into the pattern and reruns the whole regex for each
+    command and each prefill step. The chart engine compiles every pattern once into a grammar whose parameters are
+    nonterminals pointing to shared per-type grammars, and evaluates it packrat style over a per-string chart of
+    (node, position) -> reachable ends. Everything a type can span in an utterance is computed once and reused by all
+    commands, nested parameters and prefill reruns over the same string.
+
+    The evaluation follows the backtracking priority of the regex engine (alternatives left to right, greedy repeats
+    longest first, lazy repeats shortest first), so it yields the same matches and groups as the compiled regex.
+    Patterns using regex features the chart doesn't model (backreferences, lookbehinds, inline flags, ...) are
+    reported as unsupported and the PatternParser falls back to the regex engine for them.
+    """
+
+    def __init__(self, pattern_parser: PatternParser, chart_cache_size: int = 64):
+        self.pattern_parser = pattern_parser
+        self._charts: LRUCache[str, Chart] = LRUCache(maxsize=chart_cache_size, name="parsing.charts")
+        self._matchers: dict[tuple, ChartMatcher | None] = {}
+        self._types: dict[tuple[str, LanguageCode, bool, bool], _Node] = {}
+        self._generation = pattern_parser.generation
+
+    @property
+    def chart_cache_stats(self) -> CacheStats:
+        return self._charts.stats
+
+    def clear_charts(self):
+        self._charts.clear()
+
+    def clear(self):
+        self._charts.clear()
+        self._matchers.clear()
+        self._types.clear()
+        self._generation = self.pattern_parser.generation
+
+    def get_chart(self, text: str) -> Chart:
+        if (chart := self._charts.get(text)) is None:
+            chart = Chart(text)
+            self._charts.put(text, chart)
+        return chart
+
+    def matcher(
+        self,
+        pattern: Pattern,
+        prefill: dict[str, str] | None = None,
+        language_code: LanguageCode = "base",
+    ) -> ChartMatcher | None:
+        """Returns the matcher of the pattern, or None if the pattern is not supported by the chart engine."""
+        if self._generation != self.pattern_parser.generation:
+            self.clear()  # grammars reference the compiled patterns of the previous generation
+
+        key = (pattern._origin, language_code, tuple(sorted(prefill.items())) if prefill else ())
+        if key in self._matchers:
+            return self._matchers[key]
+
+        try:
+            source, root = self._build(pattern, prefill or {}, language_code, capture=True)
+            matcher = ChartMatcher(self, root, source, tuple(pattern.group_name_to_param))
+        except UnsupportedPattern as e:
+            logger.debug(f"Pattern {pattern} is not supported by the chart engine, falling back to regex: {e}")
+            matcher = None
+        self._matchers[key] = matcher
+        return matcher
+
+    def _type_node(self, type_name: str, language_code: LanguageCode, lazy: bool, anchored: bool) -> _Node:
+        key = (type_name, language_code, lazy, anchored)
+        if (node := self._types.get(key)) is None:
+            object_type = self.pattern_parser.parameter_types_by_name[type_name].type
+            pattern = self.pattern_parser._resolve_pattern(object_type, language_code)
+            suffix = ("?" if lazy else "") + ("$" if anchored else "")
+            _, node = self._build(pattern, {}, language_code, capture=False, suffix=suffix)
+            self._types[key] = node
+        return node
+
+    def _build(
+        self,
+        pattern: Pattern,
+        prefill: dict[str, str],
+        language_code: LanguageCode,
+        capture: bool,
+        suffix: str = "",
+    ) -> tuple[str, _Node]:
+        markers = {name: chr(_MARKER_BASE + i) for i, name in enumerate(pattern.parameters) if name not in prefill}
+        source = self.pattern_parser._compile_pattern(
+            pattern, prefill={**prefill, **markers}, language_code=language_code
+        )
+        source += suffix
+
+        params: dict[int, _Param] = {}
+        for name, marker in markers.items():
+            params[ord(marker)] = self._param(pattern.parameters[name], marker, source, language_code)
+
+        try:
+            parsed = sre_parse.parse(source)
+        except re.error as e:
+            raise UnsupportedPattern(f"invalid regex: {e}") from e
+        if parsed.state.flags & _UNSUPPORTED_FLAGS:
+            raise UnsupportedPattern("regex flags")
+
+        group_names = {index: name for name, index in parsed.state.groupdict.items()} if capture else {}
+        return source, _Converter(params, group_names).sequence(parsed)
+
+    def _param(self, parameter: PatternParameter, marker: str, source: str, language_code: LanguageCode) -> _Param:
+        registered = self.pattern_parser.parameter_types_by_name[parameter.type_name]
+        type_pattern = self.pattern_parser._resolve_pattern(registered.type, language_code)
+        type_source = self.pattern_parser._compile_pattern(
+            type_pattern,
+            prefill={name: chr(_MARKER_BASE + i) for i, name in enumerate(type_pattern.parameters)},
+            language_code=language_code,
+        )
+        # same adjustments as PatternParser._build_pattern does for inlined greedy parameters
+        lazy = registered.type.greedy and type_source[-1] in {"*", "+", "}", "?"}
+        anchored = lazy and source.endswith(f">{marker})")
+        return _Param(lambda: self._type_node(parameter.type_name, language_code, lazy, anchored))
+
+
+class _Converter:
+    def __init__(self, params: dict[int, _Param], group_names: dict[int, str]):
+        self.params = params
+        self.group_names = group_names
+
+    def sequence(self, items) -> _Node:
+        nodes: list[_Node] = []
+        text: list[str] = []
+        for op, av in items:
+            if op is sre_constants.LITERAL and av not in self.params:
+                text.append(chr(av))
+                continue
+            if text:
+                nodes.append(_Text("".join(text)))
+                text = []
+            nodes.append(self.item(op, av))
+        if text:
+            nodes.append(_Text("".join(text)))
+        if len(nodes) == 1:
+            return nodes[0]
+        return _Seq(nodes)
+
+    def item(self, op, av) -> _Node:
+        match op:
+            case sre_constants.LITERAL:
+                return self.params[av]
+            case sre_constants.NOT_LITERAL:
+                return _CharSet(f"[^{re.escape(chr(av))}]")
+            case sre_constants.ANY:
+                return _CharSet(".")
+            case sre_constants.IN:
+                return _CharSet(self.char_class(av))
+            case sre_constants.BRANCH:
+                _, branches = av
+                return _Alt([self.sequence(branch) for branch in branches])
+            case sre_constants.SUBPATTERN:
+                group, add_flags, del_flags, body = av
+                if add_flags or del_flags:
+                    raise UnsupportedPattern("inline flags")
+                return _Group(self.group_names.get(group), self.sequence(body))
+            case sre_constants.MAX_REPEAT | sre_constants.MIN_REPEAT:
+                min_count, max_count, body = av
+                body_node = self.sequence(body)
+                if isinstance(body_node, _Text) and len(body_node.text) == 1:
+                    body_node = _CharSet(f"[{re.escape(body_node.text)}]")
+                return _Repeat(body_node, min_count, max_count, lazy=op is sre_constants.MIN_REPEAT)
+            case sre_constants.AT if av in {
+                sre_constants.AT_BEGINNING,
+                sre_constants.AT_BEGINNING_STRING,
+                sre_constants.AT_END,
+                sre_constants.AT_END_STRING,
+                sre_constants.AT_BOUNDARY,
+                sre_constants.AT_NON_BOUNDARY,
+            }:
+                return _At(av)
+            case sre_constants.ASSERT | sre_constants.ASSERT_NOT:
+                direction, body = av
+                if direction != 1:
+                    raise UnsupportedPattern("lookbehind")
+                return _Assert(self.sequence(body), negate=op is sre_constants.ASSERT_NOT)
+            case _:
+                raise UnsupportedPattern(f"regex operation {op}")
+
+    def char_class(self, items) -> str:
+        parts: list[str] = []
+        for op, av in items:
+            match op:
+                case sre_constants.NEGATE:
+                    parts.insert(0, "^")
+                case sre_constants.LITERAL:
+                    parts.append(re.escape(chr(av)))
+                case sre_constants.RANGE:
+                    low, high = av
+                    parts.append(f"{re.escape(chr(low))}-{re.escape(chr(high))}")
+                case sre_constants.CATEGORY if av in _CATEGORIES:
+                    parts.append(_CATEGORIES[av])
+                case _:
+                    raise UnsupportedPattern(f"character class item {op}")
+        return "[" + "".join(parts) + "]"
@@ -4,6 +4,7 @@ import inspect
 import logging
 import warnings
 from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum, auto
 from functools import update_wrapper, wraps
@@ -16,11 +17,12 @@ from typing import (
 )
 from uuid import UUID, uuid4
 
-import asyncer
 from pydantic import BaseModel, Field
 
 from ..general.classproperty import classproperty
+from ..general.dependencies import DependencyParameter, dependency_parameters
 from ..general.localisation import LanguageCode, LocalizableString
+from .executors import CommandExecutor, default_thread_pool
 from .patterns import Pattern
 
 logger = logging.getLogger(__name__)
@@ -32,17 +34,73 @@ type SyncCommandRunner = Callable[..., "Response" | None]  # ty: ignore[unsuppor
 type CommandRunner = SyncCommandRunner | AsyncCommandRunner  # TypeVar("CommandRunner", bound=SyncCommandRunner | AsyncCommandRunner)
 
 
+@dataclass(frozen=True)
+class InvocationPlan:
+    """
+    How a command runner is called, built once when the command is created instead of inspecting the runner on every
+    run.
+    """
+
+    runner: AsyncCommandRunner  # async runners as is, sync ones run in the executor
+    accepts_kwargs: bool  # the runner has **kwargs, all the parameters are passed
+    parameter_names: frozenset[str]  # otherwise only these are passed
+    optional: tuple[str, ...]  # parameters annotated as optional, None if missing
+    pattern_parameters: frozenset[str]  # filled from the matched pattern
+    dependencies: tuple[DependencyParameter, ...]  # the rest, resolved by the DependencyManager
+    executor: CommandExecutor | None  # runs the sync runner, None for async ones
+
+    @classmethod
+    def build(
+        cls,
+        runner: CommandRunner,
+        patterns: dict[LanguageCode, Pattern],
+        executor: CommandExecutor | None = None,
+        name: str = "",
+    ) -> InvocationPlan:
+        async_runner: AsyncCommandRunner
+        if inspect.iscoroutinefunction(runner) or inspect.isasyncgen(runner):
+            # async functions (coroutines) and async generators are remain as is
+            if executor is not None:
+                raise TypeError(f"Command {name} is async, only sync commands run in an executor")
+            async_runner = cast(AsyncCommandRunner, runner)
+        else:
+            # sync functions run in a bounded pool of worker threads (or processes) to make them async (coroutines)
+            executor = executor or default_thread_pool
+            async_runner = executor.wrap(cast(SyncCommandRunner, runner), name)
+
+        signature = inspect.signature(runner)
+        pattern_parameters = frozenset(name for pattern in patterns.values() for name in pattern.parameters)
+        parameters = dependency_parameters(runner)
+        return cls(
+            runner=async_runner,
+            accepts_kwargs=any(p.kind == p.VAR_KEYWORD for p in signature.parameters.values()),
+            parameter_names=frozenset(name for name, _ in parameters),
+            optional=tuple(name for name, annotation in parameters if type(None) in get_args(annotation)),
+            pattern_parameters=pattern_parameters,
+            dependencies=tuple((name, annotation) for name, annotation in parameters if name not in pattern_parameters),
+            executor=executor,
+        )
+
+
 class Command[T: CommandRunner]:
     name: str
     patterns: dict[LanguageCode, Pattern]
+    plan: InvocationPlan
     _runner: T
 
-    def __init__(self, name: str, patterns: dict[LanguageCode, Pattern], runner: T):
+    def __init__(
+        self,
+        name: str,
+        patterns: dict[LanguageCode, Pattern],
+        runner: T,
+        executor: CommandExecutor | None = None,
+    ):
         assert patterns
         assert all(isinstance(p, Pattern) for p in patterns.values())
         self.name = name
         self.patterns = patterns
         self._runner = runner
+        self.plan = InvocationPlan.build(runner, patterns, executor, name)
         update_wrapper(self, runner)
 
     def get_pattern(self, language_code: LanguageCode) -> Pattern:
@@ -62,28 +120,19 @@ class Command[T: CommandRunner]:
 
         parameters = parameters_dict or {}
         parameters.update(kwparameters)
+        plan = self.plan
+        runner = plan.runner
 
         # auto fill optionals
-        for param_name, param_type in self._runner.__annotations__.items():
-            if param_name not in parameters and type(None) in get_args(param_type):
-                parameters[param_name] = None
-
-        runner: AsyncCommandRunner
-
-        if inspect.iscoroutinefunction(self._runner) or inspect.isasyncgen(self._runner):
-            # async functions (coroutines) and async generators are remain as is
-            runner = cast(AsyncCommandRunner, self._runner)
-        else:
-            # sync functions are wrapped with asyncer.asyncify to make them async (coroutines)
-            # async generators are not supported yet by asyncer.asyncify (https://github.com/tiangolo/asyncer/discussions/86)
-            runner = asyncer.asyncify(cast(SyncCommandRunner, self._runner))
+        for param_name in plan.optional:
+            parameters.setdefault(param_name, None)
 
-        if any(p.kind == p.VAR_KEYWORD for p in inspect.signature(self._runner).parameters.values()):
+        if plan.accepts_kwargs:
             # if command runner accepts **kwargs, pass all parameters
             coroutine = runner(**parameters)
         else:
             # otherwise pass only parameters that are in command runner signature to prevent TypeError: got an unexpected keyword argument
-            coroutine = runner(**{k: v for k, v in parameters.items() if k in self._runner.__code__.co_varnames})  # ty: ignore[unresolved-attribute]  # runner is always a function with __code__; ty Callable gap (see ty FAQ)
+            coroutine = runner(**{k: v for k, v in parameters.items() if k in plan.parameter_names})
 
         @wraps(runner)
         async def coroutine_wrapper() -> ResponseOptions:
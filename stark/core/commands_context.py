@@ -5,14 +5,17 @@ import warnings
 from types import AsyncGeneratorType, GeneratorType
 from typing import Any, Protocol, runtime_checkable
 
-import anyio
 from asyncer import syncify
 from asyncer._main import TaskGroup
 
 from stark.core.commands_context_processor import (
     CommandsContextLayer,
     RecognizedEntity,
+    SearchPolicy,
+    SearchStats,
 )
+from stark.core.deadline import Deadline, Seconds, TimeoutStats, deadline_scope
+from stark.core.parse_memo import ParseMemo, parse_memo_scope
 from stark.core.parsing import PatternParser
 from stark.core.types.object import NLObject
 from stark.general.localisation import LocaleString, Localizer
@@ -32,6 +35,7 @@ from .command import (
     ResponseOptions,
 )
 from .commands_manager import CommandsManager
+from .response_queue import ResponseQueue
 
 logger = logging.getLogger(__name__)
 
@@ -51,11 +55,16 @@ class CommandsContext:
     dependency_manager: DependencyManager
     pattern_parser: PatternParser
     last_response: Response | None = None
+    last_parse_memo: ParseMemo | None = None  # memo of the latest process_string call, for hit-rate inspection
+    search_policy: SearchPolicy
+    search_stats: SearchStats
+    parse_budget: Seconds | None  # time budget of every process_string call, None for no limit
+    timeout_stats: TimeoutStats
     # TODO: add history
     context_queue: list[CommandsContextLayer]
 
     _delegate: CommandsContextDelegate | None = None
-    _response_queue: list[Response]
+    _response_queue: ResponseQueue
     _task_group: TaskGroup
 
     def __init__(
@@ -65,6 +74,9 @@ class CommandsContext:
         dependency_manager: DependencyManager = default_dependency_manager,
         processors: list[Any] | None = None,
         localizer: Localizer | None = None,
+        search_policy: SearchPolicy = SearchPolicy.ALL,
+        parse_budget: Seconds | None = None,
+        response_queue_size: int = 1024,
     ):
         assert isinstance(task_group, TaskGroup), task_group
         assert isinstance(commands_manager, CommandsManager)
@@ -72,7 +84,11 @@ class CommandsContext:
         self.pattern_parser = PatternParser(localizer=localizer)
         self.commands_manager = commands_manager
         self.context_queue = [self.root_context]
-        self._response_queue = []
+        self.search_policy = search_policy
+        self.search_stats = SearchStats()
+        self.parse_budget = parse_budget
+        self.timeout_stats = TimeoutStats()
+        self._response_queue = ResponseQueue(response_queue_size)
         self._task_group = task_group
         self.dependency_manager = dependency_manager
         self.dependency_manager.add_dependency(None, AsyncResponseHandler, self)
@@ -108,17 +124,27 @@ class CommandsContext:
         search_results: list[Any] = []
         context_pops: int = 0
 
-        for processor in self.processors:
-            logger.debug(f"Processing context {processor=} with {string=} {recognized_entities=} {self.context_queue=}")
-            search_results, context_pops = await processor.process_string(string, self, recognized_entities)
-            if search_results:
-                # Pop contexts as directed by processor
-                for _ in range(context_pops):
-                    if self.context_queue:
-                        self.context_queue.pop(0)
-                break
-        else:  # no results found at all
-            self.context_queue = [self.root_context]  # nothing found, reset to root context
+        deadline = Deadline.after(self.parse_budget) if self.parse_budget is not None else None
+
+        # sub-parses are shared across commands and layers of this utterance, the deadline bounds all of them
+        with parse_memo_scope() as parse_memo, deadline_scope(deadline):
+            self.last_parse_memo = parse_memo
+            for processor in self.processors:
+                logger.debug(
+                    f"Processing context {processor=} with {string=} {recognized_entities=} {self.context_queue=}"
+                )
+                search_results, context_pops = await processor.process_string(string, self, recognized_entities)
+                if search_results:
+                    # Pop contexts as directed by processor
+                    for _ in range(context_pops):
+                        if self.context_queue:
+                            self.context_queue.pop(0)
+                    break
+            else:  # no results found at all
+                self.context_queue = [self.root_context]  # nothing found, reset to root context
+
+        if deadline is not None:
+            self.timeout_stats.add(deadline)
 
         # Prepare and execute found commands;
 
@@ -130,11 +156,11 @@ class CommandsContext:
 
             substring = search_result.match_result.substring
             lang = substring.language_code if isinstance(substring, LocaleString) else string.language_code
+            # language is a command-specific dependency, overridden for this call only
             lang_dep = Dependency(None, LanguageCode, lang)  # type: ignore[arg-type]  # ty: ignore[invalid-argument-type]  # LanguageCode Literal alias used as a runtime dependency key
-            self.dependency_manager.dependencies.add(lang_dep)
-            parameters.update(self.dependency_manager.resolve(search_result.command._runner))
-            # language is a command-specific temporary dependency
-            self.dependency_manager.dependencies.discard(lang_dep)
+            parameters.update(
+                self.dependency_manager.resolve_parameters(search_result.command.plan.dependencies, [lang_dep])
+            )
 
             self.run_command(search_result.command, parameters)
 
@@ -142,7 +168,10 @@ class CommandsContext:
 
     def inject_dependencies(self, runner: Command[CommandRunner] | CommandRunner) -> CommandRunner:
         def injected_func(**kwargs) -> ResponseOptions:
-            kwargs.update(self.dependency_manager.resolve(runner._runner if isinstance(runner, Command) else runner))
+            if isinstance(runner, Command):
+                kwargs.update(self.dependency_manager.resolve_parameters(runner.plan.dependencies))
+            else:
+                kwargs.update(self.dependency_manager.resolve(runner))
             return runner(**kwargs)  # type: ignore
 
         return injected_func  # type: ignore
@@ -186,11 +215,10 @@ class CommandsContext:
 
     async def respond(self, response: Response):  # async forces to run in main thread
         assert isinstance(response, Response)
-        self._response_queue.append(response)
+        await self._response_queue.put(response)  # waits while the queue is full
 
     async def unrespond(self, response: Response):
-        if response in self._response_queue:
-            self._response_queue.remove(response)
+        self._response_queue.remove(response)
         self.delegate.remove_response(response)
 
     async def pop_context(self):
@@ -209,12 +237,14 @@ class CommandsContext:
     async def handle_responses(self):
         self.is_stopped = False
         while not self.is_stopped:
-            while self._response_queue:
-                await self._process_response(self._response_queue.pop(0))
-            await anyio.sleep(0.01)
+            if self._response_queue:
+                await self._process_response(self._response_queue.popleft())
+            else:
+                await self._response_queue.wait()  # woken by the next response or stop()
 
     def stop(self):
         self.is_stopped = True
+        self._response_queue.wake()
 
     async def _process_response(self, response: Response):
         if response is Response.repeat_last and self.last_response:
@@ -3,6 +3,7 @@ from __future__ import annotations
 import logging
 from abc import ABC
 from dataclasses import dataclass
+from enum import StrEnum
 from typing import TYPE_CHECKING
 
 from stark.core.command import Command
@@ -22,6 +23,24 @@ class CommandsContextLayer:
     parameters: dict[str, NLObject]
 
 
+class SearchPolicy(StrEnum):
+    ALL = "all"  # wait for every command of the layer, multiple commands per string are found
+    FIRST_MATCH = "first_match"  # return the highest priority match as soon as it's confirmed, cancel the rest
+
+
+@dataclass
+class SearchStats:
+    """Counters of the command search work, accumulated per CommandsContext."""
+
+    layers_searched: int = 0
+    layers_skipped: int = 0  # deeper layers not searched because a higher layer had results
+    early_returns: int = 0  # layer searches finished by a confirmed first match
+    matches_cancelled: int = 0  # command matches cancelled in flight or never started
+
+    def reset(self):
+        self.layers_searched = self.layers_skipped = self.early_returns = self.matches_cancelled = 0
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -69,7 +88,9 @@ class CommandsContextProcessor(ABC):  # noqa: B024  # intentional ABC base: subc
                 layer,
                 recognized_entities,
             )
+            context.search_stats.layers_searched += 1
             if results:
+                context.search_stats.layers_skipped += len(context.context_queue) - pops - 1
                 return results, pops
             pops += 1
         return [], pops
@@ -5,10 +5,12 @@ from dataclasses import dataclass
 from types import UnionType
 from typing import cast
 
+from stark.core.anchor_index import CommandList, CommandsAnchorIndex
 from stark.core.parsing import MatchResult
 from stark.general.localisation.language_code import LanguageCode
 
 from .command import AsyncResponseHandler, Command, CommandRunner, ResponseHandler
+from .executors import CommandExecutor
 from .patterns import Pattern
 
 
@@ -22,10 +24,12 @@ class SearchResult:
 class CommandsManager:
     name: str
     commands: list[Command]
+    anchor_index: CommandsAnchorIndex
 
     def __init__(self, name: str = ""):
         self.name = name or "CommandsManager"
-        self.commands = []
+        self.commands = CommandList()
+        self.anchor_index = CommandsAnchorIndex(self.commands)
 
     def get_by_name(self, name: str) -> Command | None:
         for command in self.commands:
@@ -33,7 +37,7 @@ class CommandsManager:
                 return command
         return None
 
-    def new(self, pattern_str: str | dict[str, str], hidden: bool = False):
+    def new(self, pattern_str: str | dict[str, str], hidden: bool = False, executor: CommandExecutor | None = None):
         def creator(runner: CommandRunner) -> Command:
             if isinstance(pattern_str, dict):
                 patterns = {lang: Pattern(p) for lang, p in pattern_str.items()}
@@ -67,10 +71,15 @@ class CommandsManager:
 
             # create command
 
-            cmd = Command(f"{self.name}.{runner.__name__}", cast(dict[LanguageCode, Pattern], patterns), runner)  # ty: ignore[unresolved-attribute]  # runner is a function with __name__; ty Callable gap
+            cmd = Command(
+                f"{self.name}.{runner.__name__}",  # ty: ignore[unresolved-attribute]  # runner is a function with __name__; ty Callable gap
+                cast(dict[LanguageCode, Pattern], patterns),
+                runner,
+                executor,
+            )
 
             if not hidden:
-                self.commands.append(cmd)
+                self.append(cmd)
 
             return cmd
 
@@ -78,6 +87,8 @@ class CommandsManager:
 
     def append(self, command: Command):
         self.commands.append(command)
+        self.anchor_index.add(command)
 
     def extend(self, other_manager: CommandsManager):
         self.commands.extend(other_manager.commands)
+        self.anchor_index.extend(other_manager.commands)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import anyio
+
+type Seconds = float
+
+
+@dataclass
+class Deadline:
+    """
+    Time budget of a single utterance, in `anyio.current_time()` terms.
+
+    Parsing checks the deadline between units of work (match candidates, parameters, object candidates, sliding
+    windows) and stops once it has expired, keeping the results completed so far. Object parses also run in a cancel
+    scope bound to the deadline, so a slow `did_parse` is interrupted as well.
+    """
+
+    at: float
+    timed_out_commands: Counter[str] = field(default_factory=Counter)
+    timed_out_types: Counter[str] = field(default_factory=Counter)
+
+    @classmethod
+    def after(cls, budget: Seconds) -> Deadline:
+        return cls(anyio.current_time() + budget)
+
+    @property
+    def expired(self) -> bool:
+        return anyio.current_time() >= self.at
+
+    @property
+    def remaining(self) -> Seconds:
+        return max(0.0, self.at - anyio.current_time())
+
+
+@dataclass
+class TimeoutStats:
+    """Timeouts accumulated over utterances, per command and per object type."""
+
+    utterances: int = 0  # utterances that ran out of the budget
+    by_command: Counter[str] = field(default_factory=Counter)
+    by_type: Counter[str] = field(default_factory=Counter)
+
+    def add(self, deadline: Deadline):
+        if deadline.timed_out_commands or deadline.timed_out_types:
+            self.utterances += 1
+        self.by_command.update(deadline.timed_out_commands)
+        self.by_type.update(deadline.timed_out_types)
+
+    def reset(self):
+        self.utterances = 0
+        self.by_command.clear()
+        self.by_type.clear()
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar("stark_deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+def is_expired() -> bool:
+    return (deadline := _current_deadline.get()) is not None and deadline.expired
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline | None) -> Iterator[Deadline | None]:
+    """Sets the deadline for the parsing within the scope (including child tasks), None means no time limit."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
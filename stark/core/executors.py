@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import importlib
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from functools import partial
+from time import perf_counter
+from typing import Any
+
+import anyio
+import anyio.to_process
+from anyio.lowlevel import RunVar
+
+from stark.general.metrics import MetricsRegistry, default_metrics_registry
+
+
+class ExecutorOverloadedError(RuntimeError):
+    pass
+
+
+class CommandExecutor(ABC):
+    """
+    Bounded pool that runs sync command runners off the event loop.
+
+    At most `max_workers` calls run at once, the rest wait in the queue. When `max_queue` calls are already waiting,
+    new calls wait to be admitted (backpressure on whoever awaits the command) or, with `reject_when_full`, fail with
+    `ExecutorOverloadedError` right away, so a burst of one heavy command can't pile up behind the others. The time
+    spent in the queue and running is recorded in `metrics` as `stark_executor_queue_seconds` and
+    `stark_executor_run_seconds`.
+    """
+
+    name: str
+    max_workers: int
+    max_queue: int | None
+    reject_when_full: bool
+    metrics: MetricsRegistry
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int | None = None,
+        reject_when_full: bool = False,
+        metrics: MetricsRegistry | None = None,
+    ):
+        assert max_workers > 0
+        assert max_queue is None or max_queue >= 0
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.reject_when_full = reject_when_full
+        self.metrics = metrics or default_metrics_registry
+        # like the anyio default thread limiter, the primitives belong to an event loop, each one gets its own
+        self._limiters: RunVar[anyio.CapacityLimiter] = RunVar(f"stark_executor_{name}_limiter")
+        self._admissions: RunVar[anyio.Semaphore] = RunVar(f"stark_executor_{name}_admission")
+        self._pending = 0  # admitted calls, queued or running
+
+    @property
+    def running(self) -> int:
+        try:
+            return int(self._limiters.get().borrowed_tokens)
+        except LookupError:
+            return 0
+
+    @property
+    def _limiter(self) -> anyio.CapacityLimiter:
+        try:
+            return self._limiters.get()
+        except LookupError:
+            limiter = anyio.CapacityLimiter(self.max_workers)
+            self._limiters.set(limiter)
+            return limiter
+
+    @property
+    def _admission(self) -> anyio.Semaphore | None:
+        if self.max_queue is None:
+            return None
+        try:
+            return self._admissions.get()
+        except LookupError:
+            admission = anyio.Semaphore(self.max_workers + self.max_queue)
+            self._admissions.set(admission)
+            return admission
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending - self.running
+
+    def wrap(self, runner: Callable[..., Any], label: str = "") -> Callable[..., Awaitable[Any]]:
+        """Async function with the runner's keyword arguments that runs it in the pool."""
+
+        async def run_in_executor(**kwargs: Any) -> Any:
+            return await self.run(runner, kwargs, label)
+
+        return run_in_executor
+
+    async def run(self, func: Callable[..., Any], kwargs: dict[str, Any], label: str = "") -> Any:
+        """Runs `func(**kwargs)` in the pool, `label` (the function name by default) labels the run time metric."""
+        label = label or func.__name__
+        admission = self._admission
+        if admission is None:
+            return await self._run_admitted(func, kwargs, label)
+
+        if self.reject_when_full and admission.value == 0:
+            self.metrics.inc("stark_executor_rejected", executor=self.name)
+            raise ExecutorOverloadedError(
+                f"Executor {self.name} is full: {self.running} running, {self.queue_depth} queued"
+            )
+        async with admission:
+            return await self._run_admitted(func, kwargs, label)
+
+    async def _run_admitted(self, func: Callable[..., Any], kwargs: dict[str, Any], label: str) -> Any:
+        self._pending += 1
+        submitted = perf_counter()
+        try:
+            result, run_seconds = await self._call(func, kwargs)
+        finally:
+            self._pending -= 1
+        if self.metrics.enabled:
+            # the queue time includes the hand-over to the worker and back (pickling for processes)
+            self.metrics.observe(
+                "stark_executor_queue_seconds", perf_counter() - submitted - run_seconds, executor=self.name
+            )
+            self.metrics.observe("stark_executor_run_seconds", run_seconds, executor=self.name, command=label)
+        return result
+
+    @abstractmethod
+    async def _call(self, func: Callable[..., Any], kwargs: dict[str, Any]) -> tuple[Any, float]:
+        """Runs `func(**kwargs)` in a worker, returns its result and the seconds spent running it."""
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name} workers={self.max_workers} queue={self.max_queue}>"
+
+
+class ThreadPool(CommandExecutor):
+    """
+    Worker threads of the event loop. Runners can use `ResponseHandler` and the other dependencies. Create a
+    dedicated pool for a heavy command to keep it from taking the threads of the shared `default_thread_pool`.
+    """
+
+    async def _call(self, func: Callable[..., Any], kwargs: dict[str, Any]) -> tuple[Any, float]:
+        return await anyio.to_thread.run_sync(partial(_timed_call, func, kwargs), limiter=self._limiter)
+
+
+class ProcessPool(CommandExecutor):
+    """
+    Worker processes for CPU-bound pure commands. The runner must be a module-level function (it's imported by name
+    in the worker), its parameters and the returned response must be picklable, and it can't use the dependencies
+    bound to the running context, like `ResponseHandler`.
+    """
+
+    def wrap(self, runner: Callable[..., Any], label: str = "") -> Callable[..., Awaitable[Any]]:
+        if "<locals>" in runner.__qualname__:
+            raise ValueError(f"{runner.__qualname__} can't run in a process pool, it must be a module-level function")
+        return super().wrap(runner, label)
+
+    async def _call(self, func: Callable[..., Any], kwargs: dict[str, Any]) -> tuple[Any, float]:
+        return await anyio.to_process.run_sync(
+            _timed_call_by_name, func.__module__, func.__qualname__, kwargs, limiter=self._limiter
+        )
+
+
+default_thread_pool = ThreadPool("default", max_workers=40)  # the size of the default anyio thread limiter
+
+
+def _timed_call(func: Callable[..., Any], kwargs: dict[str, Any]) -> tuple[Any, float]:
+    started = perf_counter()
+    result = func(**kwargs)
+    return result, perf_counter() - started
+
+
+def _timed_call_by_name(module: str, qualname: str, kwargs: dict[str, Any]) -> tuple[Any, float]:
+    func: Any = importlib.import_module(module)
+    for name in qualname.split("."):
+        func = getattr(func, name)
+    func = getattr(func, "_runner", func)  # the name is usually bound to the Command created by the decorator
+    return _timed_call(func, kwargs)
@@ -9,7 +9,7 @@ def health_check(pattern_parser: PatternParser, commands: list[Command]) -> None
 
     # 1. Registered types: pattern parameters and annotations match; all used types are registered
     for reg_type in pattern_parser.parameter_types_by_name.values():
-        for lang, type_pattern in reg_type.type.patterns.items():
+        for lang, type_pattern in reg_type.type.get_patterns().items():
             pattern_params = set(type_pattern.parameters.keys())
             class_params = set(reg_type.type.__annotations__.keys())
             assert pattern_params <= class_params, (
@@ -52,7 +52,7 @@ def health_check(pattern_parser: PatternParser, commands: list[Command]) -> None
 
     # 7. Try compiling all patterns to catch syntax errors early
     for reg_type in pattern_parser.parameter_types_by_name.values():
-        for lang, p in reg_type.type.patterns.items():
+        for lang, p in reg_type.type.get_patterns().items():
             try:
                 pattern_parser._compile_pattern(p, language_code=lang)
             except Exception as e:
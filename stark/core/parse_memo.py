@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import anyio
+
+from stark.general.cache import CacheStats
+from stark.general.localisation.language_code import LanguageCode
+
+if TYPE_CHECKING:
+    from stark.core.parsing import ObjectType, ParseResult
+
+type ParseMemoKey = tuple[ObjectType, LanguageCode, str]
+
+
+@dataclass
+class ParseMemo:
+    """
+    Memo of object parses for a single utterance, keyed by (object type, language, substring).
+
+    The same parameter substring is usually parsed for the same type many times per utterance: by different
+    commands, by different context layers and by the overlap re-matches of the SearchProcessor. The memo stores the
+    result of the first parse (or the failure as None) and concurrent requests for the same key wait for it,
+    so every distinct sub-parse runs once per utterance.
+    """
+
+    results: dict[ParseMemoKey, ParseResult | None] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    active: bool = True
+
+    _in_flight: dict[ParseMemoKey, anyio.Event] = field(default_factory=dict)
+
+    async def lookup(self, key: ParseMemoKey) -> tuple[bool, ParseResult | None]:
+        """Returns (found, result); if not found, the caller must `store` the result for the key."""
+        while (event := self._in_flight.get(key)) is not None:
+            await event.wait()
+        if key in self.results:
+            self.hits += 1
+            return True, self.results[key]
+        self.misses += 1
+        self._in_flight[key] = anyio.Event()
+        return False, None
+
+    def store(self, key: ParseMemoKey, result: ParseResult | None):
+        self.results[key] = result
+        self.release(key)
+
+    def release(self, key: ParseMemoKey):
+        if event := self._in_flight.pop(key, None):
+            event.set()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self.results))
+
+
+_current_parse_memo: ContextVar[ParseMemo | None] = ContextVar("stark_parse_memo", default=None)
+
+
+def current_parse_memo() -> ParseMemo | None:
+    memo = _current_parse_memo.get()
+    return memo if memo is not None and memo.active else None
+
+
+@contextmanager
+def parse_memo_scope() -> Iterator[ParseMemo]:
+    """Activates a fresh ParseMemo for the PatternParser calls made within the scope (including child tasks)."""
+    memo = ParseMemo()
+    token = _current_parse_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        memo.active = False  # tasks spawned in the scope keep a copy of the context, detach them explicitly
+        _current_parse_memo.reset(token)
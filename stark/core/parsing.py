@@ -2,20 +2,30 @@ from __future__ import annotations
 
 import logging
 import re
+import weakref
 from abc import ABC
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterable, Callable, Iterable
 from dataclasses import dataclass, field
+from enum import StrEnum
 from typing import NamedTuple
 
+import anyio
+
+from stark.core.anchor_index import UnionBranchIndex
+from stark.core.chart_parser import ChartEngine, ChartMatch, ChartMatcher
+from stark.core.deadline import current_deadline, is_expired
+from stark.core.parse_memo import current_parse_memo, parse_memo_scope
 from stark.core.patterns.pattern import Pattern
 from stark.core.patterns.rules import rules_list
 from stark.core.types import NLObject
 from stark.core.types.string import NLString
 from stark.core.types.union import Union, _all_subclasses
 from stark.core.types.word import NLWord
-from stark.general.cache import alru_cache
+from stark.general.cache import CacheStats, LRUCache
 from stark.general.feature_flags import FeatureFlag, get_flag
+from stark.general.iteration import achunked, gather_in_order
 from stark.general.localisation import LanguageCode, LocaleString, Localizer
+from stark.general.metrics import MetricsRegistry, default_metrics_registry
 from stark.models.transcription_string import Correction
 from stark.tools.common.span import Span
 
@@ -26,6 +36,13 @@ class CorrectionMatch(NamedTuple):
 
 
 type ObjectType = type[NLObject]
+type Matcher = re.Pattern | ChartMatcher
+type PatternMatch = re.Match | ChartMatch
+
+
+class ParsingEngine(StrEnum):
+    REGEX = "regex"  # compiled regex with inlined nested types
+    CHART = "chart"  # shared per-type span charts, see ChartEngine
 
 
 logger = logging.getLogger(__name__)
@@ -41,6 +58,7 @@ class ParseError(Exception):
 class ParseResult:
     obj: NLObject
     substring: str
+    span: Span | None = None  # of the substring in the parsed string
 
 
 @dataclass
@@ -58,6 +76,7 @@ class MatchResult:
     parameters: dict[str, NLObject | None]  # TODO: use ParameterMatch?
     corrections: list[CorrectionMatch] = field(default_factory=list)
     corrected_string: str = ""
+    parameter_spans: dict[str, Span] = field(default_factory=dict)  # spans of parsed parameters in the matched string
 
 
 @dataclass
@@ -65,7 +84,7 @@ class ParameterMatch:
     name: str
     parsed_obj: NLObject | None
     parsed_substr: str
-    # TODO: add and use start and/end span to resolve duplication
+    span: Span | None = None  # set once the match is final, in the coordinates of the matched string
 
 
 @dataclass
@@ -99,14 +118,72 @@ class ObjectParser(ABC):  # noqa: B024  # intentional ABC base with default hook
         return from_string
 
 
+type CompiledPatternKey = tuple[str, LanguageCode, str, tuple[tuple[str, str], ...]]
+type PureParseKey = tuple[ObjectType, LanguageCode, str]
+type PureParseEntry = tuple[ParseResult | None]  # wrapped to tell a cached failure (None) from a cache miss
+
+
+@dataclass
+class CompiledPattern:
+    source: str
+    _regex: re.Pattern | None = None
+
+    @property
+    def regex(self) -> re.Pattern:
+        if self._regex is None:
+            self._regex = re.compile(self.source)
+        return self._regex
+
+    @classmethod
+    def interned(cls, source: str) -> CompiledPattern:
+        """
+        Patterns compiled to the same source (e.g. the languages of a pattern without @keys, or the same pattern in
+        several parsers) share one instance, so the regex is built once.
+        """
+        if (compiled := _compiled_sources.get(source)) is None:
+            compiled = _compiled_sources[source] = cls(source)
+        return compiled
+
+
+_compiled_sources: weakref.WeakValueDictionary[str, CompiledPattern] = weakref.WeakValueDictionary()
+
+
 class PatternParser:
     parameter_types_by_name: dict[str, RegisteredParameterType]  # set per-instance in __init__
-    localizer: Localizer | None
 
-    def __init__(self, localizer: Localizer | None = None):
+    generation: int  # bumped on every compiled patterns invalidation, lets external indexes detect staleness
+
+    _localizer: Localizer | None
+    _localizer_version: int | None
+    _compiled_patterns: LRUCache[CompiledPatternKey, CompiledPattern]
+    _union_indexes: dict[tuple[str, LanguageCode], UnionBranchIndex]
+    _pure_results: LRUCache[PureParseKey, PureParseEntry]
+    _purity: dict[ObjectType, bool]
+
+    engine: ParsingEngine
+    chart_engine: ChartEngine
+    metrics: MetricsRegistry
+
+    def __init__(
+        self,
+        localizer: Localizer | None = None,
+        pattern_cache_size: int = 4096,
+        pure_cache_size: int = 1024,
+        engine: ParsingEngine = ParsingEngine.REGEX,
+        metrics: MetricsRegistry | None = None,
+    ):
         self.parameter_types_by_name = {}
+        self.metrics = metrics if metrics is not None else default_metrics_registry
         self._registering: set[str] = set()  # cycle guard for recursive register_parameter_type
-        self.localizer = localizer
+        self._compiled_patterns = LRUCache(maxsize=pattern_cache_size, name="parsing.patterns")
+        self._union_indexes = {}
+        self._pure_results = LRUCache(maxsize=pure_cache_size, name="parsing.pure_results")
+        self._purity = {}
+        self.generation = 0
+        self.engine = engine
+        self.chart_engine = ChartEngine(self)
+        self._localizer = localizer
+        self._localizer_version = localizer.version if localizer else None
         self.register_parameter_type(NLWord)
         self.register_parameter_type(NLString)
         # Deprecated pattern-DSL names: keep `$x:Word` / `$x:String` resolving after the
@@ -114,6 +191,133 @@ class PatternParser:
         self.parameter_types_by_name["Word"] = self.parameter_types_by_name["NLWord"]
         self.parameter_types_by_name["String"] = self.parameter_types_by_name["NLString"]
 
+    @property
+    def localizer(self) -> Localizer | None:
+        return self._localizer
+
+    @localizer.setter
+    def localizer(self, localizer: Localizer | None):
+        self._localizer = localizer
+        self.clear_pattern_cache()
+
+    # Compiled patterns cache
+
+    @property
+    def pattern_cache_stats(self) -> CacheStats:
+        return self._compiled_patterns.stats
+
+    def clear_pattern_cache(self):
+        self._compiled_patterns.clear()
+        self._union_indexes.clear()  # branch anchors are extracted from the compiled patterns
+        self.clear_pure_cache()  # results depend on the registered types and the localizer as well
+        self.generation += 1
+        self._localizer_version = self._localizer.version if self._localizer else None
+
+    def export_compiled_patterns(self) -> list[tuple[CompiledPatternKey, str]]:
+        """The compiled pattern sources by key, least recently used first, see `stark.core.warmup`."""
+        return [(key, compiled.source) for key, compiled in self._compiled_patterns.items()]
+
+    def import_compiled_patterns(self, entries: Iterable[tuple[CompiledPatternKey, str]]):
+        """Restores exported sources, the caller guarantees they were compiled from the same grammar."""
+        self._check_localizer_version()  # so the next lookup doesn't drop the restored patterns
+        for key, source in entries:
+            self._compiled_patterns.put(key, CompiledPattern.interned(source))
+
+    def _check_localizer_version(self):
+        localizer_version = self._localizer.version if self._localizer else None
+        if localizer_version != self._localizer_version:
+            self.clear_pattern_cache()  # strings were reloaded, @key resolutions are stale
+
+    # Pure types cache
+
+    @property
+    def pure_cache_stats(self) -> CacheStats:
+        return self._pure_results.stats
+
+    def clear_pure_cache(self):
+        self._pure_results.clear()
+        self._purity.clear()
+
+    def is_pure(self, object_type: ObjectType) -> bool:
+        """
+        Whether parse results of the type can be reused across utterances, keyed by (type, language, substring).
+
+        The type must declare `pure`, be parsed by the default ObjectParser (custom parsers may hold state), have no
+        annotations besides `value` and its pattern parameters (others are injected state, like the dictionary of
+        NLDictionaryName) and have pure parameter types only. Unions are pure if all their branches are.
+        """
+        if (pure := self._purity.get(object_type)) is None:
+            self._purity[object_type] = False  # recursive types are impure while being resolved
+            pure = self._purity[object_type] = self._resolve_purity(object_type)
+        return pure
+
+    def _resolve_purity(self, object_type: ObjectType) -> bool:
+        registered = self.parameter_types_by_name.get(object_type.__name__)
+        if registered is None or registered.type is not object_type or type(registered.parser) is not ObjectParser:
+            return False
+
+        if issubclass(object_type, Union) and hasattr(object_type, "_types"):
+            return all(self.is_pure(branch) for branch in object_type._types)
+
+        if not object_type.pure:
+            return False
+
+        parameters = {
+            parameter.name: parameter.type_name
+            for pattern in object_type.get_patterns().values()
+            for parameter in pattern.parameters.values()
+        }
+        annotations = {name for cls in object_type.__mro__ for name in vars(cls).get("__annotations__", {})}
+        if annotations - parameters.keys() - {"value"}:
+            return False  # injected state
+
+        return all(
+            type_name in self.parameter_types_by_name and self.is_pure(self.parameter_types_by_name[type_name].type)
+            for type_name in parameters.values()
+        )
+
+    def _get_compiled_pattern(
+        self,
+        pattern: Pattern,
+        group_prefix: str = "",
+        prefill: dict[str, str] | None = None,
+        language_code: LanguageCode = "base",
+    ) -> CompiledPattern:
+        self._check_localizer_version()
+
+        key: CompiledPatternKey = (
+            pattern._origin,
+            language_code,
+            group_prefix,
+            tuple(sorted(prefill.items())) if prefill else (),
+        )
+        if compiled := self._compiled_patterns.get(key):
+            return compiled
+
+        with self.metrics.timer("stark_pattern_compile_seconds", pattern=pattern._origin):
+            compiled = CompiledPattern.interned(self._build_pattern(pattern, group_prefix, prefill, language_code))
+        self._compiled_patterns.put(key, compiled)
+        return compiled
+
+    def _get_matcher(
+        self,
+        pattern: Pattern,
+        string: LocaleString,
+        prefill: dict[str, str] | None = None,
+        language_code: LanguageCode = "base",
+    ) -> tuple[Matcher, dict[str, str]]:
+        compiled = self._get_compiled_pattern(pattern, prefill=prefill, language_code=language_code)
+        expanded, correction_groups = self._expand_corrections(compiled.source, string)
+        if expanded is not compiled.source:
+            return re.compile(expanded), correction_groups  # corrections are per string, only the regex handles them
+
+        if self.engine is ParsingEngine.CHART and (
+            matcher := self.chart_engine.matcher(pattern, prefill, language_code)
+        ):
+            return matcher, correction_groups
+
+        return compiled.regex, correction_groups
+
     def register_parameter_type(
         self,
         object_type: ObjectType,
@@ -132,11 +336,15 @@ class PatternParser:
             if issubclass(object_type, Union) and hasattr(object_type, "_types"):
                 deps = object_type._types
             else:
-                # Evaluate the pattern first — it may create new classes (e.g. any_subclass calls).
+                # Evaluate the patterns first — they may create new classes (e.g. any_subclass calls).
                 # Build known AFTER so those new classes are visible by name.
-                pattern = object_type.pattern
-                known = {cls.__name__: cls for cls in _all_subclasses(NLObject)}
-                deps = [known[p.type_name] for p in pattern.parameters.values() if p.type_name in known]
+                # Registered deps are skipped, so walk the class tree only if some are new (it's large).
+                type_names = dict.fromkeys(
+                    p.type_name for pattern in object_type.get_patterns().values() for p in pattern.parameters.values()
+                )
+                unregistered = [type_name for type_name in type_names if type_name not in self.parameter_types_by_name]
+                known = {cls.__name__: cls for cls in _all_subclasses(NLObject)} if unregistered else {}
+                deps = [known[type_name] for type_name in unregistered if type_name in known]
             # Register each dep before the type itself (depth-first, handles transitive deps).
             for dep in deps:
                 self.register_parameter_type(dep)
@@ -149,12 +357,13 @@ class PatternParser:
             self.parameter_types_by_name[name] = RegisteredParameterType(
                 name=name, type=object_type, parser=resolved_parser
             )
+            self.clear_pattern_cache()  # compiled patterns may reference the new type or its parser
             self._validate_localizer_keys(object_type)
         finally:
             self._registering.discard(name)
 
     def _validate_localizer_keys(self, object_type: ObjectType):
-        for pattern in object_type.patterns.values():
+        for pattern in object_type.get_patterns().values():
             keys = _LOCALIZER_KEY_REGEX.findall(pattern._origin)
             if not keys:
                 continue
@@ -173,26 +382,116 @@ class PatternParser:
         return await self.parse_object(self.parameter_types_by_name[class_name].type, from_string)
 
     async def parse_object(self, object_type: ObjectType, from_string: str | LocaleString) -> ParseResult:
+        from_string = from_string if isinstance(from_string, LocaleString) else LocaleString(from_string)
+
+        if (memo := current_parse_memo()) is None:
+            return await self._parse_pure_or_first_object(object_type, from_string)
+
+        key = (object_type, from_string.language_code, str(from_string))
+        found, result = await memo.lookup(key)
+        if not found:
+            try:
+                result = await self._parse_pure_or_first_object(object_type, from_string)
+            except ParseError:
+                memo.store(key, None)
+                raise
+            except BaseException:
+                memo.release(key)
+                raise
+            memo.store(key, result)
+            return result
+
+        if result is None:
+            raise ParseError(f"Failed to parse object of type {object_type.__name__} from string '{from_string}'")
+        # the stored object is shared between commands, hand out a copy bound to the current string
+        return ParseResult(result.obj.copy(), from_string._with(result.substring), result.span)
+
+    async def _parse_pure_or_first_object(self, object_type: ObjectType, from_string: LocaleString) -> ParseResult:
+        if not self.is_pure(object_type):
+            return await self._parse_first_object_in_time(object_type, from_string)
+
+        key = (object_type, from_string.language_code, str(from_string))
+        if (entry := self._pure_results.get(key)) is not None:
+            (result,) = entry
+            if result is None:
+                raise ParseError(f"Failed to parse object of type {object_type.__name__} from string '{from_string}'")
+            # the cached object outlives the utterance, hand out a copy bound to the current string
+            return ParseResult(
+                _rebind_strings(result.obj, lambda string: from_string._with(str(string))),
+                from_string._with(result.substring),
+                result.span,
+            )
+
+        try:
+            result = await self._parse_first_object_in_time(object_type, from_string)
+        except ParseError:
+            if not is_expired():  # running out of time says nothing about the substring
+                self._pure_results.put(key, (None,))
+            raise
+        if not is_expired():  # a result found out of time may be partial, a full parse can find a better one
+            # keep plain strings, not the transcription with all its tracks
+            substring = LocaleString(str(result.substring), from_string.language_code)
+            obj = _rebind_strings(result.obj, lambda string: LocaleString(str(string), string.language_code))
+            self._pure_results.put(key, (ParseResult(obj, substring, result.span),))
+        return result
+
+    async def _parse_first_object_in_time(self, object_type: ObjectType, from_string: LocaleString) -> ParseResult:
+        if (deadline := current_deadline()) is None:
+            return await self._parse_first_object(object_type, from_string)
+
+        with anyio.CancelScope(deadline=deadline.at):
+            return await self._parse_first_object(object_type, from_string)
+
+        # reached only if the parse was interrupted
+        deadline.timed_out_types[object_type.__name__] += 1
+        raise ParseError(f"Out of time parsing object of type {object_type.__name__} from string '{from_string}'")
+
+    async def _parse_first_object(self, object_type: ObjectType, from_string: LocaleString) -> ParseResult:
         async for obj in self.parse_objects(object_type, from_string):
             return obj  # take the first successful parsed result, usually the only one
         raise ParseError(f"Failed to parse object of type {object_type.__name__} from string '{from_string}'")
 
     def _resolve_pattern(self, object_type: ObjectType, language_code: LanguageCode) -> Pattern:
         parser = self.parameter_types_by_name[object_type.__name__].parser
-        patterns = parser.patterns or object_type.patterns
+        if not (patterns := parser.patterns):
+            return object_type.get_pattern(language_code)
         if language_code in patterns:
             return patterns[language_code]
         return patterns["base"]
 
+    def union_index(self, union_type: type[Union], language_code: LanguageCode) -> UnionBranchIndex:
+        key = (union_type.__name__, language_code)
+        if (index := self._union_indexes.get(key)) is None or index.union_type is not union_type:
+            index = self._union_indexes[key] = UnionBranchIndex(union_type, language_code, self)
+        return index
+
+    def _resolve_union_pattern(self, object_type: ObjectType, from_string: LocaleString) -> Pattern | None:
+        """Narrows the pattern of a Union type down to the branches that can match the string, None if none can."""
+        from stark.models.transcription_string import TranscriptionString
+
+        pattern = self._resolve_pattern(object_type, from_string.language_code)
+        if (
+            not issubclass(object_type, Union)
+            or not hasattr(object_type, "_types")
+            or self.parameter_types_by_name[object_type.__name__].parser.patterns  # custom patterns, not an alternation
+        ):
+            return pattern
+        if isinstance(from_string, TranscriptionString) and from_string.has_corrections:
+            return pattern  # correction variants may replace the anchors
+        return self.union_index(object_type, from_string.language_code).pattern(from_string)
+
     async def parse_objects(
         self, object_type: ObjectType, from_string: str | LocaleString
     ) -> AsyncGenerator[ParseResult]:
         from_string = from_string if isinstance(from_string, LocaleString) else LocaleString(from_string)
-        language_code = from_string.language_code
-        pattern = self._resolve_pattern(object_type, language_code)
+        if (pattern := self._resolve_union_pattern(object_type, from_string)) is None:
+            return  # no branch of the union can match
         object_matches = await self.match(pattern, from_string)
 
         for object_pattern_match in object_matches:
+            if is_expired():
+                break
+
             string = from_string._with(object_pattern_match.substring)  # TODO: review _with usage
 
             parser: ObjectParser = self.parameter_types_by_name[object_type.__name__].parser
@@ -222,13 +521,19 @@ class PatternParser:
                     f"Parsed object {obj!r} must have a `value` property set at the time did_parse method returns. NLObject: {obj!r}, Parser: {parser!r}"
                 )
 
-            yield ParseResult(obj, substring)
+            offset = from_string.find(object_pattern_match.substring, object_pattern_match.start)
+            start = offset + string.find(substring)
+            yield ParseResult(obj, substring, Span(start, start + len(substring)) if offset != -1 else None)
 
-    @alru_cache(maxsize=256, ttl=60 * 10)  # TODO: env vars + disable option
     async def _did_parse(self, obj: NLObject, parser: ObjectParser, string: LocaleString) -> str:
-        substring = await parser.did_parse(obj, string)
-        substring = string._with(substring) if not isinstance(substring, LocaleString) else substring
-        substring = await obj.did_parse(substring)
+        with self.metrics.timer("stark_did_parse_seconds", type=type(obj).__name__):
+            try:
+                substring = await parser.did_parse(obj, string)
+                substring = string._with(substring) if not isinstance(substring, LocaleString) else substring
+                substring = await obj.did_parse(substring)
+            except ParseError:
+                self.metrics.inc("stark_did_parse_errors", type=type(obj).__name__)
+                raise
         return substring
 
     async def match(
@@ -236,27 +541,107 @@ class PatternParser:
         pattern: Pattern,
         string: str | LocaleString,
         recognized_entities: list[RecognizedEntity] | None = None,
+    ) -> list[MatchResult]:
+        return await self._match(pattern, string, recognized_entities)
+
+    async def match_batch(
+        self,
+        pattern: Pattern,
+        strings: Iterable[str | LocaleString] | AsyncIterable[str | LocaleString],
+        concurrency: int = 1,
+    ) -> AsyncGenerator[list[MatchResult]]:
+        """
+        Matches the pattern against every string of a (sync or async) stream, yields the matches of each in order.
+        Every string gets its own parse memo, the caches of the parser are shared by the whole batch. Up to
+        `concurrency` strings are matched at once, which only helps when parsing awaits I/O.
+        """
+
+        async def match(string: str | LocaleString) -> list[MatchResult]:
+            with parse_memo_scope():
+                return await self._match(pattern, string)
+
+        async for chunk in achunked(strings, concurrency):
+            for matches in await gather_in_order(match, chunk):
+                yield matches
+
+    async def rematch(
+        self,
+        pattern: Pattern,
+        string: str | LocaleString,
+        start: int,
+        end: int,
+        previous: MatchResult,
+        recognized_entities: list[RecognizedEntity] | None = None,
+    ) -> list[MatchResult]:
+        """
+        Matches the pattern again within `string[start:end]`, e.g. after a part of the previous match was given away
+        to an overlapping command. Parameters of `previous` (a match of the same pattern in the same string) whose
+        spans are still inside the window are reused as parsed instead of being parsed again.
+
+        Returns matches in the coordinates of `string`.
+        """
+        string = string if isinstance(string, LocaleString) else LocaleString(string)
+        known_parameters = {
+            name: ParameterMatch(
+                name, previous.parameters[name], string[span.slice], Span(span.start - start, span.end - start)
+            )
+            for name, span in previous.parameter_spans.items()
+            if start <= span.start and span.end <= end and previous.parameters.get(name) is not None
+        }
+        matches = await self._match(pattern, string[start:end], recognized_entities, known_parameters)
+        for match in matches:
+            match.start += start
+            match.end += start
+            match.parameter_spans = {
+                name: Span(span.start + start, span.end + start) for name, span in match.parameter_spans.items()
+            }
+        return matches
+
+    async def _match(
+        self,
+        pattern: Pattern,
+        string: str | LocaleString,
+        recognized_entities: list[RecognizedEntity] | None = None,
+        known_parameters: dict[str, ParameterMatch] | None = None,
     ) -> list[MatchResult]:
         string = string if isinstance(string, LocaleString) else LocaleString(string)
         language_code = string.language_code
         recognized_entities = recognized_entities or []
-        compiled = self._compile_pattern(pattern, language_code=language_code)
-
-        compiled, correction_groups = self._expand_corrections(compiled, string)
+        regex, correction_groups = self._get_matcher(pattern, string, language_code=language_code)
 
-        logger.debug(f'Starting looking for "{pattern=}" "{compiled=}" in "{string}"')
+        logger.debug(f'Starting looking for "{pattern=}" "{regex.pattern=}" in "{string}"')
 
         matches = []
-        initial_matches = self._find_initial_matches(compiled, string)
+        with self.metrics.timer("stark_pattern_scan_seconds", pattern=pattern._origin):
+            initial_matches = self._find_initial_matches(regex, string)
+        self.metrics.inc("stark_pattern_candidates", len(initial_matches), pattern=pattern._origin)
         for match in initial_matches:
             if match.start() == -1 or match.start() == match.end():
                 continue  # skip empty
 
+            if is_expired():
+                logger.debug(f'Out of time matching "{pattern}", keeping {len(matches)} matches')
+                break
+
             new_match = None
             command_substr = string[match.start() : match.end()]
+            # parameters parsed before are reused as long as the candidate still covers them
+            known = {
+                name: parameter
+                for name, parameter in (known_parameters or {}).items()
+                if parameter.span and match.start() <= parameter.span.start and parameter.span.end <= match.end()
+            }
             new_match, parsed_parameters = await self._parse_parameters_for_match(
-                pattern, command_substr, recognized_entities, language_code
+                pattern, command_substr, recognized_entities, language_code, known
             )
+            if new_match is None and known:
+                # reused values don't fit into the candidate, parse it from scratch
+                new_match, parsed_parameters = await self._parse_parameters_for_match(
+                    pattern, command_substr, recognized_entities, language_code
+                )
+            if is_expired():
+                logger.debug(f'Out of time parsing parameters of "{pattern}", keeping {len(matches)} matches')
+                break  # the candidate may be cut short, keep only the completed ones
             assert new_match is not None, "new_match should not be None"
             new_match = new_match or match
 
@@ -276,6 +661,9 @@ class PatternParser:
 
             start = match.start() + new_match.start()
             end = match.start() + new_match.end()
+
+            for parameter in parsed_parameters.values():
+                parameter.span = self._find_parameter_span(new_match, parameter, match.start())
             command_str = string[start:end].strip()
 
             # Backtrack corrections via named groups
@@ -304,11 +692,17 @@ class PatternParser:
                     },
                     corrections=match_corrections,
                     corrected_string=corrected,
+                    parameter_spans={
+                        name: parameter.span
+                        for name, parameter in parsed_parameters.items()
+                        if parameter.parsed_obj is not None and parameter.span is not None
+                    },
                 )
             )
             logger.debug(f"Match result: {matches[-1]}")
 
         matches = self._filter_overlapping_matches(matches)
+        self.metrics.inc("stark_pattern_matches", len(matches), pattern=pattern._origin)
         return sorted(matches, key=lambda m: len(m.substring), reverse=True)
 
     def _expand_corrections(self, compiled: str, string: LocaleString) -> tuple[str, dict[str, str]]:
@@ -358,8 +752,8 @@ class PatternParser:
                 compiled = "".join(result_parts)
         return compiled, group_map
 
-    def _find_initial_matches(self, compiled: str, string: str) -> list[re.Match]:
-        return sorted(re.finditer(compiled, string), key=lambda match: match.start())
+    def _find_initial_matches(self, regex: Matcher, string: str) -> list[PatternMatch]:
+        return sorted(regex.finditer(string), key=lambda match: match.start())
 
     async def _parse_parameters_for_match(
         self,
@@ -367,13 +761,16 @@ class PatternParser:
         string: LocaleString,
         recognized_entities: list[RecognizedEntity],
         language_code: LanguageCode,
-    ) -> tuple[re.Match | None, dict[str, ParameterMatch]]:
-        parsed_parameters: dict[str, ParameterMatch] = {}
+        known_parameters: dict[str, ParameterMatch] | None = None,
+    ) -> tuple[PatternMatch | None, dict[str, ParameterMatch]]:
+        parsed_parameters: dict[str, ParameterMatch] = dict(known_parameters or {})
         logger.debug(f'Captured candidate "{string}"')
 
         new_match = None
+        iterations = 0
 
         while True:
+            iterations += 1
             # rerun regex to recapture parameters after previous parameter took it's substring
             # prefill parsed values with exact substrings (replace regex capturing group with the exact substring) to:
             #     1. allow neighboring parameters with greedy pattern catch more string
@@ -382,11 +779,10 @@ class PatternParser:
             prefill = {name: parameter.parsed_substr for name, parameter in parsed_parameters.items()}
 
             # re-run regex only in the current command_str
-            compiled = self._compile_pattern(pattern, prefill=prefill, language_code=language_code)
-            compiled, _ = self._expand_corrections(compiled, string)
-            new_matches = list(re.finditer(compiled, string))
+            regex, _ = self._get_matcher(pattern, string, prefill, language_code)
+            new_matches = list(regex.finditer(string))
 
-            logger.debug(f'Re capturing parameters {string} prefill={prefill} compiled="{compiled}"')
+            logger.debug(f'Re capturing parameters {string} prefill={prefill} compiled="{regex.pattern}"')
 
             if not new_matches:
                 break  # everything's parsed (probably not successfully)
@@ -426,6 +822,9 @@ class PatternParser:
             if not match_str_groups:
                 break  # everything's parsed (probably successfully)
 
+            if is_expired():
+                break  # out of time, the caller drops the incomplete candidate
+
             # Parse next parameter
 
             parameter_name = min(
@@ -446,6 +845,7 @@ class PatternParser:
             if parameter_match is not None:
                 parsed_parameters[parameter_name] = parameter_match
 
+        self.metrics.inc("stark_parameter_loop_iterations", iterations, pattern=pattern._origin)
         return new_match, parsed_parameters
 
     async def _parse_single_parameter(
@@ -490,14 +890,22 @@ class PatternParser:
                 parsed_substr="",
             )
 
+    def _find_parameter_span(self, match: PatternMatch, parameter: ParameterMatch, offset: int) -> Span | None:
+        if parameter.parsed_obj is None or (group := match.group(parameter.name)) is None:
+            return None
+        index = group.find(parameter.parsed_substr)  # parsed substring is a part of the captured group
+        if index == -1:
+            return None
+        start = offset + match.start(parameter.name) + index
+        return Span(start, start + len(parameter.parsed_substr))
+
     def _filter_overlapping_matches(self, matches: list[MatchResult]) -> list[MatchResult]:
-        filtered = matches.copy()
-        for prev, current in zip(
-            filtered.copy(), filtered[1:], strict=False
-        ):  # pairwise adjacent: tail is one shorter by design; copy prevents affecting iteration
+        removed: set[int] = set()
+        for i in range(1, len(matches)):  # pairwise adjacent
+            prev, current = matches[i - 1], matches[i]
             if prev.start == current.start or prev.end > current.start:  # if overlap
-                filtered.remove(min(prev, current, key=lambda m: len(m.substring)))  # remove shorter
-        return filtered
+                removed.add(i - 1 if len(prev.substring) <= len(current.substring) else i)  # remove shorter
+        return [match for i, match in enumerate(matches) if i not in removed]
 
     def _compile_pattern(
         self,
@@ -506,6 +914,15 @@ class PatternParser:
         prefill: dict[str, str] | None = None,
         language_code: LanguageCode = "base",
     ) -> str:  # transform Pattern to classic regex with named groups
+        return self._get_compiled_pattern(pattern, group_prefix, prefill, language_code).source
+
+    def _build_pattern(
+        self,
+        pattern: Pattern,
+        group_prefix: str,
+        prefill: dict[str, str] | None,
+        language_code: LanguageCode,
+    ) -> str:
         prefill = prefill or {}
 
         pattern_str: str = pattern._origin
@@ -545,13 +962,14 @@ class PatternParser:
             arg_declaration = (
                 f"\\${parameter.name}\\:{parameter_type.__name__}"  # NOTE: special chars escaped for regex
             )
+            # group names are derived here rather than stored on the (shared, cached) PatternParameter
+            group_name = ((group_prefix + "_") if group_prefix else "") + parameter.name
             if parameter.name in prefill:
                 arg_pattern = prefill[parameter.name]  # TODO: review wether re.escape is needed
             else:  # replace pattern annotation with compiled regex
-                parameter.group_name = ((group_prefix + "_") if group_prefix else "") + parameter.name
                 param_pattern = self._resolve_pattern(parameter_type, language_code)
                 arg_pattern = self._compile_pattern(
-                    param_pattern, group_prefix=parameter.group_name, language_code=language_code
+                    param_pattern, group_prefix=group_name, language_code=language_code
                 ).replace("\\", r"\\")
 
                 if parameter_type.greedy and arg_pattern[-1] in {"*", "+", "}", "?"}:
@@ -566,8 +984,22 @@ class PatternParser:
 
             pattern_str = re.sub(
                 arg_declaration,
-                f"(?P<{parameter.group_name}>{arg_pattern})",
+                f"(?P<{group_name}>{arg_pattern})",
                 pattern_str,
             )
 
         return pattern_str
+
+
+def _rebind_strings(obj: NLObject, rebind: Callable[[LocaleString], LocaleString]) -> NLObject:
+    """
+    Copies the object and its parameter objects, replacing every LocaleString attribute (usually `value`) by
+    `rebind(string)`, so a cached result doesn't reference the transcription it was parsed from.
+    """
+    obj = obj.copy()
+    for name, attribute in list(vars(obj).items()):
+        if isinstance(attribute, LocaleString):
+            setattr(obj, name, rebind(attribute))
+        elif isinstance(attribute, NLObject):
+            setattr(obj, name, _rebind_strings(attribute, rebind))
+    return obj
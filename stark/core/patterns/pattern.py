@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import logging
 import re
+import weakref
 from collections.abc import Generator
 from dataclasses import dataclass
+from typing import ClassVar
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+# types = '|'.join(Pattern._parameter_types.keys())
+# return re.compile(r'\$(?P<name>[A-z][A-z0-9]*)\:(?P<type>(?:' + types + r'))')
+# do not use types list because it prevents validation of unknown types
+_PARAMETER_ANNOTATION_REGEX = re.compile(r"\$(?P<name>[A-z][A-z0-9]*)\:(?P<type>[A-z][A-z0-9]*)(?P<optional>\?)?")
+
 
 @dataclass
 class PatternParameter:
@@ -26,25 +33,30 @@ class PatternParameter:
 
 
 class Pattern:
+    """
+    Parsed pattern string. Patterns are immutable and interned by origin: `Pattern(origin)` returns the pattern
+    already built from the same string while it's alive, so the parameters of a pattern are scanned once no matter
+    how many times a classproperty or a command constructs it.
+    """
+
     parameters: dict[str, PatternParameter]
 
     _origin: str
-    _parameter_regex: re.Pattern
-
-    def __init__(self, origin: str):
-        self._origin = origin
-        self._parameter_regex = self._get_pattern_parameter_annotation_regex()
-        self.parameters = dict(self._get_parameters_annotation_from_pattern())
-        self._update_group_name_to_param()
+    _parameter_regex: ClassVar[re.Pattern] = _PARAMETER_ANNOTATION_REGEX
+    _interned: ClassVar[weakref.WeakValueDictionary[str, Pattern]] = weakref.WeakValueDictionary()
+
+    def __new__(cls, origin: str):
+        if (pattern := cls._interned.get(origin)) is not None:
+            return pattern
+        pattern = super().__new__(cls)
+        pattern._origin = origin
+        pattern.parameters = dict(pattern._get_parameters_annotation_from_pattern())
+        pattern._update_group_name_to_param()
+        cls._interned[origin] = pattern
+        return pattern
 
     # processing pattern
 
-    def _get_pattern_parameter_annotation_regex(self) -> re.Pattern:
-        # types = '|'.join(Pattern._parameter_types.keys())
-        # return re.compile(r'\$(?P<name>[A-z][A-z0-9]*)\:(?P<type>(?:' + types + r'))')
-        # do not use types list because it prevents validation of unknown types
-        return re.compile(r"\$(?P<name>[A-z][A-z0-9]*)\:(?P<type>[A-z][A-z0-9]*)(?P<optional>\?)?")
-
     def _get_parameters_annotation_from_pattern(
         self,
     ) -> Generator[tuple[str, PatternParameter], None, None]:
@@ -77,5 +89,11 @@ class Pattern:
             raise NotImplementedError(f"Can`t compare Pattern with {type(other)}")
         return self._origin == other._origin
 
+    def __hash__(self) -> int:
+        return hash(self._origin)
+
+    def __reduce__(self):
+        return Pattern, (self._origin,)  # copies and unpickled patterns are interned too
+
     def __repr__(self) -> str:
         return f"<Pattern '{self._origin}'>"
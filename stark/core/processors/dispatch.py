@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+
+from stark.core.command import Command
+from stark.core.parsing import PatternParser
+from stark.general.cache import LRUCache
+from stark.general.localisation import LocaleString
+from stark.general.localisation.language_code import LanguageCode
+from stark.models.transcription_string import TranscriptionString
+
+logger = logging.getLogger(__name__)
+
+# named groups of the command patterns are irrelevant for dispatch and would collide between branches
+_NAMED_GROUP_REGEX = re.compile(r"(?<!\\)\(\?P<[A-Za-z_][A-Za-z0-9_]*>")
+
+
+@dataclass
+class _DispatchAutomaton:
+    """
+    Alternation of tagged command branches: `(?:b0(?P<_cmd0>)|b1(?P<_cmd1>)|...)`.
+
+    The regex engine reports only the first branch that matches at a position, so branches that also match at the
+    same position are found by querying sub-ranges of the alternation (a lazily compiled segment tree of regexes).
+    Each candidate costs O(log n) extra `match` calls; positions where nothing matches cost a single scan step.
+    """
+
+    pattern_parser: PatternParser
+    generation: int
+    commands: list[Command]
+    sources: list[str | None]  # per command; None if the command can't be dispatched by the automaton
+    always: list[int]  # commands that are always candidates
+    _branches: list[int] = field(default_factory=list)  # command indexes of dispatchable branches
+    _nodes: dict[tuple[int, int], re.Pattern] = field(default_factory=dict)
+    _scanner: re.Pattern | None = None
+
+    def __post_init__(self):
+        self._branches = [i for i, source in enumerate(self.sources) if source is not None]
+
+    def candidates(self, string: str) -> set[int]:
+        found = set(self.always)
+        if not self._branches:
+            return found
+
+        if self._scanner is None:
+            self._scanner = re.compile(f"(?={self._node(0, len(self._branches)).pattern})")
+
+        for match in self._scanner.finditer(string):
+            k = self._branch_index(match)
+            found.add(self._branches[k])
+            for j in self._collect(string, match.start(), k + 1, 0, len(self._branches)):
+                found.add(self._branches[j])
+        return found
+
+    def _collect(self, string: str, pos: int, start: int, lo: int, hi: int) -> list[int]:
+        # branches in [lo, hi) with index >= start that match at pos
+        if hi <= start:
+            return []
+        found: list[int] = []
+        if lo >= start:
+            match = self._node(lo, hi).match(string, pos)
+            if match is None:
+                return found
+            k = self._branch_index(match)
+            found.append(k)
+            start = k + 1
+            if start >= hi:
+                return found
+        if hi - lo == 1:
+            return found
+        mid = (lo + hi) // 2
+        found.extend(self._collect(string, pos, start, lo, mid))
+        found.extend(self._collect(string, pos, start, mid, hi))
+        return found
+
+    def _node(self, lo: int, hi: int) -> re.Pattern:
+        if regex := self._nodes.get((lo, hi)):
+            return regex
+        regex = re.compile(
+            "(?:"
+            + "|".join(f"{self.sources[self._branches[k]]}(?P<_cmd{k}>)" for k in range(lo, hi))
+            + ")"
+        )
+        self._nodes[(lo, hi)] = regex
+        return regex
+
+    @staticmethod
+    def _branch_index(match: re.Match) -> int:
+        assert match.lastgroup
+        return int(match.lastgroup.removeprefix("_cmd"))
+
+
+class CombinedCommandsMatcher:
+    """
+    Narrows a list of commands down to the candidates that can match a string, using a single combined regex scan.
+
+    All command patterns of a context layer are compiled (per language) into one alternation with tagged branches.
+    One scan of the string yields the candidate commands and only those go through the full `PatternParser.match`.
+    The automaton is built lazily and rebuilt when the commands list or the parser's compiled patterns change.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self._automata: LRUCache[tuple[int, int, LanguageCode], _DispatchAutomaton] = LRUCache(
+            maxsize=maxsize, name="search.dispatch_automata"
+        )
+
+    def candidates(
+        self,
+        string: str | LocaleString,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+    ) -> list[Command]:
+        if isinstance(string, TranscriptionString) and string.has_corrections:
+            return commands  # correction variants are injected per utterance and aren't part of the automaton
+
+        automaton = self._get_automaton(language_code, pattern_parser, commands)
+        matched = automaton.candidates(string)
+        return [command for i, command in enumerate(commands) if i in matched]
+
+    def clear(self):
+        self._automata.clear()
+
+    def _get_automaton(
+        self,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+    ) -> _DispatchAutomaton:
+        key = (id(commands), id(pattern_parser), language_code)
+        automaton = self._automata.get(key)
+        if (
+            automaton is None
+            or automaton.pattern_parser is not pattern_parser
+            or automaton.generation != pattern_parser.generation
+            or automaton.commands != commands
+        ):
+            automaton = self._build(language_code, pattern_parser, commands)
+            self._automata.put(key, automaton)
+        return automaton
+
+    def _build(
+        self,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+    ) -> _DispatchAutomaton:
+        sources: list[str | None] = []
+        always: list[int] = []
+
+        for i, command in enumerate(commands):
+            try:
+                source = pattern_parser._compile_pattern(command.get_pattern(language_code), language_code=language_code)
+                source = _NAMED_GROUP_REGEX.sub("(?:", source)
+                re.compile(source)  # the combined alternation is only valid if every branch is
+            except Exception as e:
+                logger.debug(f"Command {command} can't be added to the dispatch automaton: {e}")
+                source = None
+                always.append(i)  # let the regular match surface the error
+            sources.append(source)
+
+        return _DispatchAutomaton(
+            pattern_parser=pattern_parser,
+            generation=pattern_parser.generation,
+            commands=list(commands),
+            sources=sources,
+            always=always,
+        )
+
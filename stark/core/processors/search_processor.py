@@ -1,27 +1,60 @@
 from __future__ import annotations
 
+import copy
+import logging
+from collections.abc import AsyncGenerator, AsyncIterable, Iterable
 from typing import cast, override
 
 from asyncer import SoonValue, create_task_group
 
+from stark.core.anchor_index import CommandsAnchorIndex
+from stark.core.deadline import current_deadline
+from stark.core.parse_memo import parse_memo_scope
 from stark.core.parsing import MatchResult, PatternParser, RecognizedEntity
+from stark.general.cache import LRUCache
 from stark.general.feature_flags import FeatureFlag, get_flag
+from stark.general.iteration import achunked, gather_in_order
 from stark.general.localisation import LocaleString
 from stark.general.localisation.language_code import LanguageCode
 
 from ..command import Command
 from ..commands_context import CommandsContext, CommandsContextLayer
-from ..commands_context_processor import CommandsContextProcessor
+from ..commands_context_processor import CommandsContextProcessor, SearchPolicy, SearchStats
 from ..commands_manager import SearchResult
+from .dispatch import CombinedCommandsMatcher
+
+logger = logging.getLogger(__name__)
+
+type Utterances = Iterable[str | LocaleString] | AsyncIterable[str | LocaleString]
+# the utterance and the grammar that produced its results: the parser and its generation, the commands, the policy
+type BatchResultsKey = tuple[str, LanguageCode, PatternParser, int, tuple[Command, ...], SearchPolicy]
 
 
 class SearchProcessor(CommandsContextProcessor):
+    combined_matcher: CombinedCommandsMatcher | None
+    anchor_prefilter: bool
+
+    def __init__(self, combined_dispatch: bool = False, anchor_prefilter: bool = False):
+        """
+        Args:
+            combined_dispatch: prefilter commands with a single combined regex scan per context layer,
+                so only the candidate commands go through full parameter parsing.
+            anchor_prefilter: narrow commands by the required literal anchors of their patterns
+                (`CommandsManager.anchor_index`) before running any regex. Ignored if `combined_dispatch`
+                is enabled, which already yields the exact candidates.
+        """
+        self.combined_matcher = CombinedCommandsMatcher() if combined_dispatch else None
+        self.anchor_prefilter = anchor_prefilter
+
     async def search(
         self,
         string: str | LocaleString,
         pattern_parser: PatternParser,
         commands: list[Command],
         recognized_entities: list[RecognizedEntity],
+        anchor_index: CommandsAnchorIndex | None = None,
+        policy: SearchPolicy = SearchPolicy.ALL,
+        stats: SearchStats | None = None,
     ) -> list[SearchResult]:
         string = string if isinstance(string, LocaleString) else LocaleString(string)
         language_code = string.language_code
@@ -47,7 +80,14 @@ class SearchProcessor(CommandsContextProcessor):
                         str(track_string),
                         track_lang,
                         group.soonify(self._match_commands)(
-                            track_string, track_lang, pattern_parser, commands, recognized_entities
+                            track_string,
+                            track_lang,
+                            pattern_parser,
+                            commands,
+                            recognized_entities,
+                            anchor_index,
+                            policy,
+                            stats,
                         ),
                     )
                 )
@@ -65,71 +105,141 @@ class SearchProcessor(CommandsContextProcessor):
         # tagged.sort(key=lambda t: string.translate_position(t[2].match_result.start, t[0], primary))
         tagged.sort(key=lambda t: t[2].match_result.start)
 
-        # resolve overlaps — each result lives in its own source track's coordinates
-        # translate between tracks on demand for comparison and cutting
-        for prev_entry, current_entry in zip(tagged.copy(), tagged[1:], strict=False):  # pairwise adjacent: tail is one shorter by design
-            prev_src, prev_lang, prev = prev_entry
-            current_src, current_lang, current = current_entry
-
-            # check for overlaps
-            try:
-                current_start_in_prev = string.translate_position(current.match_result.start, current_src, prev_src)
-            except ValueError:
-                # can't translate between tracks — drop lower priority
-                loser_entry = current_entry if prev.index < current.index else prev_entry
-                if loser_entry in tagged:
-                    tagged.remove(loser_entry)
-                continue
-
-            if current_start_in_prev is None or prev.match_result.end <= current_start_in_prev:
-                # no overlap
-                continue
-
-            # overlap — try to cut each in its own source text
-            try:
-                prev_end_in_current = string.translate_position(prev.match_result.end, prev_src, current_src)
-            except ValueError:
-                loser_entry = current_entry if prev.index < current.index else prev_entry
-                if loser_entry in tagged:
-                    tagged.remove(loser_entry)
-                continue
-
-            prev_cut = (
-                await pattern_parser.match(
-                    prev.command.get_pattern(prev_lang),
-                    prev_src[prev.match_result.start : current_start_in_prev],
-                    recognized_entities,
-                )
-                if current_start_in_prev > prev.match_result.start
-                else []
-            )
+        # resolve overlaps in a single sweep over the intervals sorted by start,
+        # each result is compared with the last kept one (the rightmost interval kept so far)
+        # each result lives in its own source track's coordinates, translate between tracks on demand
+        kept: list[tuple[str, LanguageCode, SearchResult]] = []
+        with pattern_parser.metrics.timer("stark_overlap_resolution_seconds"):
+            for current_entry in tagged:
+                keep_current = True
+                while kept:
+                    keep_prev, keep_current = await self._resolve_overlap(
+                        string, kept[-1], current_entry, pattern_parser, recognized_entities
+                    )
+                    if keep_prev:
+                        break
+                    kept.pop()  # the previous interval is gone, the current one may overlap the one before it
+                if keep_current:
+                    kept.append(current_entry)
 
-            current_cut = (
-                await pattern_parser.match(
-                    current.command.get_pattern(current_lang),
-                    current_src[prev_end_in_current : current.match_result.end],
-                    recognized_entities,
-                )
-                if prev_end_in_current is not None and prev_end_in_current < current.match_result.end
-                else []
+        return [r for _, _, r in kept]
+
+    async def search_batch(
+        self,
+        strings: Utterances,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+        anchor_index: CommandsAnchorIndex | None = None,
+        policy: SearchPolicy = SearchPolicy.ALL,
+        concurrency: int = 1,
+        results_cache: LRUCache[BatchResultsKey, list[SearchResult]] | None = None,
+    ) -> AsyncGenerator[list[SearchResult]]:
+        """
+        Searches every utterance of a (sync or async) stream, yields the results of each one in order.
+
+        Unlike `CommandsContext.process_string`, it has no side effects: no commands run and no context changes.
+        Every utterance gets its own parse memo, the caches of the parser (compiled patterns, pure results, union
+        indexes) are shared by the whole batch, and repeated utterances get copies of the cached results, pass
+        `results_cache` to share them between batches. The results are keyed by the grammar too (the parser and its
+        generation, the commands, the policy), so a shared cache never returns results of another grammar. Up to
+        `concurrency` utterances are searched at once, which only helps when parsing awaits I/O; see
+        `stark.core.batch.search_in_processes` to use several CPU cores.
+        """
+        if results_cache is None:
+            results_cache = batch_results_cache()
+
+        async def search(string: str | LocaleString) -> list[SearchResult]:
+            string = string if isinstance(string, LocaleString) else LocaleString(string)
+            key: BatchResultsKey | None = None
+            if type(string) is LocaleString:  # no extra tracks
+                grammar = (pattern_parser, pattern_parser.generation, tuple(commands), policy)
+                key = (str(string), string.language_code, *grammar)
+            if key is not None and (cached := results_cache.get(key)) is not None:
+                return _copy_results(cached)
+
+            with parse_memo_scope():
+                results = await self.search(string, pattern_parser, commands, [], anchor_index, policy)
+            if key is not None:
+                results_cache.put(key, _copy_results(results))
+            return results
+
+        async for chunk in achunked(strings, concurrency):
+            for results in await gather_in_order(search, chunk):
+                yield results
+
+    async def _resolve_overlap(
+        self,
+        string: LocaleString,
+        prev_entry: tuple[str, LanguageCode, SearchResult],
+        current_entry: tuple[str, LanguageCode, SearchResult],
+        pattern_parser: PatternParser,
+        recognized_entities: list[RecognizedEntity],
+    ) -> tuple[bool, bool]:
+        """
+        Resolves the overlap of two results, the previous one starts first. Less index = more priority to save the
+        full match: the loser is cut to the part outside of the winner, if it can't match there the winner is cut,
+        otherwise the loser is dropped. Cuts reuse the parameters already parsed within the remaining span.
+
+        Returns whether to keep (previous, current).
+        """
+        prev_src, prev_lang, prev = prev_entry
+        current_src, current_lang, current = current_entry
+        is_prev_priority = prev.index < current.index
+        drop_loser = (True, False) if is_prev_priority else (False, True)
+
+        # check for overlaps
+        try:
+            current_start_in_prev = string.translate_position(current.match_result.start, current_src, prev_src)
+        except ValueError:
+            return drop_loser  # can't translate between tracks
+
+        if current_start_in_prev is None or prev.match_result.end <= current_start_in_prev:
+            return True, True  # no overlap
+
+        # overlap — try to cut each in its own source text
+        try:
+            prev_end_in_current = string.translate_position(prev.match_result.end, prev_src, current_src)
+        except ValueError:
+            return drop_loser
+
+        async def cut_prev() -> list[MatchResult]:
+            if current_start_in_prev <= prev.match_result.start:
+                return []
+            return await pattern_parser.rematch(
+                prev.command.get_pattern(prev_lang),
+                prev_src,
+                prev.match_result.start,
+                current_start_in_prev,
+                prev.match_result,
+                recognized_entities,
             )
 
-            # less index = more priority to save full match
-            is_prev_priority = prev.index < current.index
-            loser_cut = current_cut if is_prev_priority else prev_cut
-            winner_cut = prev_cut if is_prev_priority else current_cut
-            loser_entry = current_entry if is_prev_priority else prev_entry
-            winner_entry = prev_entry if is_prev_priority else current_entry
+        async def cut_current() -> list[MatchResult]:
+            if prev_end_in_current is None or prev_end_in_current >= current.match_result.end:
+                return []
+            return await pattern_parser.rematch(
+                current.command.get_pattern(current_lang),
+                current_src,
+                prev_end_in_current,
+                current.match_result.end,
+                current.match_result,
+                recognized_entities,
+            )
 
-            if new_matches := loser_cut:
-                loser_entry[2].match_result = new_matches[0]
-            elif new_matches := winner_cut:
-                winner_entry[2].match_result = new_matches[0]
-            else:
-                if loser_entry in tagged:
-                    tagged.remove(loser_entry)
+        cut_loser, cut_winner = (cut_current, cut_prev) if is_prev_priority else (cut_prev, cut_current)
+        loser, winner = (current, prev) if is_prev_priority else (prev, current)
 
-        return [r for _, _, r in tagged]
+        metrics = pattern_parser.metrics
+        if new_matches := await cut_loser():
+            loser.match_result = new_matches[0]
+            metrics.inc("stark_overlaps", command=loser.command.name, resolution="cut")
+        elif new_matches := await cut_winner():  # the winner is cut only if the loser can't be
+            winner.match_result = new_matches[0]
+            metrics.inc("stark_overlaps", command=loser.command.name, resolution="cut_winner")
+        else:
+            metrics.inc("stark_overlaps", command=loser.command.name, resolution="dropped")
+            return drop_loser
+        return True, True
 
     async def _match_commands(
         self,
@@ -138,18 +248,31 @@ class SearchProcessor(CommandsContextProcessor):
         pattern_parser: PatternParser,
         commands: list[Command],
         recognized_entities: list[RecognizedEntity],
+        anchor_index: CommandsAnchorIndex | None = None,
+        policy: SearchPolicy = SearchPolicy.ALL,
+        stats: SearchStats | None = None,
     ) -> list[SearchResult]:
         results: list[SearchResult] = []
         futures: list[tuple[Command, SoonValue[list[MatchResult]]]] = []
 
+        if self.combined_matcher:
+            commands = self.combined_matcher.candidates(string, language_code, pattern_parser, commands)
+        elif anchor_index is not None:
+            commands = anchor_index.candidates(string, language_code, pattern_parser, commands)
+
+        if policy is SearchPolicy.FIRST_MATCH:
+            return await self._match_first_command(
+                string, language_code, pattern_parser, commands, recognized_entities, stats
+            )
+
         # run concurent commands match
         async with create_task_group() as group:
             for command in commands:
                 futures.append(
                     (
                         command,
-                        group.soonify(pattern_parser.match)(
-                            command.get_pattern(language_code), string, recognized_entities
+                        group.soonify(self._match_command)(
+                            command, string, language_code, pattern_parser, recognized_entities
                         ),
                     )
                 )
@@ -163,6 +286,67 @@ class SearchProcessor(CommandsContextProcessor):
 
         return results
 
+    async def _match_command(
+        self,
+        command: Command,
+        string: str | LocaleString,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        recognized_entities: list[RecognizedEntity],
+    ) -> list[MatchResult]:
+        metrics = pattern_parser.metrics
+        with metrics.timer("stark_command_match_seconds", command=command.name):
+            matches = await pattern_parser.match(command.get_pattern(language_code), string, recognized_entities)
+        metrics.inc("stark_command_matches", len(matches), command=command.name)
+        if (deadline := current_deadline()) is not None and deadline.expired:
+            deadline.timed_out_commands[command.name] += 1  # the match was cut short or finished late
+        return matches
+
+    async def _match_first_command(
+        self,
+        string: str | LocaleString,
+        language_code: LanguageCode,
+        pattern_parser: PatternParser,
+        commands: list[Command],
+        recognized_entities: list[RecognizedEntity],
+        stats: SearchStats | None = None,
+    ) -> list[SearchResult]:
+        """
+        Matches commands concurrently and returns the matches of the highest priority (the lowest index) command
+        as soon as every command before it has finished without a match. Matches still in flight are cancelled.
+        """
+        matches: list[list[MatchResult] | None] = [None] * len(commands)  # None until finished
+        winner: int | None = None
+        frontier = 0  # every command before the frontier has finished without a match
+
+        async def match_command(i: int, command: Command):
+            nonlocal winner, frontier
+            matches[i] = await self._match_command(command, string, language_code, pattern_parser, recognized_entities)
+            while frontier < len(commands) and (frontier_matches := matches[frontier]) is not None:
+                if frontier_matches:
+                    winner = frontier
+                    group.cancel_scope.cancel()
+                    return
+                frontier += 1
+
+        async with create_task_group() as group:
+            for i, command in enumerate(commands):
+                group.start_soon(match_command, i, command)
+
+        if winner is None:
+            return []
+
+        cancelled = matches.count(None)
+        if stats is not None and cancelled:
+            stats.early_returns += 1
+            stats.matches_cancelled += cancelled
+        logger.debug(f"First match {commands[winner]} confirmed, cancelled {cancelled} of {len(commands)} matches")
+
+        return [
+            SearchResult(command=commands[winner], match_result=match, index=i)
+            for i, match in enumerate(matches[winner] or [])
+        ]
+
     # Implement CommandsContextProcessor
 
     @override
@@ -173,4 +357,24 @@ class SearchProcessor(CommandsContextProcessor):
         context_layer: CommandsContextLayer,
         recognized_entities: list[RecognizedEntity],
     ) -> list[SearchResult]:
-        return await self.search(string, context.pattern_parser, context_layer.commands, recognized_entities)
+        anchor_index = context.commands_manager.anchor_index if self.anchor_prefilter else None
+        return await self.search(
+            string,
+            context.pattern_parser,
+            context_layer.commands,
+            recognized_entities,
+            anchor_index,
+            context.search_policy,
+            context.search_stats,
+        )
+
+
+def batch_results_cache(maxsize: int = 4096) -> LRUCache[BatchResultsKey, list[SearchResult]]:
+    return LRUCache(maxsize=maxsize, name="search.batch_results")
+
+
+def _copy_results(results: list[SearchResult]) -> list[SearchResult]:
+    return [
+        SearchResult(command=result.command, match_result=copy.deepcopy(result.match_result), index=result.index)
+        for result in results
+    ]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+
+import anyio
+
+from .command import Response
+
+
+class ResponseQueue:
+    """
+    Bounded FIFO of the responses waiting to be delivered, the consumer is woken up as soon as one is put.
+
+    `put` waits while `capacity` responses are queued, the waiting producers are admitted in order. Unlike a memory
+    object stream, a queued response can be taken back with `remove` (`unrespond`).
+    """
+
+    capacity: int
+
+    def __init__(self, capacity: int = 1024):
+        assert capacity > 0
+        self.capacity = capacity
+        self._items: deque[Response] = deque()
+        self._slots = anyio.Semaphore(capacity)
+        self._changed: anyio.Event | None = None
+
+    async def put(self, response: Response):
+        await self._slots.acquire()
+        self._items.append(response)
+        self.wake()
+
+    def popleft(self) -> Response:
+        response = self._items.popleft()
+        self._slots.release()
+        return response
+
+    def remove(self, response: Response) -> bool:
+        try:
+            self._items.remove(response)
+        except ValueError:
+            return False
+        self._slots.release()
+        return True
+
+    async def wait(self):
+        """Returns when a response is queued or `wake` is called, right away if the queue isn't empty."""
+        if self._items:
+            return
+        if self._changed is None:
+            self._changed = anyio.Event()
+        await self._changed.wait()
+
+    def wake(self):
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Response]:
+        return iter(self._items)
+
+    def __contains__(self, response: object) -> bool:
+        return response in self._items
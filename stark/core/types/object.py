@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import copy
+import weakref
 from abc import ABCMeta
 from typing import Any, cast
 
 from stark.core.patterns.pattern import Pattern
 from stark.general.classproperty import classproperty
-from stark.general.localisation import LocaleString
+from stark.general.localisation import LanguageCode, LocaleString
+
+_interned_patterns: weakref.WeakKeyDictionary[type, dict[LanguageCode, Pattern]] = weakref.WeakKeyDictionary()
 
 
 class UnionMeta(ABCMeta):
@@ -57,6 +60,23 @@ class NLObject[T](metaclass=UnionMeta):
     def patterns(cls) -> dict[str, Pattern]:
         return {"base": cls.pattern}
 
+    @classmethod
+    def get_patterns(cls) -> dict[LanguageCode, Pattern]:
+        """
+        The `patterns` of the class, evaluated once and reused for the life of the class.
+        The classproperties build the patterns on every access, the parser reads them through this method.
+        """
+        if (patterns := _interned_patterns.get(cls)) is None:
+            patterns = _interned_patterns[cls] = dict(cls.patterns)
+        return patterns
+
+    @classmethod
+    def get_pattern(cls, language_code: LanguageCode = "base") -> Pattern:
+        patterns = cls.get_patterns()
+        if language_code in patterns:
+            return patterns[language_code]
+        return patterns["base"]
+
     @classproperty
     def greedy(
         cls,
@@ -67,6 +87,15 @@ class NLObject[T](metaclass=UnionMeta):
         """
         return False  # TODO: review default behavior
 
+    @classproperty
+    def pure(cls) -> bool:
+        """
+        Indicates the parse result depends only on the substring and its language: `did_parse` uses no injected
+        state (dictionaries, settings, time) and has no side effects.
+        Lets PatternParser reuse results across utterances, see `PatternParser.is_pure` for the full conditions.
+        """
+        return False
+
     def __init__(self, *args, **kwargs):  # type: ignore[no-redef]  # noqa: F811  # intentional override of the documented single-value __init__ above
         """Init with wrapped value, if provided. Otherwise leave `value` untouched so a static
         value set at class declaration time (e.g. `value = "foo"`) survives instantiation."""
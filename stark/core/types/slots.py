@@ -1,8 +1,12 @@
 import logging
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, get_args
 
-from stark.core.parsing import ObjectParser, ParameterMatch, ParseError
+import anyio
+
+from stark.core.parsing import ObjectParser, ParameterMatch, ParseError, ParseResult
 from stark.general.localisation import LocaleString
+from stark.tools.common.span import Span
 
 from ..patterns import PatternParameter
 from .object import NLObject
@@ -12,11 +16,28 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+type _Score = tuple[int, int, int, tuple[int, ...]]  # required slots filled, slots filled, characters covered, -ranks
+type _Assignment = tuple[int | None, ...]  # index of the chosen candidate per slot
+
+
+@dataclass
+class _Candidate:
+    result: ParseResult
+    span: Span
+    rank: int  # position among the results of the type, earlier is preferred
+
 
 class SlotsParser(ObjectParser):
     """
     SlotsParser is an alternative to the default parser that provides unordered parameter extraction for any NLObject type with multiple fields, no pattern for the root type needed. Each annotated field (except `value`) becomes a slot that will be parsed independently. Fields can be required or optional (`Optional[T]` / `T | None`). Unlike unordered patterns (which work at the regex level), Slots parse each field independently from the input string, so they handle multi-word and greedy parameters correctly.
 
+    Every slot type is parsed concurrently against the whole string, collecting all the candidate spans, then the
+    slots get the assignment of non-overlapping candidates that fills the most required slots, then the most slots,
+    then covers the most of the string (memoized search, so a slot may skip its first candidate for a better overall
+    fit). Slots left without a candidate because of conflicts, and required slots without any, are parsed once again
+    from the string with the assigned substrings removed, which covers types that extract their value from anywhere
+    in the given string.
+
     Example:
         class TimerSlots(NLObject):
             hours: Hours
@@ -35,10 +56,8 @@ class SlotsParser(ObjectParser):
         self.pattern_parser = pattern_parser
 
     async def did_parse(self, obj: NLObject, from_string: LocaleString) -> str:
-        parsed_parameters: dict[str, ParameterMatch] = {}
-
-        slots = {
-            key: PatternParameter(
+        slots = [
+            PatternParameter(
                 name=key,
                 group_name=key,
                 type_name=(get_args(type_)[0].__name__ if type(None) in get_args(type_) else type_.__name__),
@@ -46,52 +65,166 @@ class SlotsParser(ObjectParser):
             )
             for key, type_ in type(obj).__annotations__.items()
             if key not in {"value", "at_least_one", "all_required"}
-        }
+        ]
 
-        string = from_string[:]  # copy
-        start_index = len(string)
-        end_index = 0
+        candidates_by_type = await self._parse_candidates({param.type_name for param in slots}, from_string)
+        candidates = [candidates_by_type[param.type_name] for param in slots]
+        assignment = self._assign(slots, candidates)
 
-        for param in slots.values():
-            parameter_reg_type = self.pattern_parser.parameter_types_by_name[param.type_name]
-            parameter_type = parameter_reg_type.type
+        parsed_parameters: dict[str, ParameterMatch] = {}
+        spans: list[Span] = []
+        for param, slot_candidates, index in zip(slots, candidates, assignment, strict=True):
+            if index is None:
+                continue
+            candidate = slot_candidates[index]
+            parsed_parameters[param.name] = ParameterMatch(
+                name=param.name,
+                parsed_obj=candidate.result.obj,
+                parsed_substr=candidate.result.substring,
+                span=candidate.span,
+            )
+            spans.append(candidate.span)
+
+        # parse the rest of the slots from what's left of the string
+
+        string = from_string._with("".join(from_string[gap.slice] for gap in _gaps(spans, len(from_string))))
+
+        for param, slot_candidates in zip(slots, candidates, strict=True):
+            if param.name in parsed_parameters:
+                continue
+            if not slot_candidates and param.optional:
+                parsed_parameters[param.name] = ParameterMatch(name=param.name, parsed_obj=None, parsed_substr="")
+                continue
+
+            parameter_type = self.pattern_parser.parameter_types_by_name[param.type_name].type
             try:
                 parse_result = await self.pattern_parser.parse_object(parameter_type, from_string=string)
-                parameter_match = ParameterMatch(
-                    name=param.name,
-                    parsed_obj=parse_result.obj,
-                    parsed_substr=parse_result.substring,
-                )
-                # If the "best" assignment of words to slots requires skipping a candidate for slot 1 in favor of a better overall fit for all slots, this approach won't find it. (Full backtracking over all slot assignments would be needed for that.)
             except ParseError as e:
                 if param.optional:
                     logger.debug(f"Failed to match optional slot parameter {param.name} from {string}")
-                    parameter_match = ParameterMatch(
-                        name=param.name,
-                        parsed_obj=None,
-                        parsed_substr="",
-                    )
-                else:
-                    msg = f"Failed to match required slot parameter {parameter_type} from {string}; {e}"
-                    logger.debug(msg)
-                    raise ParseError(msg) from e
-
-            parsed_parameters[param.name] = parameter_match
-            if parameter_match.parsed_substr:
-                start_index = min(start_index, from_string.index(parameter_match.parsed_substr))
-                end_index = max(
-                    end_index,
-                    from_string.index(parameter_match.parsed_substr) + len(parameter_match.parsed_substr),
-                )
-                string = string.replace(parameter_match.parsed_substr, "")
+                    parsed_parameters[param.name] = ParameterMatch(name=param.name, parsed_obj=None, parsed_substr="")
+                    continue
+                msg = f"Failed to match required slot parameter {parameter_type} from {string}; {e}"
+                logger.debug(msg)
+                raise ParseError(msg) from e
+
+            span = _find_free_span(from_string, parse_result.substring, spans)
+            parsed_parameters[param.name] = ParameterMatch(
+                name=param.name,
+                parsed_obj=parse_result.obj,
+                parsed_substr=parse_result.substring,
+                span=span,
+            )
+            if span:
+                spans.append(span)
+            string = string.replace(parse_result.substring, "")
 
-        if len([p for p in parsed_parameters.values() if p.parsed_obj is not None]) < 1:
+        if not spans:
             raise ParseError(
-                f"{type(obj)} At least one parameter must be matched, can't find any of {slots.keys()} in '{from_string}'"
+                f"{type(obj)} At least one parameter must be matched, can't find any of {[p.name for p in slots]} in '{from_string}'"
             )
 
-        for name, value in parsed_parameters.items():
-            setattr(obj, name, value.parsed_obj)
+        for param in slots:
+            setattr(obj, param.name, parsed_parameters[param.name].parsed_obj)
 
+        start_index = min(span.start for span in spans)
+        end_index = max(span.end for span in spans)
         obj.value = from_string = from_string[start_index:end_index]
         return from_string
+
+    async def _parse_candidates(self, type_names: set[str], from_string: LocaleString) -> dict[str, list[_Candidate]]:
+        """Parses all the candidates of every type concurrently, slots of the same type share the candidates."""
+        candidates: dict[str, list[_Candidate]] = {}
+
+        async def parse_candidates(type_name: str):
+            parameter_type = self.pattern_parser.parameter_types_by_name[type_name].type
+            candidates[type_name] = [
+                _Candidate(result, result.span, rank)
+                for rank, result in enumerate(
+                    [result async for result in self.pattern_parser.parse_objects(parameter_type, from_string)]
+                )
+                if result.span is not None
+            ]
+
+        async with anyio.create_task_group() as group:
+            for type_name in type_names:
+                group.start_soon(parse_candidates, type_name)
+
+        return candidates
+
+    def _assign(self, slots: list[PatternParameter], candidates: list[list[_Candidate]]) -> _Assignment:
+        """Finds the best assignment of non-overlapping candidates to the slots, None leaves a slot empty."""
+        memo: dict[tuple[int, frozenset[tuple[int, int]]], tuple[_Score, _Assignment]] = {}
+        # only the candidates that overlap candidates of the next slots constrain the rest of the search
+        constraining = [
+            [
+                any(_overlap(candidate.span, other.span) for later in candidates[index + 1 :] for other in later)
+                for candidate in slot_candidates
+            ]
+            for index, slot_candidates in enumerate(candidates)
+        ]
+
+        def best(index: int, taken: frozenset[tuple[int, int]]) -> tuple[_Score, _Assignment]:
+            if index == len(slots):
+                return (0, 0, 0, ()), ()
+            if (found := memo.get((index, taken))) is not None:
+                return found
+
+            free = [
+                not any(start < candidate.span.end and candidate.span.start < end for start, end in taken)
+                for candidate in candidates[index]
+            ]
+            result: tuple[_Score, _Assignment] | None = None
+            if not any(free[i] and not constraining[index][i] for i in range(len(free))):
+                # leaving the slot empty is dominated by a free candidate that constrains nothing
+                (required, filled, covered, ranks), rest = best(index + 1, taken)
+                # ranks prefer the earlier candidates for the earlier slots
+                result = (required, filled, covered, (-len(candidates[index]), *ranks)), (None, *rest)
+
+            for candidate_index, candidate in enumerate(candidates[index]):
+                if not free[candidate_index]:
+                    continue  # overlaps a candidate taken by a previous slot
+                span = candidate.span
+                next_taken = taken | {(span.start, span.end)} if constraining[index][candidate_index] else taken
+                (required, filled, covered, ranks), rest = best(index + 1, next_taken)
+                score = (
+                    required + (not slots[index].optional),
+                    filled + 1,
+                    covered + span.length,
+                    (-candidate.rank, *ranks),
+                )
+                if result is None or score > result[0]:
+                    result = score, (candidate_index, *rest)
+
+            assert result is not None
+            memo[(index, taken)] = result
+            return result
+
+        return best(0, frozenset())[1]
+
+
+def _overlap(a: Span, b: Span) -> bool:
+    return a.start < b.end and b.start < a.end
+
+
+def _gaps(spans: list[Span], length: int) -> list[Span]:
+    gaps = []
+    position = 0
+    for span in sorted(spans, key=lambda span: span.start):
+        gaps.append(Span(position, span.start))
+        position = span.end
+    gaps.append(Span(position, length))
+    return gaps
+
+
+def _find_free_span(string: str, substring: str, taken: list[Span]) -> Span | None:
+    """Finds the first occurrence of the substring that doesn't overlap the taken spans, or the first one at all."""
+    first = None
+    start = string.find(substring)
+    while start != -1:
+        span = Span(start, start + len(substring))
+        first = first or span
+        if not any(_overlap(span, other) for other in taken):
+            return span
+        start = string.find(substring, start + 1)
+    return first
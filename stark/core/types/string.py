@@ -1,4 +1,4 @@
-from .object import NLObject
+from .object import NLObject, classproperty
 
 
 class NLString(NLObject):
@@ -8,6 +8,10 @@ class NLString(NLObject):
 
     value: str
 
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
 
 def __getattr__(name):
     # Deprecated alias — String was renamed to NLString.
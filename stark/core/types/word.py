@@ -10,6 +10,10 @@ class NLWord(NLObject):
 
     value: str
 
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
     @classproperty
     def pattern(cls) -> Pattern:
         return Pattern(f"[{rules.alphanumerics}]+")
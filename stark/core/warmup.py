@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from stark.core.anchor_index import CommandsAnchorIndex
+from stark.core.command import Command
+from stark.core.parsing import CompiledPatternKey, ParsingEngine, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.patterns.rules import rules_list
+from stark.core.types.union import Union
+from stark.general.localisation import LanguageCode
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1  # bump when the snapshot layout or the compiled sources change meaning
+
+
+@dataclass
+class WarmupStats:
+    compiled: int = 0  # patterns compiled (or restored) and kept by the parser
+    loaded: int = 0  # compiled patterns restored from the snapshot
+    failed: int = 0  # patterns that don't compile, health_check reports them
+    evicted: int = 0  # compiled patterns that didn't fit the parser's pattern cache
+    seconds: float = 0.0
+
+
+def warmup(
+    pattern_parser: PatternParser,
+    commands: list[Command],
+    languages: Iterable[LanguageCode] | None = None,
+    snapshot: Path | str | None = None,
+    anchor_index: CommandsAnchorIndex | None = None,
+) -> WarmupStats:
+    """
+    Compiles the whole grammar ahead of the first utterance and keeps it in the parser.
+
+    Every command pattern and every registered type pattern is compiled (with `@key` resolution) for every language,
+    the top-level regexes are built, as well as the union branch indexes, the chart matchers (for the chart engine)
+    and the command anchors (if `anchor_index` is given). Call it after all the types are registered: registering a
+    type drops the compiled patterns.
+
+    With `snapshot`, the compiled sources are restored from the file if its hash matches the current grammar
+    (commands, types, localizer strings, languages and the S.T.A.R.K. version), otherwise compiled from scratch and
+    written to the file, so restarts and new workers skip the pattern building.
+    """
+    started = time.perf_counter()
+    languages = sorted(set(languages) if languages is not None else default_languages(pattern_parser, commands))
+    stats = WarmupStats()
+
+    snapshot_path = Path(snapshot) if snapshot is not None else None
+    digest = grammar_hash(pattern_parser, commands, languages) if snapshot_path else ""
+    if snapshot_path:
+        stats.loaded = load_grammar_snapshot(pattern_parser, snapshot_path, digest)
+
+    evictions = pattern_parser.pattern_cache_stats.evictions
+    for language_code in languages:
+        for command in commands:
+            stats.failed += not _warmup_pattern(pattern_parser, command.get_pattern(language_code), language_code)
+
+        for registered in list(pattern_parser.parameter_types_by_name.values()):
+            object_type = registered.type
+            try:
+                pattern = pattern_parser._resolve_pattern(object_type, language_code)
+            except Exception as e:
+                logger.debug(f"Can't resolve the pattern of {object_type.__name__} for '{language_code}': {e}")
+                stats.failed += 1
+                continue
+            stats.failed += not _warmup_pattern(pattern_parser, pattern, language_code)
+            if issubclass(object_type, Union) and hasattr(object_type, "_types") and not registered.parser.patterns:
+                pattern_parser.union_index(object_type, language_code)
+
+        if anchor_index is not None:
+            anchor_index.candidates("", language_code, pattern_parser, anchor_index.commands)
+
+    stats.compiled = pattern_parser.pattern_cache_stats.size
+    stats.evicted = pattern_parser.pattern_cache_stats.evictions - evictions
+    if stats.evicted:
+        logger.warning(
+            f"Grammar warmup evicted {stats.evicted} compiled patterns, raise PatternParser(pattern_cache_size=...)"
+        )
+
+    if snapshot_path and stats.loaded < stats.compiled:
+        save_grammar_snapshot(pattern_parser, snapshot_path, digest)
+
+    stats.seconds = time.perf_counter() - started
+    logger.info(
+        f"Grammar warmup: {stats.compiled} patterns ({stats.loaded} from snapshot, {stats.failed} failed) in {stats.seconds:.3f}s"
+    )
+    return stats
+
+
+def _warmup_pattern(pattern_parser: PatternParser, pattern: Pattern, language_code: LanguageCode) -> bool:
+    try:
+        compiled = pattern_parser._get_compiled_pattern(pattern, language_code=language_code)
+        compiled.regex  # noqa: B018  # the regex is built lazily, build it now
+        if pattern_parser.engine is ParsingEngine.CHART:
+            pattern_parser.chart_engine.matcher(pattern, None, language_code)
+    except Exception as e:
+        logger.debug(f"Can't compile {pattern} for '{language_code}': {e}")
+        return False
+    return True
+
+
+def default_languages(pattern_parser: PatternParser, commands: list[Command]) -> set[LanguageCode]:
+    """The languages of the localizer and of all the patterns, plus 'base'."""
+    languages: set[LanguageCode] = {"base"}
+    if pattern_parser.localizer:
+        languages |= pattern_parser.localizer.languages
+    for command in commands:
+        languages |= command.patterns.keys()
+    for registered in pattern_parser.parameter_types_by_name.values():
+        languages |= (registered.parser.patterns or registered.type.get_patterns()).keys()
+    return languages
+
+
+def grammar_hash(pattern_parser: PatternParser, commands: list[Command], languages: Iterable[LanguageCode]) -> str:
+    """Hash of everything the compiled patterns are built from."""
+    try:
+        stark_version = version("stark-engine")
+    except PackageNotFoundError:
+        stark_version = "unknown"
+
+    localizer = pattern_parser.localizer
+    grammar = {
+        "format": SNAPSHOT_FORMAT,
+        "stark": stark_version,
+        "rules": [(rule.pattern, rule.replace) for rule in rules_list],
+        "languages": sorted(languages),
+        "commands": sorted(
+            (command.name, sorted((lang, pattern._origin) for lang, pattern in command.patterns.items()))
+            for command in commands
+        ),
+        "types": sorted(
+            (
+                name,
+                f"{registered.type.__module__}.{registered.type.__qualname__}",
+                type(registered.parser).__qualname__,
+                registered.type.greedy,
+                sorted(
+                    (lang, pattern._origin)
+                    for lang, pattern in (registered.parser.patterns or registered.type.get_patterns()).items()
+                ),
+            )
+            for name, registered in pattern_parser.parameter_types_by_name.items()
+        ),
+        "strings": sorted(
+            (lang, sorted((key, string.value) for key, string in strings.strings.items()))
+            for lang, strings in localizer.recognizable.items()
+        )
+        if localizer
+        else [],
+    }
+    return hashlib.sha256(json.dumps(grammar, default=str).encode()).hexdigest()
+
+
+def save_grammar_snapshot(pattern_parser: PatternParser, path: Path | str, digest: str):
+    path = Path(path)
+    data = {
+        "format": SNAPSHOT_FORMAT,
+        "hash": digest,
+        "patterns": [
+            [origin, language_code, group_prefix, [list(item) for item in prefill], source]
+            for (origin, language_code, group_prefix, prefill), source in pattern_parser.export_compiled_patterns()
+        ],
+    }
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary.write_text(json.dumps(data, ensure_ascii=False))
+    temporary.replace(path)  # atomic, concurrent workers never read a partial snapshot
+    logger.debug(f"Saved grammar snapshot with {len(data['patterns'])} patterns to {path}")
+
+
+def load_grammar_snapshot(pattern_parser: PatternParser, path: Path | str, digest: str) -> int:
+    """Restores the compiled patterns from the snapshot if it matches the digest, returns the number restored."""
+    path = Path(path)
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable grammar snapshot {path}: {e}")
+        return 0
+
+    if data.get("format") != SNAPSHOT_FORMAT or data.get("hash") != digest:
+        logger.info(f"Grammar snapshot {path} is stale, compiling from scratch")
+        return 0
+
+    entries: list[tuple[CompiledPatternKey, str]] = [
+        ((origin, language_code, group_prefix, tuple((key, value) for key, value in prefill)), source)
+        for origin, language_code, group_prefix, prefill, source in data["patterns"]
+    ]
+    pattern_parser.import_compiled_patterns(entries)
+    return len(entries)
@@ -1,58 +1,314 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+import weakref
 from collections import OrderedDict
 from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, fields
+from enum import Enum
 from functools import wraps
 
 import anyio
 
+from stark.general.feature_flags import FeatureFlag, get_flag
+
 type Seconds = float
+type Bytes = int
+
+
+class _Unchanged(Enum):
+    UNCHANGED = "unchanged"  # lets `configure(ttl=None)` turn the TTL off
+
+
+UNCHANGED = _Unchanged.UNCHANGED
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+    evictions: int = 0  # entries dropped to stay within the size or memory budget, or expired
+    memory: Bytes = 0  # estimated with the cache's weigher
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __add__(self, other: CacheStats) -> CacheStats:
+        return CacheStats(*(getattr(self, f.name) + getattr(other, f.name) for f in fields(self)))
+
+
+def shallow_size(key: object, value: object) -> Bytes:
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class LRUCache[K, V]:
+    """
+    Synchronous bounded LRU mapping with stats. Not thread-safe, meant for the event loop thread.
+
+    Bounded by the number of entries (`maxsize`) and optionally by the estimated memory of the entries
+    (`max_memory`, measured with `weigher`, shallow `sys.getsizeof` of the key and the value by default) and by the
+    age of the entries (`ttl`, measured with `clock`). Named caches are registered in the CacheRegistry, which applies
+    the configuration from the environment and from `CacheRegistry.configure` and clears or inspects caches by name.
+    """
+
+    name: str | None
+    maxsize: int
+    max_memory: Bytes | None
+    ttl: Seconds | None
+    enabled: bool
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        name: str | None = None,
+        max_memory: Bytes | None = None,
+        ttl: Seconds | None = None,
+        weigher: Callable[[K, V], Bytes] = shallow_size,
+        clock: Callable[[], float] = time.monotonic,
+        registry: CacheRegistry | None = None,
+    ):
+        self.name = name
+        self.maxsize = maxsize
+        self.max_memory = max_memory
+        self.ttl = ttl
+        self.enabled = True
+        self.weigher = weigher
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.memory = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._weights: dict[K, Bytes] = {}
+        self._expires: dict[K, float] = {}
+        if name is not None:
+            (registry or default_cache_registry).register(self)
+
+    def get(self, key: K) -> V | None:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        if (expires := self._expires.get(key)) is not None and expires <= self.clock():
+            self._remove(key)
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V):
+        if not self.enabled:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = value
+        weight = self._weights[key] = self.weigher(key, value)
+        self.memory += weight
+        if self.ttl is not None:
+            self._expires[key] = self.clock() + self.ttl
+        self._trim()
+
+    def configure(
+        self,
+        maxsize: int | None = None,
+        max_memory: Bytes | None = None,
+        ttl: Seconds | _Unchanged | None = UNCHANGED,
+        enabled: bool | None = None,
+    ):
+        """
+        Changes the budgets at runtime, entries over the new budgets are evicted right away. `ttl=None` turns the
+        TTL off, a new TTL also applies to the entries stored before, counted from now.
+        """
+        if maxsize is not None:
+            self.maxsize = maxsize
+        if max_memory is not None:
+            self.max_memory = max_memory
+        if ttl is not UNCHANGED:
+            self.ttl = ttl
+            self._expires.clear()
+            if ttl is not None:
+                expires = self.clock() + ttl
+                self._expires.update(dict.fromkeys(self._data, expires))
+        if enabled is not None:
+            self.enabled = enabled
+        if not self.enabled:
+            self.clear()
+        self._trim()
+
+    def clear(self):
+        self._data.clear()
+        self._weights.clear()
+        self._expires.clear()
+        self.memory = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.hits, misses=self.misses, size=len(self._data), evictions=self.evictions, memory=self.memory
+        )
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def items(self) -> list[tuple[K, V]]:
+        """The entries, least recently used first; expired entries are included until they are looked up."""
+        return list(self._data.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
 
+    def _trim(self):
+        while self._data and (
+            len(self._data) > self.maxsize or (self.max_memory is not None and self.memory > self.max_memory)
+        ):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def _remove(self, key: K):
+        del self._data[key]
+        self.memory -= self._weights.pop(key)
+        self._expires.pop(key, None)
+
+
+class CacheRegistry:
+    """
+    Registry of named caches: one place to configure, inspect and clear them.
+
+    Several caches may share a name (e.g. one per PatternParser instance), the registry keeps weak references to
+    all of them. A cache is configured on registration from the environment, then from the options passed to
+    `configure` for its name:
+
+    - `STARK_CACHE_<NAME>_MAXSIZE`, `STARK_CACHE_<NAME>_MAX_MEMORY` (bytes), `STARK_CACHE_<NAME>_TTL` (seconds)
+      where `<NAME>` is the upper-cased name with dots replaced by underscores, e.g. `STARK_CACHE_PARSING_PATTERNS_TTL`
+    - `STARK_DISABLE_CACHES=1` disables all the named caches
+    """
+
+    def __init__(self):
+        self._caches: dict[str, weakref.WeakSet[LRUCache]] = {}
+        self._options: dict[str, dict[str, int | float | bool | None]] = {}
+
+    def register(self, cache: LRUCache):
+        assert cache.name is not None, "Only named caches can be registered"
+        self._caches.setdefault(cache.name, weakref.WeakSet()).add(cache)
+        cache.configure(**{**self._env_options(cache.name), **self._options.get(cache.name, {})})
+
+    def configure(
+        self,
+        name: str,
+        maxsize: int | None = None,
+        max_memory: Bytes | None = None,
+        ttl: Seconds | _Unchanged | None = UNCHANGED,
+        enabled: bool | None = None,
+    ):
+        """Configures the existing caches with the name and the ones created later, `ttl=None` turns the TTL off."""
+        options: dict[str, int | float | bool | None] = {
+            key: value
+            for key, value in {"maxsize": maxsize, "max_memory": max_memory, "enabled": enabled}.items()
+            if value is not None
+        }
+        if ttl is not UNCHANGED:
+            options["ttl"] = ttl
+        self._options.setdefault(name, {}).update(options)
+        for cache in self.caches(name):
+            cache.configure(**options)
+
+    def caches(self, name: str | None = None) -> list[LRUCache]:
+        if name is not None:
+            return list(self._caches.get(name, ()))
+        return [cache for caches in self._caches.values() for cache in caches]
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(name for name, caches in self._caches.items() if caches)
+
+    def stats(self) -> dict[str, CacheStats]:
+        """Stats per name, summed over the caches sharing it."""
+        return {name: sum((cache.stats for cache in self.caches(name)), CacheStats()) for name in self.names}
+
+    def clear(self, name: str | None = None):
+        """Clears the caches with the name, or all of them."""
+        for cache in self.caches(name):
+            cache.clear()
+
+    def reset_stats(self, name: str | None = None):
+        for cache in self.caches(name):
+            cache.reset_stats()
+
+    @staticmethod
+    def _env_options(name: str) -> dict[str, int | float | bool]:
+        prefix = "STARK_CACHE_" + name.upper().replace(".", "_").replace("-", "_")
+        options: dict[str, int | float | bool] = {}
+        if maxsize := os.getenv(f"{prefix}_MAXSIZE"):
+            options["maxsize"] = int(maxsize)
+        if max_memory := os.getenv(f"{prefix}_MAX_MEMORY"):
+            options["max_memory"] = int(max_memory)
+        if ttl := os.getenv(f"{prefix}_TTL"):
+            options["ttl"] = float(ttl)
+        if get_flag(FeatureFlag.DISABLE_CACHES):
+            options["enabled"] = False
+        return options
+
+
+default_cache_registry = CacheRegistry()
+
+
+def clear_caches(name: str | None = None):
+    """Clears the named caches of the default registry: all of them, or the ones with the name."""
+    default_cache_registry.clear(name)
+
+
+def alru_cache[**P, T](
+    maxsize: int = 128, ttl: Seconds = 60.0, name: str | None = None
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """
+    Async LRU cache decorator with a TTL and in-flight deduplication: concurrent calls with the same arguments share
+    one underlying call. Registered in the default CacheRegistry as `name` (the qualified name of the function by
+    default), the wrapper exposes the cache as `wrapper.cache`.
+
+    Hits take no lock: lookups and in-flight bookkeeping happen between awaits of the single event loop thread.
+    """
 
-def alru_cache[**P, T](maxsize: int = 128, ttl: Seconds = 60.0) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
     def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
-        cache: OrderedDict[tuple, tuple[T, float]] = OrderedDict()
+        cache: LRUCache[tuple, tuple[T]] = LRUCache(  # results are wrapped to cache None as well
+            maxsize=maxsize, name=name or f"{func.__module__}.{func.__qualname__}", ttl=ttl, clock=anyio.current_time
+        )
         in_flight: dict[tuple, anyio.Event] = {}
-        lock = anyio.Lock()
 
         @wraps(func)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
             key = (args, tuple(sorted(kwargs.items())))
 
-            while True:
-                async with lock:
-                    now = anyio.current_time()
-
-                    if key in cache:
-                        value, ts = cache[key]
-                        if now - ts < ttl:
-                            cache.move_to_end(key)
-                            return value
-                        cache.pop(key)
-
-                    if key in in_flight:
-                        ev = in_flight[key]
-                    else:
-                        ev = anyio.Event()
-                        in_flight[key] = ev
-                        break
-
-                await ev.wait()
+            while (event := in_flight.get(key)) is not None:
+                await event.wait()  # the same call is in flight, its result will be cached unless it fails
+            if (entry := cache.get(key)) is not None:
+                return entry[0]
 
+            in_flight[key] = event = anyio.Event()
             try:
                 result: T = await func(*args, **kwargs)
+                cache.put(key, (result,))
             finally:
-                async with lock:
-                    pending = in_flight.pop(key) if key in in_flight else None
-                    if pending:
-                        pending.set()
-
-            async with lock:
-                cache[key] = (result, anyio.current_time())
-                cache.move_to_end(key)
-                if len(cache) > maxsize:
-                    cache.popitem(last=False)
-
+                del in_flight[key]
+                event.set()  # release the waiters even if the call failed or was cancelled
             return result
 
+        wrapper.cache = cache  # type: ignore[attr-defined]  # ty: ignore[unresolved-attribute]  # exposed for inspection and clearing
         return wrapper
 
     return decorator
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from collections.abc import Callable
+from enum import StrEnum
+
+import anyio
+from anyio.lowlevel import current_token
+
+
+class OverflowPolicy(StrEnum):
+    DROP_OLDEST = "drop_oldest"  # the new item replaces the oldest one, the producer never waits
+    BLOCK = "block"  # the producer waits for room up to `block_timeout`, then the new item is dropped
+
+
+class ThreadChannel[T]:
+    """
+    Bounded FIFO from any thread (e.g. an audio callback) to one async consumer, without polling.
+
+    `put` is thread-safe and never touches the event loop directly: a consumer waiting in `wait` registers a wakeup
+    that the producer schedules on the consumer's loop (`call_soon_threadsafe` / `run_sync_soon`). When the channel
+    is full, the `overflow` policy decides which item is lost, every lost item is counted in `dropped`.
+
+    With `OverflowPolicy.BLOCK`, only put from threads other than the consumer's event loop thread: the loop can't
+    drain the channel while its own thread waits (the wait ends after `block_timeout` with a dropped item).
+    """
+
+    capacity: int
+    overflow: OverflowPolicy
+    block_timeout: float
+    received: int  # items put, including the dropped ones
+    dropped: int
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        block_timeout: float = 1.0,
+    ):
+        assert capacity > 0
+        self.capacity = capacity
+        self.overflow = OverflowPolicy(overflow)
+        self.block_timeout = block_timeout
+        self.received = 0
+        self.dropped = 0
+        self._items: deque[T] = deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._wakeup: Callable[[], None] | None = None  # set while the consumer waits
+
+    def put(self, item: T) -> bool:
+        """Queues the item, returns False if it was dropped."""
+        with self._lock:
+            self.received += 1
+            queued = True
+            if len(self._items) >= self.capacity:
+                if self.overflow is OverflowPolicy.DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif not self._not_full.wait_for(lambda: len(self._items) < self.capacity, self.block_timeout):
+                    self.dropped += 1
+                    queued = False
+            if queued:
+                self._items.append(item)
+            wakeup, self._wakeup = self._wakeup, None
+        if wakeup and queued:
+            wakeup()
+        return queued
+
+    def get_nowait(self) -> T | None:
+        with self._lock:
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    async def wait(self):
+        """Returns when an item is queued or `wake` is called, right away if the channel isn't empty."""
+        event = anyio.Event()
+        native = current_token().native_token
+        schedule = getattr(native, "call_soon_threadsafe", None) or native.run_sync_soon  # asyncio loop or trio token
+        with self._lock:
+            if self._items:
+                return
+            self._wakeup = lambda: schedule(event.set)
+        try:
+            await event.wait()
+        finally:
+            with self._lock:
+                self._wakeup = None
+
+    def wake(self):
+        """Ends the current `wait` without an item, e.g. to stop the consumer. Thread-safe."""
+        with self._lock:
+            wakeup, self._wakeup = self._wakeup, None
+        if wakeup:
+            wakeup()
+
+    def clear(self) -> int:
+        """Drops the queued items (not counted as dropped), returns how many."""
+        with self._lock:
+            count = len(self._items)
+            self._items.clear()
+            self._not_full.notify_all()
+            return count
+
+    def __len__(self) -> int:
+        return len(self._items)
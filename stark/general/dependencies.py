@@ -1,53 +1,170 @@
-from collections.abc import Callable
+from __future__ import annotations
+
+import inspect
+from collections import ChainMap
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableSet
 from dataclasses import dataclass
 from typing import Any
 
+type DependencyParameter = tuple[str, Any]  # (name, annotation), annotation is None for unannotated parameters
+
 
 @dataclass
 class Dependency:
     name: str | None
     annotation: type | None
     value: Any
-    
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Dependency):
             raise TypeError(f"Cannot compare Dependency with {type(other)}")
         return self.name == other.name and self.annotation == other.annotation
-    
+
     def __hash__(self):
         return hash((self.name, self.annotation))
 
+
 class DependencyManager:
-    
-    dependencies: set[Dependency]
-    
+    """
+    Dependencies indexed by (name, annotation) and by annotation alone for the ones without a name, so a parameter
+    is resolved with two dict lookups. A named dependency wins over an unnamed one with the same annotation.
+    """
+
+    _named: dict[tuple[str, Any], Dependency]
+    _unnamed: dict[Any, Dependency]
+
     def __init__(self):
-        self.dependencies = set()
-        
-    def find(self, name: str | None, annotation: type | None) -> Dependency | None:
-        for dependency in self.dependencies:
-            name_match = name == dependency.name
-            annotation_match = annotation == dependency.annotation
-            if (not dependency.name or name_match) and annotation_match:
-                return dependency
-        return None
-    
-    def resolve(self, func: Callable) -> dict[str, Any]:
-        parameters = {}
-        
-        annotations = dict.fromkeys(func.__code__.co_varnames)  # ty: ignore[unresolved-attribute]  # func is a function with __code__; ty Callable gap
-        annotations.update(func.__annotations__)
-        
-        for name, annotation in annotations.items():
-            if dependency := self.find(name, annotation):
-                parameters[name] = dependency.value
-
-        return parameters
-        
+        self._named = {}
+        self._unnamed = {}
+
+    @property
+    def dependencies(self) -> MutableSet[Dependency]:
+        """Live set of the registered dependencies, `add` and `discard` update the index."""
+        return _DependencySet(self)
+
+    @dependencies.setter
+    def dependencies(self, dependencies: Iterable[Dependency]):
+        self._named.clear()
+        self._unnamed.clear()
+        for dependency in dependencies:
+            _index(self._named, self._unnamed, dependency)
+
+    def find(
+        self,
+        name: str | None,
+        annotation: type | None,
+        overrides: Iterable[Dependency] = (),
+    ) -> Dependency | None:
+        named, unnamed = self._lookup(overrides)
+        return _find(named, unnamed, name, annotation)
+
+    def resolve(self, func: Callable, overrides: Iterable[Dependency] = ()) -> dict[str, Any]:
+        return self.resolve_parameters(dependency_parameters(func), overrides)
+
+    def resolve_parameters(
+        self,
+        parameters: Iterable[DependencyParameter],
+        overrides: Iterable[Dependency] = (),
+    ) -> dict[str, Any]:
+        """
+        Values of the parameters that have a dependency. `overrides` are dependencies of this call only (e.g. the
+        language of the matched command), they take precedence and never change the shared registry.
+        """
+        named, unnamed = self._lookup(overrides)
+        resolved = {}
+        for name, annotation in parameters:
+            if dependency := _find(named, unnamed, name, annotation):
+                resolved[name] = dependency.value
+        return resolved
+
     def add_dependency(self, name: str | None, annotation: type | None, value: Any):
         assert name or annotation
         assert value
-        self.dependencies.add(Dependency(name, annotation, value))
-                
+        _index(self._named, self._unnamed, Dependency(name, annotation, value))
+
+    def _lookup(
+        self, overrides: Iterable[Dependency]
+    ) -> tuple[Mapping[tuple[str, Any], Dependency], Mapping[Any, Dependency]]:
+        if not overrides:
+            return self._named, self._unnamed
+        named: dict[tuple[str, Any], Dependency] = {}
+        unnamed: dict[Any, Dependency] = {}
+        for dependency in overrides:
+            _index(named, unnamed, dependency, replace=True)
+        return ChainMap(named, self._named), ChainMap(unnamed, self._unnamed)
+
+
+class _DependencySet(MutableSet[Dependency]):
+    def __init__(self, manager: DependencyManager):
+        self._manager = manager
+
+    def __contains__(self, dependency: object) -> bool:
+        if not isinstance(dependency, Dependency):
+            return False
+        index, key = _key(self._manager._named, self._manager._unnamed, dependency)
+        return key in index
+
+    def __iter__(self) -> Iterator[Dependency]:
+        yield from list(self._manager._named.values())
+        yield from list(self._manager._unnamed.values())
+
+    def __len__(self) -> int:
+        return len(self._manager._named) + len(self._manager._unnamed)
+
+    def add(self, dependency: Dependency):
+        _index(self._manager._named, self._manager._unnamed, dependency)
+
+    def discard(self, dependency: Dependency):
+        index, key = _key(self._manager._named, self._manager._unnamed, dependency)
+        index.pop(key, None)
+
+    def __repr__(self) -> str:
+        return f"{{{', '.join(map(repr, self))}}}"
+
+
+def dependency_parameters(func: Callable) -> list[DependencyParameter]:
+    """(name, annotation) of the parameters that can be passed by keyword."""
+    return [
+        (name, None if parameter.annotation is inspect.Parameter.empty else parameter.annotation)
+        for name, parameter in inspect.signature(func).parameters.items()
+        if parameter.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    ]
+
+
+def _index(
+    named: dict[tuple[str, Any], Dependency],
+    unnamed: dict[Any, Dependency],
+    dependency: Dependency,
+    replace: bool = False,
+):
+    index, key = _key(named, unnamed, dependency)
+    if replace:
+        index[key] = dependency
+    else:
+        index.setdefault(key, dependency)  # the first registration wins
+
+
+def _key(
+    named: dict[tuple[str, Any], Dependency],
+    unnamed: dict[Any, Dependency],
+    dependency: Dependency,
+) -> tuple[dict[Any, Dependency], Any]:
+    if dependency.name:
+        return named, (dependency.name, dependency.annotation)
+    return unnamed, dependency.annotation
+
+
+def _find(
+    named: Mapping[tuple[str, Any], Dependency],
+    unnamed: Mapping[Any, Dependency],
+    name: str | None,
+    annotation: Any,
+) -> Dependency | None:
+    try:
+        return named.get((name, annotation)) or unnamed.get(annotation)
+    except TypeError:  # unhashable annotation, e.g. Annotated with a dict, can't be a dependency
+        return None
+
+
 default_dependency_manager = DependencyManager()
 default_dependency_manager.add_dependency(None, DependencyManager, default_dependency_manager)
@@ -6,12 +6,16 @@ class FeatureFlag(StrEnum):
     ENABLE_VOICE_CLI = "STARK_ENABLE_VOICE_CLI"
     ENABLE_MULTILANG_MATRIX = "STARK_ENABLE_MULTILANG_MATRIX"
     TYPE_NO_REQUIRED_VALUE = "STARK_TYPE_NO_REQUIRED_VALUE"
+    ENABLE_METRICS = "STARK_ENABLE_METRICS"
+    DISABLE_CACHES = "STARK_DISABLE_CACHES"
 
 
 _DEFAULTS: dict[FeatureFlag, str] = {
     FeatureFlag.ENABLE_VOICE_CLI: "0",
     FeatureFlag.ENABLE_MULTILANG_MATRIX: "1",
     FeatureFlag.TYPE_NO_REQUIRED_VALUE: "0",
+    FeatureFlag.ENABLE_METRICS: "0",
+    FeatureFlag.DISABLE_CACHES: "0",
 }
 
 
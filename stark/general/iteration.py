@@ -0,0 +1,39 @@
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable, Iterable
+
+import anyio
+
+
+async def achunked[T](items: Iterable[T] | AsyncIterable[T], size: int) -> AsyncGenerator[list[T]]:
+    """Groups a sync or async iterable into lists of up to `size` items, the last one may be shorter."""
+    chunk: list[T] = []
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def gather_in_order[T, R](func: Callable[[T], Awaitable[R]], items: list[T]) -> list[R]:
+    """Runs `func` over the items concurrently, returns the results in the order of the items."""
+    if len(items) == 1:
+        return [await func(items[0])]
+
+    slots: dict[int, R] = {}
+
+    async def run(index: int, item: T):
+        slots[index] = await func(item)
+
+    async with anyio.create_task_group() as group:
+        for index, item in enumerate(items):
+            group.start_soon(run, index, item)
+
+    return [slots[index] for index in range(len(items))]
@@ -50,7 +50,7 @@ class TypeInfo(BaseModel):
             fields_parts.append(f"{attr_name}: {type_name}")
         return TypeInfo(
             name=object_type.__name__,
-            pattern=object_type.pattern._origin,
+            pattern=object_type.get_pattern()._origin,
             fields=", ".join(fields_parts),
             docstring=inspect.getdoc(object_type) or "",
         )
@@ -19,12 +19,14 @@ class Localizer:
     base_language: LanguageCode
     localizable: Languages
     recognizable: Languages
+    version: int  # bumped whenever loaded strings change, lets dependent caches invalidate
 
     def __init__(self, languages: set[LanguageCode] | None = None, base_language: LanguageCode = "en"):
         self.languages = languages or {"en"}
         self.base_language = base_language
         self.localizable = {}
         self.recognizable = {}
+        self.version = 0
 
     def localize(self, localizable_string: LocalizableString | str) -> str:
         if not isinstance(localizable_string, LocalizableString):
@@ -48,6 +50,7 @@ class Localizer:
         self._ensure_strings_dirs()
         self._load_files("localizable", self.localizable)
         self._load_files("recognizable", self.recognizable)
+        self.version += 1
 
         missing_localizable = self.languages - self.localizable.keys()
         missing_recognizable = self.languages - self.recognizable.keys()
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from time import perf_counter
+from types import TracebackType
+
+from stark.general.feature_flags import FeatureFlag, get_flag
+
+type Labels = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.00001,
+    0.00005,
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]  # upper bounds, the +Inf bucket is implicit
+    counts: list[int] = field(default_factory=list)  # per bucket, not cumulative; the last one is +Inf
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> Histogram:
+        return Histogram(self.buckets, self.counts.copy(), self.sum, self.count)
+
+    @property
+    def cumulative_counts(self) -> list[int]:
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+
+@dataclass
+class MetricsSnapshot:
+    counters: dict[str, dict[Labels, float]] = field(default_factory=dict)
+    histograms: dict[str, dict[Labels, Histogram]] = field(default_factory=dict)
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self.counters.get(name, {}).get(_labels(labels), 0)
+
+    def histogram(self, name: str, **labels: str) -> Histogram | None:
+        return self.histograms.get(name, {}).get(_labels(labels))
+
+    def to_openmetrics(self) -> str:
+        """Renders the snapshot in the OpenMetrics text exposition format."""
+        lines: list[str] = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}_total{_format_labels(labels)} {_format_value(value)}")
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items(), key=lambda item: item[0]):
+                bounds = [*map(_format_value, histogram.buckets), "+Inf"]
+                for bound, count in zip(bounds, histogram.cumulative_counts, strict=True):
+                    lines.append(f"{name}_bucket{_format_labels((*labels, ('le', bound)))} {count}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsRegistry:
+    """
+    Pull-based registry of counters and histograms for the parsing hot path.
+
+    Disabled by default (enable with `STARK_ENABLE_METRICS=1` or `enabled=True`); while disabled every recording
+    call returns right after checking the flag, and `timer` hands out a shared no-op context manager. Call sites
+    that need to prepare labels should check `enabled` first.
+    """
+
+    enabled: bool
+
+    def __init__(self, enabled: bool | None = None, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = get_flag(FeatureFlag.ENABLE_METRICS) if enabled is None else enabled
+        self.buckets = buckets
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        if not self.enabled:
+            return
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        if (histogram := series.get(key)) is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def timer(self, name: str, **labels: str) -> _Timer | _NullTimer:
+        """Observes the duration of the `with` block in seconds into the histogram."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            counters={name: series.copy() for name, series in self._counters.items()},
+            histograms={
+                name: {labels: histogram.copy() for labels, histogram in series.items()}
+                for name, series in self._histograms.items()
+            },
+        )
+
+    def reset(self):
+        self._counters.clear()
+        self._histograms.clear()
+
+    def to_openmetrics(self) -> str:
+        return self.snapshot().to_openmetrics()
+
+
+default_metrics_registry = MetricsRegistry()
+
+
+class _Timer:
+    __slots__ = ("labels", "name", "registry", "start")
+
+    def __init__(self, registry: MetricsRegistry, name: str, labels: dict[str, str]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> _Timer:
+        self.start = perf_counter()
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ):
+        self.registry.observe(self.name, perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullTimer:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")) for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from queue import Empty, Queue
 from typing import Any
 
-import anyio
+from stark.general.channel import OverflowPolicy, ThreadChannel
 
 
 class Microphone:
-    def __init__(self, callback: Callable[[Any], None], device_id: int | None = None):
+    input_overflows: int  # blocks lost by the audio driver before the callback
+
+    def __init__(
+        self,
+        callback: Callable[[Any], None],
+        device_id: int | None = None,
+        queue_size: int = 64,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
         try:
             from sounddevice import query_devices
         except ImportError:
@@ -22,7 +29,8 @@ class Microphone:
         self.blocksize = 8000
         self.dtype = "int16"
         self.channels = 1
-        self.audio_queue: Queue = Queue()
+        self.audio_queue: ThreadChannel[bytes] = ThreadChannel(queue_size, overflow)
+        self.input_overflows = 0
 
     @staticmethod
     def list_devices() -> list[dict]:
@@ -51,12 +59,17 @@ class Microphone:
             callback=self._audio_input_callback,
         ):
             while True:
-                try:
-                    data = self.audio_queue.get_nowait()
-                except Empty:
-                    await anyio.sleep(0.01)
-                    continue
-                self.callback(data)
+                await self.audio_queue.wait()
+                while (data := self.audio_queue.get_nowait()) is not None:
+                    self.callback(data)
+
+    @property
+    def dropped_frames(self) -> int:
+        """Blocks dropped because the consumer fell `queue_size` blocks behind."""
+        return self.audio_queue.dropped
 
     def _audio_input_callback(self, indata, frames, time, status):
+        # runs in the audio thread
+        if status and status.input_overflow:
+            self.input_overflows += 1
         self.audio_queue.put(bytes(indata))
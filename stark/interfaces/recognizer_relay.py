@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 import logging
-import time
-from collections.abc import Generator
+from collections.abc import Iterable
+from dataclasses import dataclass, field
 
 import anyio
 from asyncer._main import TaskGroup
 
 from stark.general.localisation import LocaleString
+from stark.general.metrics import MetricsRegistry, default_metrics_registry
 from stark.interfaces.protocols import SpeechRecognizer, SpeechRecognizerDelegate
 from stark.models.voice_transcription import (
     Transcription,
@@ -18,24 +19,63 @@ from stark.models.voice_transcription import (
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _Utterance:
+    """Final results of one phrase from the different languages, emitted once by the call that opened it."""
+
+    started: float
+    previous: _Utterance | None = None  # an earlier utterance that must be emitted first
+    origins: dict[str, VoiceTranscriptionTrack] = field(default_factory=dict)
+    outcome: str = ""
+    converged: anyio.Event = field(default_factory=anyio.Event)
+    emitted: anyio.Event = field(default_factory=anyio.Event)
+
+    def converge(self, outcome: str):
+        if not self.converged.is_set():
+            self.outcome = outcome
+            self.converged.set()
+
+
+@dataclass(slots=True)
+class _TrackCursor:
+    words: list[VoiceTranscriptionWord]
+    position: int = 0  # the next word to merge
+
+
 class SpeechRecognizerRelay(SpeechRecognizer):
-    """Broadcasts audio to N per-language recognizers, assembles the best transcription by confidence."""
+    """
+    Broadcasts audio to N per-language recognizers, assembles the best transcription by confidence.
+
+    The first final result of a phrase opens an utterance, the results of the other languages join it. The utterance
+    is emitted as soon as every language reported, when a track reaches `early_emit_confidence` (if set), or after
+    `convergence_timeout`. A language that reports again before the utterance is complete starts the next one, so
+    overlapping phrases don't mix, and they are emitted in order. How long the relay waited for each language is
+    recorded in `metrics` as `stark_relay_language_wait_seconds`.
+    """
 
     _speech_recognizers: list[SpeechRecognizer]
-    _current_transcription: Transcription | None = None
+    _utterances: list[_Utterance]  # the ones that may still receive results
+    _last_utterance: _Utterance | None = None
     _delegate: SpeechRecognizerDelegate | None = None
     _is_recognizing: bool = False
     _convergence_timeout: float
+    _early_emit_confidence: float | None
+    metrics: MetricsRegistry
 
     def __init__(
         self,
         speech_recognizers: list[SpeechRecognizer],
         convergence_timeout: float = 2.0,
+        early_emit_confidence: float | None = None,
+        metrics: MetricsRegistry | None = None,
     ):
         for recognizer in speech_recognizers:
             assert isinstance(recognizer, SpeechRecognizer)
         self._speech_recognizers = speech_recognizers
+        self._utterances = []
         self._convergence_timeout = convergence_timeout
+        self._early_emit_confidence = early_emit_confidence
+        self.metrics = metrics or default_metrics_registry
 
     # --- properties ---
 
@@ -94,38 +134,50 @@ class SpeechRecognizerRelay(SpeechRecognizer):
             lang = result.language_code if isinstance(result, LocaleString) else "base"
             track = VoiceTranscriptionTrack(text=str(result), language_code=lang)
 
-        transcription = Transcription(best=track, origins={lang: track})
+        now = anyio.current_time()
+        utterance, opened = self._assign(lang, track, now)
+        self.metrics.observe("stark_relay_language_wait_seconds", now - utterance.started, language=lang)
+
+        if utterance.emitted.is_set():
+            self.metrics.inc("stark_relay_late_results", language=lang)
+        elif utterance.origins.keys() >= self._languages:
+            utterance.converge("complete")
+        elif (
+            self._early_emit_confidence is not None
+            and max(track.confidence for track in utterance.origins.values()) >= self._early_emit_confidence
+        ):
+            utterance.converge("confident")
 
-        current = self._current_transcription or transcription
-        self._current_transcription = current
-        current.origins.update(transcription.origins)
+        if not opened:
+            return  # the result joined an utterance that another call emits
 
         # wait for other languages to report
-        start_time = time.monotonic()
-        expected_languages = {sr.language_code for sr in self._speech_recognizers if hasattr(sr, "language_code")}
-
-        while (
-            current.origins.keys() != expected_languages and time.monotonic() - start_time < self._convergence_timeout
-        ):
-            await anyio.sleep(0.01)
-
-        if not self._current_transcription:
-            return
-        self._current_transcription = None
+        with anyio.move_on_after(utterance.started + self._convergence_timeout - anyio.current_time()):
+            await utterance.converged.wait()
+        utterance.converge("timeout")
+
+        # overlapping utterances are emitted in the order they started
+        if previous := utterance.previous:
+            await previous.emitted.wait()
+            utterance.previous = None
+
+        self.metrics.observe(
+            "stark_relay_convergence_seconds", anyio.current_time() - utterance.started, outcome=utterance.outcome
+        )
+        if utterance.outcome == "timeout":
+            for language in self._languages - utterance.origins.keys():
+                self.metrics.inc("stark_relay_missing_results", language=language)
 
         # build best confidence track; language priority follows recognizer order
-        language_priority = {
-            sr.language_code: i for i, sr in enumerate(self._speech_recognizers) if hasattr(sr, "language_code")
-        }
-        tracks = {track.model_copy(deep=True) for track in current.origins.values()}
-        # `language_code` is reached via hasattr() on the SpeechRecognizer protocol (which doesn't
-        # declare it), so ty widens the dict key to `object`; it's a LanguageCode (str) at runtime.
-        # Not on the protocol because the relay itself and the test mocks have no single language_code.
-        current.best = self._build_best_confidence(tracks, language_priority=language_priority)  # ty: ignore[invalid-argument-type]
-        current.best.language_code = "base"
+        transcription = Transcription(
+            best=self._build_best_confidence(utterance.origins.values(), language_priority=self._language_priority),
+            origins=dict(utterance.origins),
+        )
+        transcription.best.language_code = "base"
+        utterance.emitted.set()
 
         # emit as VoiceTranscriptionString
-        vts = current.to_voice_transcription_string()
+        vts = transcription.to_voice_transcription_string()
 
         if delegate := self.delegate:
             await delegate.speech_recognizer_did_receive_final_result(vts)
@@ -140,41 +192,94 @@ class SpeechRecognizerRelay(SpeechRecognizer):
 
     # --- private ---
 
+    # `language_code` is reached via hasattr() on the SpeechRecognizer protocol (which doesn't declare it), so it's
+    # typed as `object`; it's a LanguageCode (str) at runtime. Not on the protocol because the relay itself and the
+    # test mocks have no single language_code.
+
+    @property
+    def _languages(self) -> set[str]:
+        return {str(sr.language_code) for sr in self._speech_recognizers if hasattr(sr, "language_code")}
+
+    @property
+    def _language_priority(self) -> dict[str, int]:
+        return {
+            str(sr.language_code): i for i, sr in enumerate(self._speech_recognizers) if hasattr(sr, "language_code")
+        }
+
+    def _assign(self, language: str, track: VoiceTranscriptionTrack, now: float) -> tuple[_Utterance, bool]:
+        """
+        Adds the track to the oldest utterance this language hasn't reported yet, opens a new one if there's none.
+        Returns the utterance and whether it was opened by this track.
+        """
+        languages = self._languages
+        self._utterances = [
+            utterance
+            for utterance in self._utterances
+            if now - utterance.started < self._convergence_timeout and not utterance.origins.keys() >= languages
+        ]
+        opened = False
+        utterance = next((utterance for utterance in self._utterances if language not in utterance.origins), None)
+        if not utterance:
+            previous = self._last_utterance
+            utterance = _Utterance(
+                started=now, previous=previous if previous and not previous.emitted.is_set() else None
+            )
+            self._utterances.append(utterance)
+            self._last_utterance = utterance
+            opened = True
+        utterance.origins[language] = track
+        return utterance, opened
+
     def _build_best_confidence(
         self,
-        tracks: set[VoiceTranscriptionTrack],
+        tracks: Iterable[VoiceTranscriptionTrack],
         until: float | None = None,
         language_priority: dict[str, int] | None = None,
     ) -> VoiceTranscriptionTrack:
-        if not tracks:
-            return VoiceTranscriptionTrack()
-        language_priority = language_priority or {}
+        """
+        Merges time-aligned tracks into the best-confidence one in a single forward pass.
 
-        best = VoiceTranscriptionTrack()
-
-        while tracks:
-            tracks = set(
-                filter(
-                    lambda track: track.result and (until is None or track.result[0].middle < until),
-                    tracks,
-                )
-            )
-
-            if not tracks:
+        The track whose next word ends last sets the window, the best merge of the other tracks within it competes
+        with that word as one alternative (average confidence). Each track is read through a cursor, so every word is
+        visited once per nesting level (at most the number of tracks) and the tracks themselves aren't modified.
+        """
+        language_priority = language_priority or {}
+        # equal word ends are resolved by language priority (lower index in recognizer list first)
+        cursors = sorted(
+            (_TrackCursor(track.result) for track in tracks if track.result),
+            key=lambda cursor: language_priority.get(cursor.words[0].language_code, 999),
+        )
+        words = self._merge_words(cursors, until, language_priority)
+        return VoiceTranscriptionTrack(text=" ".join(w.word for w in words), result=words)
+
+    def _merge_words(
+        self,
+        cursors: list[_TrackCursor],
+        until: float | None,
+        language_priority: dict[str, int],
+    ) -> list[VoiceTranscriptionWord]:
+        best: list[VoiceTranscriptionWord] = []
+
+        while True:
+            cursors = [
+                cursor
+                for cursor in cursors
+                if cursor.position < len(cursor.words)
+                and (until is None or cursor.words[cursor.position].middle < until)
+            ]
+            if not cursors:
                 break
 
-            longest = max(
-                tracks,
-                key=lambda track: track.result[0].end if until is None or track.result[0].middle < until else 0,
+            longest = max(cursors, key=lambda cursor: cursor.words[cursor.position].end)
+            base_word = longest.words[longest.position]
+            end = min(base_word.end, until) if until is not None else base_word.end
+            alternative_words = self._merge_words(
+                [cursor for cursor in cursors if cursor is not longest], end, language_priority
             )
-            end = min(longest.result[0].end, until) if until is not None else longest.result[0].end
-            other = self._build_best_confidence(tracks - {longest}, until=end, language_priority=language_priority)
-
-            base_word = longest.result.pop(0)
-            alternative_words = list(self._pop_words_until_time(other, end))
+            longest.position += 1
 
             if not alternative_words:
-                best.result.append(base_word)
+                best.append(base_word)
                 continue
 
             complex_alt = VoiceTranscriptionWord(
@@ -194,17 +299,10 @@ class SpeechRecognizerRelay(SpeechRecognizer):
                 # equal confidence: prefer the language with higher priority (lower index in recognizer list)
                 base_priority = language_priority.get(base_word.language_code, 999)
                 alt_priority = language_priority.get(complex_alt.language_code, 999)
-                best.result.append(base_word if base_priority <= alt_priority else complex_alt)
+                best.append(base_word if base_priority <= alt_priority else complex_alt)
             elif base_conf > alt_conf:
-                best.result.append(base_word)
+                best.append(base_word)
             else:
-                best.result.append(complex_alt)
+                best.append(complex_alt)
 
-        best.text = " ".join(w.word for w in best.result)
         return best
-
-    def _pop_words_until_time(
-        self, track: VoiceTranscriptionTrack, until: float
-    ) -> Generator[VoiceTranscriptionWord, None, None]:
-        while track.result and track.result[0].middle <= until:
-            yield track.result.pop(0)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Literal
+
+from stark.core.executors import ThreadPool
+from stark.general.channel import OverflowPolicy, ThreadChannel
+from stark.general.localisation import LanguageCode, LocaleString
+
+from .protocols import SpeechRecognizer, SpeechRecognizerDelegate
+
+
+@dataclass(frozen=True)
+class RecognitionResult:
+    kind: Literal["final", "partial", "empty"]
+    text: str | LocaleString = ""  # the final result is usually a VoiceTranscriptionString
+
+    @classmethod
+    def final(cls, text: str | LocaleString) -> RecognitionResult:
+        return cls("final", text)
+
+    @classmethod
+    def partial(cls, text: str) -> RecognitionResult:
+        return cls("partial", text)
+
+    @classmethod
+    def empty(cls) -> RecognitionResult:
+        return cls("empty")
+
+
+class ThreadedSpeechRecognizer(SpeechRecognizer, ABC):
+    """
+    Base of the recognizers that decode audio in a worker thread instead of the event loop.
+
+    Audio blocks wait in a bounded channel, `decode` runs for each of them in order in the recognizer's own
+    single-worker pool, so recognizers of different languages decode in parallel (native decoders release the GIL)
+    while commands keep running on the loop. The results are delivered to the delegate back on the loop. Subclasses
+    implement `decode`, which may keep decoder state: it's never called concurrently.
+    """
+
+    _delegate: SpeechRecognizerDelegate | None = None
+
+    audio_queue: ThreadChannel[bytes]
+    language_code: LanguageCode
+
+    last_result: str | None = ""
+    last_partial_result: str = ""
+    last_partial_update_time: datetime | None = None
+
+    is_recognizing = True
+    _is_listening = False
+
+    def __init__(
+        self,
+        language_code: LanguageCode = "base",
+        queue_size: int = 64,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+    ):
+        self.language_code = language_code
+        self.audio_queue = ThreadChannel(queue_size, overflow)
+        self._decoder = ThreadPool(f"{type(self).__name__}.{language_code}", max_workers=1)
+
+    @property
+    def delegate(self):
+        return self._delegate
+
+    @delegate.setter
+    def delegate(self, delegate: SpeechRecognizerDelegate | None):
+        assert delegate is None or isinstance(delegate, SpeechRecognizerDelegate)
+        self._delegate = delegate
+
+    @property
+    def dropped_frames(self) -> int:
+        """Audio blocks dropped because the recognizer fell `queue_size` blocks behind."""
+        return self.audio_queue.dropped
+
+    def microphone_did_receive_sample(self, data):
+        if self.is_recognizing:
+            self.audio_queue.put(data)
+
+    def stop_listening(self):
+        self._is_listening = False
+        self.audio_queue.clear()
+        self.audio_queue.wake()
+
+    async def start_listening(self):
+        if self._is_listening:
+            return
+
+        self.last_partial_result = ""
+        self.last_partial_update_time = None
+        self.will_start_listening()
+        self._is_listening = True
+
+        while self._is_listening:
+            await self.audio_queue.wait()
+            while self._is_listening and (data := self.audio_queue.get_nowait()) is not None:
+                if data:
+                    await self._transcribe(data)
+
+    def will_start_listening(self):
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> RecognitionResult | None:
+        """Decodes an audio block in the worker thread, None if there's nothing new."""
+
+    async def _transcribe(self, data: bytes):
+        if not self.delegate:
+            return
+        result = await self._decoder.run(self.decode, {"data": data})
+        if result is not None:
+            await self._deliver(result)
+
+    async def _deliver(self, result: RecognitionResult):
+        delegate = self.delegate
+        if not delegate:
+            return
+
+        match result.kind:
+            case "final":
+                self.last_partial_update_time = None
+                self.last_result = str(result.text)
+                await delegate.speech_recognizer_did_receive_final_result(result.text)
+            case "empty":
+                self.last_partial_update_time = None
+                self.last_result = None
+                await delegate.speech_recognizer_did_receive_empty_result()
+            case "partial":
+                text = str(result.text)
+                if text and text != self.last_partial_result:
+                    self.last_partial_result = text
+                    self.last_partial_update_time = datetime.now()  # noqa: DTZ005  # local wall-clock interval timing; naive is intentional
+                    await delegate.speech_recognizer_did_receive_partial_result(text)
@@ -4,21 +4,19 @@ import os
 import time
 import urllib.request
 import zipfile
-from datetime import datetime
-from queue import Empty, Queue
 from typing import ClassVar, cast
 
-import anyio
 import vosk
 from pydantic import BaseModel, Field, ValidationError
 
+from stark.general.channel import OverflowPolicy
 from stark.general.localisation import LanguageCode
 from stark.models.voice_transcription import (
     VoiceTranscriptionTrack,
     VoiceTranscriptionWord,
 )
 
-from .protocols import SpeechRecognizer, SpeechRecognizerDelegate
+from .threaded_recognizer import RecognitionResult, ThreadedSpeechRecognizer
 
 logger = logging.getLogger(__name__)
 
@@ -54,36 +52,26 @@ class KaldiResult(BaseModel):
     alternatives: list[KaldiTranscription]
 
 
-class VoskSpeechRecognizer(SpeechRecognizer):
-    _delegate: SpeechRecognizerDelegate | None = None
-
-    audio_queue: Queue
-
+class VoskSpeechRecognizer(ThreadedSpeechRecognizer):
     samplerate: int
     blocksize = 8000
     dtype = "int16"
     channels = 1
     kaldiRecognizer: vosk.KaldiRecognizer
 
-    last_result: str | None = ""
-    last_partial_result: str = ""
-    last_partial_update_time: datetime | None = None
-
-    is_recognizing = True
-    _is_listening = False
     _stream_start_monotonic: float = 0.0
 
     _stored_speakers: ClassVar[dict[int, list[int]]] = {}
     _speaker_trashold = 0.75
 
-    language_code: LanguageCode
-
     def __init__(
         self,
         model_url: str,
         language_code: LanguageCode = "base",
         speaker_model_url: str | None = None,
         samplerate: int = 16000,
+        queue_size: int = 64,
+        overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
     ):
         downloads = "downloads"
         model_path = downloads + "/" + model_url.split("/")[-1].replace(".zip", "")
@@ -111,8 +99,7 @@ class VoskSpeechRecognizer(SpeechRecognizer):
             os.remove(zip_path)
             logger.info("VOSK: Speaker model downloaded!")
 
-        self.language_code = language_code
-        self.audio_queue = Queue()
+        super().__init__(language_code, queue_size, overflow)
         self.samplerate = samplerate
         vosk_model = vosk.Model(model_path)
         speaker_model = vosk.SpkModel(speaker_model_path) if speaker_model_path else None
@@ -124,109 +111,65 @@ class VoskSpeechRecognizer(SpeechRecognizer):
         if speaker_model_url:
             self.kaldiRecognizer.SetSpkModel(speaker_model)
 
-    @property
-    def delegate(self):
-        return self._delegate
-
-    @delegate.setter
-    def delegate(self, delegate: SpeechRecognizerDelegate | None):
-        assert delegate is None or isinstance(delegate, SpeechRecognizerDelegate)
-        self._delegate = delegate
-
-    def microphone_did_receive_sample(self, data):
-        if self.is_recognizing:
-            self.audio_queue.put(data)
-
-    def stop_listening(self):
-        self._is_listening = False
-        self.audio_queue = Queue()
-
     def reset(self):
         self.kaldiRecognizer.Reset()
 
-    async def start_listening(self):
-        if self._is_listening:
-            return
-
-        self.last_partial_result = ""
-        self.last_partial_update_time = None
+    def will_start_listening(self):
         self._stream_start_monotonic = time.monotonic()
-        self._is_listening = True
 
-        while self._is_listening:
-            try:
-                if data := self.audio_queue.get(block=False):
-                    await self._transcribe(data)
-            except Empty:
-                pass
-            await anyio.sleep(0.01)
-
-    async def _transcribe(self, data):
-        delegate = self.delegate
-        if not delegate:
-            return
-
-        if self.kaldiRecognizer.AcceptWaveform(data):
-            self.last_partial_update_time = None
-            raw_json = self.kaldiRecognizer.Result()
-            text: str | None = None
+    def decode(self, data: bytes) -> RecognitionResult | None:
+        if not self.kaldiRecognizer.AcceptWaveform(data):
+            # partial always returns {"partial": "..."}
+            partial = json.loads(self.kaldiRecognizer.PartialResult()).get("partial")
+            return RecognitionResult.partial(partial) if partial else None
 
+        raw_json = self.kaldiRecognizer.Result()
+        text: str | None = None
+
+        try:
+            result = KaldiMBR.model_validate_json(raw_json)
+            text = result.text
+            # print('\nConfidence:', result.confidence) # TODO: log or  os.getenv("STARK_VOICE_CLI", "0") == "1"
+        except ValidationError:
             try:
-                result = KaldiMBR.model_validate_json(raw_json)
-                text = result.text
-                # print('\nConfidence:', result.confidence) # TODO: log or  os.getenv("STARK_VOICE_CLI", "0") == "1"
+                result = KaldiResult.model_validate_json(raw_json)
+                transcription = result.alternatives[0]
+                text = transcription.text
             except ValidationError:
-                try:
-                    result = KaldiResult.model_validate_json(raw_json)
-                    transcription = result.alternatives[0]
-                    text = transcription.text
-                except ValidationError:
-                    text = json.loads(raw_json).get("text")
-
-            if text:
-                self.last_result = text
-
-                # build VoiceTranscriptionTrack from Kaldi result
-                voice_words = []
-                spk = []
-                spk_frames = 0
-                if isinstance(result, KaldiMBR):
-                    t0 = self._stream_start_monotonic
-                    for kw in result.result:
-                        voice_words.append(
-                            VoiceTranscriptionWord(
-                                word=kw.word,
-                                language_code=self.language_code,
-                                char_start=0,
-                                char_end=len(kw.word),
-                                start=t0 + kw.start,
-                                end=t0 + kw.end,
-                                conf=kw.conf,
-                            )
-                        )
-                    spk = result.spk
-                    spk_frames = result.spk_frames
-
-                track = VoiceTranscriptionTrack(
-                    text=text,
-                    result=voice_words,
-                    spk=spk,
-                    spk_frames=spk_frames,
-                    language_code=self.language_code,
+                text = json.loads(raw_json).get("text")
+
+        if not text:
+            return RecognitionResult.empty()
+
+        # build VoiceTranscriptionTrack from Kaldi result
+        voice_words = []
+        spk = []
+        spk_frames = 0
+        if isinstance(result, KaldiMBR):
+            t0 = self._stream_start_monotonic
+            for kw in result.result:
+                voice_words.append(
+                    VoiceTranscriptionWord(
+                        word=kw.word,
+                        language_code=self.language_code,
+                        char_start=0,
+                        char_end=len(kw.word),
+                        start=t0 + kw.start,
+                        end=t0 + kw.end,
+                        conf=kw.conf,
+                    )
                 )
-                vts = track.to_voice_transcription_string()
-                await delegate.speech_recognizer_did_receive_final_result(vts)
-            else:
-                self.last_result = None
-                await delegate.speech_recognizer_did_receive_empty_result()
-
-        else:
-            result = json.loads(self.kaldiRecognizer.PartialResult())
-            # partial always returns {"partial": "..."}
-            if (string := result.get("partial")) and string != self.last_partial_result:
-                self.last_partial_result = string
-                self.last_partial_update_time = datetime.now()  # noqa: DTZ005  # local wall-clock interval timing; naive is intentional
-                await delegate.speech_recognizer_did_receive_partial_result(string)
+            spk = result.spk
+            spk_frames = result.spk_frames
+
+        track = VoiceTranscriptionTrack(
+            text=text,
+            result=voice_words,
+            spk=spk,
+            spk_frames=spk_frames,
+            language_code=self.language_code,
+        )
+        return RecognitionResult.final(track.to_voice_transcription_string())
 
     def _get_speaker(self, vector: list[int]) -> tuple[int, float]:
         # TODO: search Is not working good, need to improve the algorithm
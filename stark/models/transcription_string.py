@@ -100,6 +100,10 @@ class TranscriptionString(LocaleString):
     def alternative_texts(self) -> dict[str, LocaleString]:
         return self._alternative_texts
 
+    @property
+    def has_corrections(self) -> bool:
+        return bool(self.corrections) or any(self._corrections_by_track.values())
+
     # --- core overrides ---
 
     def _with(self, value: str) -> TranscriptionString:
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Generator
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, cast
-
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass, replace
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, cast
+
+import numpy as np
 from pydantic import BaseModel, Field
 
 from stark.general.localisation.language_code import LanguageCode
@@ -28,6 +32,100 @@ class VoiceTranscriptionWord(TranscriptionWord):
         return self.start + self.duration / 2
 
 
+@dataclass(frozen=True, eq=False)
+class VoiceTranscriptionColumns:
+    """
+    Columnar view of a track's words for the lookups by time and by character position.
+
+    Character positions are those of the words joined by single spaces, which is what the track's `text` normally is.
+    `words` holds the words with track-local char offsets (0, len(word)), as in a slice. Slicing the columns returns
+    views of the same arrays: nothing is copied, `char_base` shifts the positions instead.
+    """
+
+    words: np.ndarray  # object array of VoiceTranscriptionWord
+    start: np.ndarray
+    end: np.ndarray
+    middle: np.ndarray
+    char_start: np.ndarray
+    char_end: np.ndarray
+    char_base: int = 0
+    ordered: bool = True  # starts and ends don't decrease and no word ends before it starts, so bisection applies
+    text_aligned: bool = True  # the text is the words joined by single spaces, none of them empty
+
+    @classmethod
+    def from_words(cls, words: list[VoiceTranscriptionWord], text: str) -> VoiceTranscriptionColumns:
+        count = len(words)
+        table = np.empty(count, dtype=object)
+        table[:] = [
+            word
+            if word.char_start == 0 and word.char_end == len(word.word)
+            else replace(word, char_start=0, char_end=len(word.word))
+            for word in words
+        ]
+        start = np.fromiter((word.start for word in words), dtype=np.float64, count=count)
+        end = np.fromiter((word.end for word in words), dtype=np.float64, count=count)
+        lengths = np.fromiter((len(word.word) for word in words), dtype=np.int64, count=count)
+        char_end = np.cumsum(lengths + 1) - 1
+        char_start = char_end - lengths
+        middle = start + (end - start) / 2
+        for array in (table, start, end, middle, char_start, char_end):
+            array.flags.writeable = False
+        return cls(
+            words=table,
+            start=start,
+            end=end,
+            middle=middle,
+            char_start=char_start,
+            char_end=char_end,
+            ordered=bool(np.all(start[1:] >= start[:-1]) and np.all(end[1:] >= end[:-1]) and np.all(start <= end)),
+            text_aligned=bool(np.all(lengths > 0)) and text == " ".join(word.word for word in words),
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __deepcopy__(self, memo: dict) -> VoiceTranscriptionColumns:
+        return self  # immutable: read-only arrays of frozen words
+
+    def __getitem__(self, key: slice) -> VoiceTranscriptionColumns:
+        words = self.words[key]
+        char_start = self.char_start[key]
+        return VoiceTranscriptionColumns(
+            words=words,
+            start=self.start[key],
+            end=self.end[key],
+            middle=self.middle[key],
+            char_start=char_start,
+            char_end=self.char_end[key],
+            char_base=int(char_start[0]) if len(words) else 0,
+            ordered=self.ordered,
+            text_aligned=self.text_aligned,
+        )
+
+    def word_at_position(self, position: int) -> int:
+        """Index of the first word that ends at or after the position, `len(self)` if there's none."""
+        return int(np.searchsorted(self.char_end, position + self.char_base, side="left"))
+
+    def word_at_time(self, time: float) -> int:
+        """Index of the first word that contains the time or starts after it, `len(self)` if there's none."""
+        if self.ordered:
+            return int(np.searchsorted(self.end, time, side="left"))
+        found = np.flatnonzero((self.start > time) | (self.end >= time))
+        return int(found[0]) if len(found) else len(self)
+
+    def words_between(self, start: float, end: float) -> VoiceTranscriptionColumns:
+        """The words from the first one with the middle after `start` up to the first one with the middle at `end`."""
+        if self.ordered:
+            first = int(np.searchsorted(self.middle, start, side="right"))
+            last = int(np.searchsorted(self.middle, end, side="left"))
+            return self[first : max(first, last)]
+        skipped = self.middle <= start
+        stops = np.flatnonzero(~skipped & (self.middle >= end))
+        stop = int(stops[0]) if len(stops) else len(self)
+        included = np.flatnonzero(~skipped[:stop])
+        return VoiceTranscriptionColumns.from_words(list(self.words[included]), "")
+
+
 class VoiceTranscriptionTrack(BaseModel):
     text: str = ""
     result: list[VoiceTranscriptionWord] = Field(default_factory=list)
@@ -35,6 +133,19 @@ class VoiceTranscriptionTrack(BaseModel):
     spk_frames: int = 0
     language_code: LanguageCode = "base"
 
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in ("text", "result"):
+            self.__dict__.pop("columns", None)
+
+    @cached_property
+    def columns(self) -> VoiceTranscriptionColumns:
+        """
+        Columnar index of the words, built on first use. Assigning `text` or `result` (or `replace`) resets it, other
+        in-place changes of `result` must be followed by an assignment.
+        """
+        return VoiceTranscriptionColumns.from_words(self.result, self.text)
+
     @property
     def confidence(self):
         return sum(word.conf or 0 for word in self.result) / len(self.result) if self.result else 0
@@ -90,41 +201,25 @@ class VoiceTranscriptionTrack(BaseModel):
         if new_words:
             self.result.extend(new_words)
 
-        self.text = " ".join(word.word for word in self.result)
+        self.text = " ".join(word.word for word in self.result)  # also resets the columns
 
     def get_slice(self, start: float, end: float) -> VoiceTranscriptionTrack:
         # word timestamps are preserved as-is (absolute), not rebased to zero; translate_position relies on this
+        columns = self.columns.words_between(start, end)
+        words: list[VoiceTranscriptionWord] = columns.words.tolist()
+        text = " ".join(word.word for word in words)
         new_track = VoiceTranscriptionTrack(
-            text="",
-            result=[],
+            text=text,
+            result=words,
             spk=self.spk,
             spk_frames=self.spk_frames,
             language_code=self.language_code,
         )
-
-        for word in self.result:
-            if word.middle <= start:
-                continue
-            if word.middle >= end:
-                break
-            new_track.result.append(
-                VoiceTranscriptionWord(
-                    word=word.word,
-                    language_code=word.language_code,
-                    char_start=0,
-                    char_end=len(word.word),
-                    start=word.start,
-                    end=word.end,
-                    conf=word.conf,
-                )
-            )
-
-        new_track.text = " ".join(word.word for word in new_track.result)
-        if new_track.result:
-            from collections import Counter
-
-            counts = Counter(w.language_code for w in new_track.result)
+        if words:
+            counts = Counter(w.language_code for w in words)
             new_track.language_code = counts.most_common(1)[0][0]
+            if columns.text_aligned:
+                new_track.__dict__["columns"] = columns  # views of this track's arrays
         return new_track
 
     def get_time(
@@ -134,24 +229,19 @@ class VoiceTranscriptionTrack(BaseModel):
             return
 
         start_time: float | None = None
-        current_index = 0
-        remaining = substring[:].strip()
-
-        for word in self.result:
-            current_index = self.text.index(word.word, current_index)
+        stripped = substring.strip()
+        remaining = stripped
 
-            if current_index < from_index:
-                current_index += len(word.word)
+        for position, word in self._text_positions(from_index, to_index):
+            if position < from_index:
                 continue
 
-            if to_index and current_index >= to_index:
+            if to_index and position >= to_index:
                 break
 
-            current_index += len(word.word)
-
             if substring in word.word:
                 yield word.start, word.end
-                remaining = substring[:].strip()
+                remaining = stripped
                 start_time = None
 
             elif remaining.startswith(word.word):
@@ -159,54 +249,65 @@ class VoiceTranscriptionTrack(BaseModel):
                     start_time = word.start
                 remaining = remaining[len(word.word) :].strip()
             else:
-                remaining = substring[:].strip()
+                remaining = stripped
                 start_time = None
 
             if not remaining and start_time is not None:
                 yield start_time, word.end
-                remaining = substring[:].strip()
+                remaining = stripped
 
     def position_to_time(self, position: int) -> float | None:
         if position < 0 or position > len(self.text) or not self.result:
             return None
-        offset = 0
-        prev_end_time: float | None = None
-        for w in self.result:
-            word_start = offset
-            word_end = offset + len(w.word)
-            if position < word_start:
-                # position is on the space between prev word and this one
-                if prev_end_time is not None:  # get the point between prev and current word
-                    return (prev_end_time + w.start) / 2
-                # if no prev word, this is the first word, return its start time
-                return w.start
-            if word_start <= position <= word_end:
-                # return timestamp in the word's range proportional to in-word char position
-                frac = (position - word_start) / max(len(w.word), 1)
-                return w.start + frac * (w.end - w.start)
-            # update offsets
-            prev_end_time = w.end
-            offset = word_end + 1
-        return None
+        columns = self.columns
+        i = columns.word_at_position(position)
+        if i == len(columns):
+            return None
+        w = columns.words[i]
+        word_start = int(columns.char_start[i]) - columns.char_base
+        if position < word_start:
+            # position is on the space between prev word and this one
+            if i > 0:  # get the point between prev and current word
+                return (columns.words[i - 1].end + w.start) / 2
+            # if no prev word, this is the first word, return its start time
+            return w.start
+        # return timestamp in the word's range proportional to in-word char position
+        frac = (position - word_start) / max(len(w.word), 1)
+        return w.start + frac * (w.end - w.start)
 
     def time_to_position(self, time: float) -> int | None:
         if not self.result or time < 0 or time > self.result[-1].end:
             return None
-        offset = 0
-        for i, w in enumerate(self.result):
-            word_start = offset
-            if w.start <= time <= w.end:
-                frac = (time - w.start) / max(w.end - w.start, 0.001)
-                return int(word_start + frac * len(w.word))
-            if w.start > time:
-                # time falls in the gap before this word
-                if i > 0:
-                    return offset - 1  # the space char
-                return word_start
-            offset = word_start + len(w.word) + 1
-        # raise ValueError("Position not found")
-        # return len(self.text)
-        return None
+        columns = self.columns
+        i = columns.word_at_time(time)
+        if i == len(columns):
+            return None
+        w = columns.words[i]
+        word_start = int(columns.char_start[i]) - columns.char_base
+        if w.start <= time <= w.end:
+            frac = (time - w.start) / max(w.end - w.start, 0.001)
+            return int(word_start + frac * len(w.word))
+        # time falls in the gap before this word
+        if i > 0:
+            return word_start - 1  # the space char
+        return word_start
+
+    def _text_positions(self, from_index: int, to_index: int | None) -> Iterable[tuple[int, VoiceTranscriptionWord]]:
+        """Words with their positions in `text`, the columns narrow them down to the range if the text is aligned."""
+        columns = self.columns
+        if columns.text_aligned:
+            positions = columns.char_start - columns.char_base
+            first = int(np.searchsorted(positions, from_index, side="left"))
+            last = int(np.searchsorted(positions, to_index, side="left")) if to_index else len(columns)
+            return zip(positions[first:last].tolist(), columns.words[first:last], strict=True)
+        return self._scan_text_positions()
+
+    def _scan_text_positions(self) -> Generator[tuple[int, VoiceTranscriptionWord], None, None]:
+        current_index = 0
+        for word in self.result:
+            current_index = self.text.index(word.word, current_index)
+            yield current_index, word
+            current_index += len(word.word)
 
     def to_voice_transcription_string(self) -> VoiceTranscriptionString:
         from stark.models.voice_transcription_string import VoiceTranscriptionString
@@ -254,17 +355,18 @@ class Transcription(BaseModel):
 
         best = self.best
         # build per-word language codes from whichever origin provided each word
+        origin_words = {
+            origin_lang: _WordIndex(origin_track.result) for origin_lang, origin_track in self.origins.items()
+        }
         offset = 0
         voice_words: list[VoiceTranscriptionWord] = []
         for w in best.result:
             lang = w.language_code or best.language_code
             # find which origin had the highest confidence for this word's time
-            for origin_lang, origin_track in self.origins.items():
-                for ow in origin_track.result:
-                    if ow.word == w.word and abs(ow.start - w.start) < 0.1:
-                        if (ow.conf or 0) >= (w.conf or 0):
-                            lang = cast(LanguageCode, origin_lang)
-                        break
+            for origin_lang, index in origin_words.items():
+                ow = index.find(w.word, w.start)
+                if ow and (ow.conf or 0) >= (w.conf or 0):
+                    lang = cast(LanguageCode, origin_lang)
             voice_words.append(
                 VoiceTranscriptionWord(
                     word=w.word,
@@ -291,3 +393,30 @@ class Transcription(BaseModel):
             track=best,
             alternative_tracks=dict(self.origins),
         )
+
+
+class _WordIndex:
+    """Finds the first word of a track with the given text that starts within `tolerance` of a time."""
+
+    tolerance = 0.1
+
+    def __init__(self, words: list[VoiceTranscriptionWord]):
+        self._starts: dict[str, list[float]] = {}
+        self._words: dict[str, list[tuple[int, VoiceTranscriptionWord]]] = {}
+        for position, word in sorted(enumerate(words), key=lambda item: item[1].start):
+            self._starts.setdefault(word.word, []).append(word.start)
+            self._words.setdefault(word.word, []).append((position, word))
+
+    def find(self, text: str, start: float) -> VoiceTranscriptionWord | None:
+        starts = self._starts.get(text)
+        if not starts:
+            return None
+        words = self._words[text]
+        found: tuple[int, VoiceTranscriptionWord] | None = None
+        # the window is wider than the tolerance, the exact comparison decides
+        for i in range(bisect_left(starts, start - 2 * self.tolerance), len(starts)):
+            if starts[i] > start + 2 * self.tolerance:
+                break
+            if abs(starts[i] - start) < self.tolerance and (found is None or words[i][0] < found[0]):
+                found = words[i]
+        return found[1] if found else None
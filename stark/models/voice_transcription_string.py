@@ -127,10 +127,10 @@ class VoiceTranscriptionString(TranscriptionString):
     def _slice_track_for(self, value: str) -> VoiceTranscriptionTrack | None:
         if not self._track or not value:
             return None
-        times = list(self._track.get_time(value))
+        times = next(self._track.get_time(value), None)
         if not times:
             return None
-        start, end = times[0]
+        start, end = times
         return self._track.get_slice(start, end)
 
     def __repr__(self) -> str:
@@ -0,0 +1,71 @@
+from collections import deque
+from collections.abc import Iterable
+
+
+class AhoCorasick:
+    """
+    Multi-string matcher: finds which of the registered keywords occur in a text in a single pass over the text.
+
+    Cost of `search` is O(len(text) + number of reported keywords) regardless of the amount of keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+        self._keywords: set[str] = set()
+        self._built = True
+        for keyword in keywords:
+            self.add(keyword)
+
+    def add(self, keyword: str):
+        assert keyword, "Empty keywords match everywhere and are not supported"
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if keyword not in self._output[state]:
+            self._output[state].append(keyword)
+        self._keywords.add(keyword)
+        self._built = False
+
+    def search(self, text: str) -> set[str]:
+        if not self._built:
+            self._build()
+        found: set[str] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def _build(self):
+        # breadth-first failure links; outputs of the failure state are merged so search needs no suffix walk
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = list(
+                    dict.fromkeys(self._output[next_state] + self._output[self._fail[next_state]])
+                )
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._keywords)
@@ -1,6 +1,7 @@
 import asyncio
 from collections.abc import Awaitable, Callable
 
+from stark.core.deadline import is_expired
 from stark.core.parsing import ParseError
 from stark.tools.common.span import Span
 
@@ -109,9 +110,14 @@ async def sliding_window_parse[T](
 
     # Slide a window of decreasing size over the tokens, left to right.
     # Try parsing for each window. Once successful, trim to minimal window.
+    # Stop sliding when the parsing deadline expires, keeping the windows found so far.
     results: list[tuple[Span, str, T]] = []
     for window_size in range(min(max_window, n), min_window - 1, -1):
+        if is_expired():
+            break
         for start in range(n - window_size + 1):
+            if is_expired():
+                break
             end = start + window_size
             try:
                 res = await try_window(start, end)
@@ -0,0 +1,251 @@
+import random
+import time
+import tracemalloc
+
+import anyio
+import asyncer
+import pytest
+
+from stark.core import CommandsContext, CommandsManager, Pattern, Response
+from stark.core.parsing import PatternParser
+from stark.core.processors import SearchProcessor
+from stark.core.types import NLObject, any_subclass
+from stark.core.types.slots import SlotsParser
+from stark.general.classproperty import classproperty
+from stark.general.dependencies import DependencyManager
+from stark.general.localisation import LocaleString
+from stark.models.transcription_string import TranscriptionString
+
+# Synthetic grammar types
+
+COLORS = ["red", "green", "blue", "warm white"]
+ROOMS = ["kitchen", "bedroom", "living room", "garage"]
+VERBS = ["turn on", "turn off", "open", "close", "start", "stop", "check", "toggle", "play", "show"]
+
+
+class Color(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern(f"({'|'.join(COLORS)})")
+
+
+class Room(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern(f"({'|'.join(ROOMS)})")
+
+
+class Lamp(NLObject):
+    color: Color
+    room: Room
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$color:Color lamp in the $room:Room")
+
+    async def did_parse(self, from_string: str) -> str:
+        self.value = f"{self.color.value}@{self.room.value}"
+        return from_string
+
+
+class Device(NLObject):
+    pass
+
+
+class Kettle(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(kettle|teapot)")
+
+
+class Heater(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(heater|radiator)")
+
+
+class Speaker(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$room:Room speaker")
+
+    async def did_parse(self, from_string: str) -> str:
+        self.value = f"speaker@{self.room.value}"
+        return from_string
+
+
+AnyDevice = any_subclass(Device)
+
+
+class Hours(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(one|two|three) hours")
+
+
+class Minutes(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(ten|twenty|thirty) minutes")
+
+
+class TimerSlots(NLObject):
+    hours: Hours
+    minutes: Minutes | None
+
+
+# Synthetic catalogs and utterances
+
+GRAMMARS = {  # parameters part of the command pattern and a generator of its matching text
+    "plain": ("in the $room:Room", lambda rng: f"in the {rng.choice(ROOMS)}"),
+    "nested": ("$lamp:Lamp", lambda rng: f"{rng.choice(COLORS)} lamp in the {rng.choice(ROOMS)}"),
+    "unions": (
+        "$device:AnyDevice",
+        lambda rng: rng.choice(["kettle", "teapot", "heater", "radiator", f"{rng.choice(ROOMS)} speaker"]),
+    ),
+    "slots": (
+        "timer $timer:TimerSlots",
+        lambda rng: f"timer {rng.choice(['ten', 'twenty', 'thirty'])} minutes {rng.choice(['one', 'two'])} hours",
+    ),
+}
+
+
+def make_nouns(count: int, rng: random.Random) -> list[str]:
+    nouns: set[str] = set()
+    while len(nouns) < count:
+        nouns.add("".join(rng.choice("bdfgklmnprstvz") + rng.choice("aeiou") for _ in range(3)))
+    return sorted(nouns)
+
+
+def make_catalog(grammar: str, size: int, rng: random.Random) -> tuple[CommandsManager, list[str]]:
+    parameters, _ = GRAMMARS[grammar]
+    nouns = make_nouns(size // len(VERBS) + 1, rng)
+    manager = CommandsManager()
+    prefixes = []
+
+    for i in range(size):
+        prefix = f"{VERBS[i % len(VERBS)]} {nouns[i // len(VERBS)]}"
+
+        async def runner(**params) -> Response:
+            return Response("ok")
+
+        runner.__name__ = f"command_{i}"
+        manager.new(f"{prefix} {parameters}")(runner)
+        prefixes.append(prefix)
+
+    return manager, prefixes
+
+
+def make_pattern_parser() -> PatternParser:
+    pattern_parser = PatternParser()
+    for object_type in (Color, Room, Lamp, AnyDevice, Hours, Minutes):
+        pattern_parser.register_parameter_type(object_type)
+    pattern_parser.register_parameter_type(TimerSlots, parser=SlotsParser(pattern_parser))
+    return pattern_parser
+
+
+def make_utterances(
+    grammar: str, prefixes: list[str], multilang: bool, count: int, rng: random.Random
+) -> list[LocaleString]:
+    _, make_parameters = GRAMMARS[grammar]
+    utterances: list[LocaleString] = []
+
+    for i in range(count):
+        if i % 5 == 4:  # every fifth utterance doesn't match any command
+            text = " ".join(make_nouns(6, rng))
+        else:
+            text = f"please {rng.choice(prefixes)} {make_parameters(rng)} now"
+
+        if multilang:
+            # the alternative track is another transcription guess of the same audio
+            alternative = LocaleString(f"please {rng.choice(prefixes)} {make_parameters(rng)}", "uk")
+            utterances.append(TranscriptionString(text, "en", alternative_texts={"uk": alternative}))
+        else:
+            utterances.append(LocaleString(text, "en"))
+
+    return utterances
+
+
+def process_utterances(
+    manager: CommandsManager,
+    pattern_parser: PatternParser,
+    utterances: list[LocaleString],
+    search_processor: SearchProcessor,
+) -> tuple[list[float], int]:
+    """Runs the utterances through a fresh CommandsContext, returns the latency of each one and the matched count."""
+
+    async def process_all() -> tuple[list[float], int]:
+        latencies: list[float] = []
+        matched = 0
+        async with asyncer.create_task_group() as task_group:
+            context = CommandsContext(task_group, manager, DependencyManager(), processors=[search_processor])
+            context.pattern_parser = pattern_parser
+            for utterance in utterances:
+                start = time.perf_counter()
+                if await context.process_string(utterance):
+                    matched += 1
+                latencies.append(time.perf_counter() - start)
+            task_group.cancel_scope.cancel()  # don't wait for the spawned commands
+        return latencies, matched
+
+    return anyio.run(process_all)
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    index = min(len(sorted_values) - 1, round(percent / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+# Benchmark
+# Store results with `--benchmark --benchmark-json=<file>.json`, compare the files in tests/test_tools/benchmark_viewer.html
+
+
+@pytest.mark.timeout(60.0 * 10)
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+@pytest.mark.parametrize("input_kind", ["locale", "multilang"])
+@pytest.mark.parametrize("grammar", list(GRAMMARS))
+@pytest.mark.parametrize(
+    ("catalog_size", "search"),
+    [
+        *((size, "scan") for size in (10, 100, 1_000)),  # every command is matched, too slow for 10k
+        *((size, "anchor") for size in (10, 100, 1_000, 10_000)),
+    ],
+)
+def test_benchmark__commands(catalog_size: int, search: str, grammar: str, input_kind: str, benchmark):
+    rng = random.Random(f"{catalog_size}-{grammar}-{input_kind}")  # the same synthetic data on every run
+    manager, prefixes = make_catalog(grammar, catalog_size, rng)
+    pattern_parser = make_pattern_parser()
+    utterances = make_utterances(grammar, prefixes, input_kind == "multilang", 10, rng)
+    search_processor = SearchProcessor(anchor_prefilter=search == "anchor")
+
+    # warm up the caches and record the peak memory of a round
+
+    tracemalloc.start()
+    _, matched = process_utterances(manager, pattern_parser, utterances, search_processor)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert matched >= len(utterances) * 4 // 5
+
+    latencies: list[float] = []
+
+    def run():
+        round_latencies, _ = process_utterances(manager, pattern_parser, utterances, search_processor)
+        latencies.extend(round_latencies)
+
+    benchmark(run)
+
+    latencies.sort()
+    benchmark.extra_info.update(
+        {
+            "commands": catalog_size,
+            "search": search,
+            "utterances_per_round": len(utterances),
+            "throughput_per_s": len(latencies) / sum(latencies),
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "peak_memory_kib": peak_memory // 1024,
+        }
+    )
@@ -1,7 +1,10 @@
+import inspect
+
 import anyio
 
-from stark.core import Response
+from stark.core import Command, Pattern, Response, ResponseHandler
 from stark.core.types import NLWord
+from stark.general.localisation.language_code import LanguageCode
 
 
 async def test_command_flow_optional_parameter(commands_context_flow, autojump_clock):
@@ -20,3 +23,31 @@ async def test_command_flow_optional_parameter(commands_context_flow, autojump_c
         await anyio.sleep(5)
         assert len(context_delegate.responses) == 2
         assert context_delegate.responses[1].text == "Lorem!ipsum"
+
+
+def test_invocation_plan():
+    def runner(name: NLWord, lang: LanguageCode, handler: ResponseHandler, note: NLWord | None = None):
+        return Response("ok")
+
+    command = Command("greet", {"base": Pattern("hello $name:NLWord"), "uk": Pattern("pryvit $note:NLWord")}, runner)
+    plan = command.plan
+
+    assert inspect.iscoroutinefunction(plan.runner)  # sync runner wrapped once
+    assert not plan.accepts_kwargs
+    assert plan.parameter_names == {"name", "lang", "handler", "note"}
+    assert plan.optional == ("note",)
+    assert plan.pattern_parameters == {"name", "note"}
+    assert plan.dependencies == (("lang", LanguageCode), ("handler", ResponseHandler))
+
+
+async def test_command_run_filters_parameters():
+    received = {}
+
+    async def runner(name: NLWord, note: NLWord | None):
+        unused = "locals are not parameters"
+        received.update(name=name, note=note)
+        return Response(unused)
+
+    command = Command("greet", {"base": Pattern("hello $name:NLWord")}, runner)
+    await command.run({"name": "John", "unused": "ignored", "extra": 1})
+    assert received == {"name": "John", "note": None}
@@ -52,3 +52,68 @@ async def test_language_code_injected_any_parameter_name(commands_context_flow,
 
         assert len(context_delegate.responses) == 1
         assert context_delegate.responses[0].text == "language=fr"
+
+
+async def test_language_code_override_leaves_shared_dependencies(commands_context_flow, autojump_clock):
+    from stark.general.localisation import LocaleString
+
+    async with commands_context_flow() as (manager, context, context_delegate):
+
+        @manager.new({"en": "hello", "uk": "pryvit"})
+        async def hello(lang: LanguageCode) -> Response:
+            return Response(f"lang={lang}")
+
+        dependencies = set(context.dependency_manager.dependencies)
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(context.process_string, LocaleString("hello", "en"))
+            task_group.start_soon(context.process_string, LocaleString("pryvit", "uk"))
+        await anyio.sleep(1)
+
+        assert sorted(response.text for response in context_delegate.responses) == ["lang=en", "lang=uk"]
+        assert set(context.dependency_manager.dependencies) == dependencies
+        assert context.dependency_manager.find(None, LanguageCode) is None
+
+
+def test_dependency_manager_lookup():
+    from stark.general.dependencies import Dependency, DependencyManager
+
+    class Service:
+        pass
+
+    dependencies = DependencyManager()
+    default, special = Service(), Service()
+    dependencies.add_dependency(None, Service, default)
+    dependencies.add_dependency("special", Service, special)
+    dependencies.add_dependency(None, Service, Service())  # the first registration wins
+
+    def runner(service: Service, special: Service, other: Service | None, plain):
+        pass
+
+    assert dependencies.resolve(runner) == {"service": default, "special": special}
+
+    override = Service()
+    assert dependencies.resolve(runner, [Dependency(None, Service, override)]) == {
+        "service": override,
+        "special": special,
+    }
+    assert dependencies.find("service", Service).value is default
+
+
+def test_dependency_manager_dependencies_are_mutable():
+    from stark.general.dependencies import Dependency, DependencyManager
+
+    class Service:
+        pass
+
+    dependencies = DependencyManager()
+    service = Dependency("service", Service, Service())
+    dependencies.dependencies.add(service)
+    assert service in dependencies.dependencies
+    assert dependencies.find("service", Service) is service
+
+    dependencies.dependencies.discard(service)
+    assert service not in dependencies.dependencies
+    assert dependencies.find("service", Service) is None
+
+    dependencies.dependencies = {service}
+    assert set(dependencies.dependencies) == {service}
@@ -6,7 +6,7 @@ import pytest
 from stark.core import CommandsManager, Pattern, Response
 from stark.core.parsing import PatternParser
 from stark.core.processors.search_processor import SearchProcessor
-from stark.core.types import NLObject
+from stark.core.types import NLObject, NLString
 from stark.general.classproperty import classproperty
 
 pattern_parser = PatternParser()
@@ -149,6 +149,59 @@ async def test_overlapping_commands_remove_inverse(commands_context_flow, autoju
     assert result[0].command == night_light
 
 
+async def test_overlapping_commands_cut_reuses_parsed_parameters(commands_context_flow, autojump_clock):
+    parsed: list[str] = []
+
+    class CountedRoom(NLObject):
+        @classproperty
+        def pattern(cls):
+            return Pattern("(kitchen|bedroom)")
+
+        async def did_parse(self, from_string: str) -> str:
+            parsed.append(from_string)
+            self.value = from_string
+            return from_string
+
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(CountedRoom)
+    manager = CommandsManager()
+
+    @manager.new("$room:CountedRoom lamp *")
+    async def lamp(room: CountedRoom):
+        return Response("Lamp!")
+
+    @manager.new("test alarm")
+    async def alarm():
+        return Response("Alarm set!")
+
+    result = await SearchProcessor().search("kitchen lamp test alarm", pattern_parser, manager.commands, [])
+
+    assert [r.command for r in result] == [lamp, alarm]
+    assert result[0].match_result.substring == "kitchen lamp"
+    assert result[0].match_result.parameters["room"].value == "kitchen"
+    assert result[0].match_result.parameter_spans == {"room": (0, 7)}
+    assert (result[1].match_result.start, result[1].match_result.end) == (13, 23)
+    assert parsed == ["kitchen"]  # the cut kept the parameter span, so it wasn't parsed again
+
+
+async def test_overlapping_commands_cut_reparses_cut_parameters(commands_context_flow, autojump_clock):
+    manager = CommandsManager()
+
+    @manager.new("say $text:NLString")
+    async def say(text: NLString):
+        return Response(text.value)
+
+    @manager.new("test alarm")
+    async def alarm():
+        return Response("Alarm set!")
+
+    result = await SearchProcessor().search("say hello test alarm", pattern_parser, manager.commands, [])
+
+    assert [r.command for r in result] == [say, alarm]
+    assert result[0].match_result.parameters["text"].value == "hello"
+    assert result[0].match_result.parameter_spans == {"text": (4, 9)}
+
+
 @pytest.mark.skip(
     reason="Cache is deprecated and not working properly anymore because of new concurrent algorithm; need new async lru cache implementation"
 )
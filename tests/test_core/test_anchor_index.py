@@ -0,0 +1,166 @@
+import pytest
+
+from stark.core import CommandsManager, Response
+from stark.core.anchor_index import CommandList, CommandsAnchorIndex, required_anchors, required_literals
+from stark.core.parsing import PatternParser
+from stark.core.processors.search_processor import SearchProcessor
+from stark.core.types import NLWord
+from stark.tools.aho_corasick import AhoCorasick
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("turn on the light", ["turn on the light"]),
+        (r"turn (?:on|off) the [A-z]*light", ["turn o", " the ", "light"]),  # common branch prefix is factored out
+        (r"set (?P<name>[A-z]+) timer", ["set ", " timer"]),
+        (r"(?:foo)? bar", [" bar"]),
+        (r"(?:(?:foo)\s?)+bar", ["foo", "bar"]),
+        (r"(?i)hello", []),
+        (r"[A-z]+", []),
+    ],
+)
+def test_required_literals(source, expected):
+    assert required_literals(source) == expected
+
+
+def test_required_anchors_alternatives():
+    assert required_anchors(r"play (?:song|track) now") == [("play ",), ("song", "track"), (" now",)]
+    assert required_anchors(r"play (?:song|[0-9]+) now") == [("play ",), (" now",)]
+
+
+def test_aho_corasick():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert automaton.search("ushers") == {"he", "she", "hers"}
+    assert automaton.search("nothing") == set()
+    automaton.add("not")
+    assert automaton.search("nothing") == {"not"}
+    assert len(automaton) == 5
+
+
+def make_manager() -> CommandsManager:
+    manager = CommandsManager()
+
+    @manager.new("turn on the light")
+    async def lights_on():
+        return Response("on")
+
+    @manager.new("turn off the light")
+    async def lights_off():
+        return Response("off")
+
+    @manager.new("hello $name:NLWord")
+    async def hello(name: NLWord):
+        return Response(f"hi {name}")
+
+    @manager.new("*")
+    async def anything():
+        return Response("anything")
+
+    return manager
+
+
+async def test_anchor_candidates():
+    manager = make_manager()
+    pattern_parser = PatternParser()
+    index = manager.anchor_index
+
+    names = [c.name for c in index.candidates("please turn on the lights", "base", pattern_parser, manager.commands)]
+    assert names == ["CommandsManager.lights_on", "CommandsManager.anything"]
+
+    names = [c.name for c in index.candidates("hello John", "base", pattern_parser, manager.commands)]
+    assert names == ["CommandsManager.hello", "CommandsManager.anything"]
+
+
+async def test_anchor_index_updates():
+    manager = make_manager()
+    pattern_parser = PatternParser()
+    index = manager.anchor_index
+    assert len(index.candidates("open the door", "base", pattern_parser, manager.commands)) == 1
+
+    @manager.new("open the door")
+    async def open_door():
+        return Response("opened")
+
+    child = CommandsManager("Child")
+
+    @child.new("close the door")
+    async def close_door():
+        return Response("closed")
+
+    @child.new("close the window", hidden=True)
+    async def close_window():
+        return Response("closed")
+
+    manager.extend(child)
+
+    assert open_door in index.candidates("open the door", "base", pattern_parser, manager.commands)
+    assert close_door in index.candidates("close the door", "base", pattern_parser, manager.commands)
+
+    # commands that aren't indexed (e.g. hidden context commands) are always candidates
+    layer = [close_window, open_door]
+    assert index.candidates("close the window", "base", pattern_parser, layer) == [close_window]
+
+    # replacing a command in place, bypassing the manager, is noticed too
+    other = CommandsManager("Other")
+
+    @other.new("lock the door")
+    async def lock_door():
+        return Response("locked")
+
+    manager.commands[manager.commands.index(open_door)] = lock_door
+    assert lock_door in index.candidates("lock the door", "base", pattern_parser, manager.commands)
+    assert open_door not in index.candidates("open the door", "base", pattern_parser, manager.commands)
+
+
+@pytest.mark.parametrize("make_list", [CommandList, list])
+async def test_anchor_index_notices_direct_changes(make_list):
+    pattern_parser = PatternParser()
+    lights_on, lights_off, hello, anything = make_manager().commands
+    commands = make_list([lights_on, lights_off, anything])
+    index = CommandsAnchorIndex(commands)
+
+    def names(string: str) -> list[str]:
+        return [c.name for c in index.candidates(string, "base", pattern_parser, commands)]
+
+    assert names("hello John") == ["CommandsManager.anything"]
+    commands[1] = hello
+    assert names("hello John") == ["CommandsManager.hello", "CommandsManager.anything"]
+    commands.reverse()
+    assert names("hello John") == ["CommandsManager.anything", "CommandsManager.hello"]
+    commands.pop()
+    commands.append(lights_off)
+    assert names("turn off the light") == ["CommandsManager.anything", "CommandsManager.lights_off"]
+
+
+def test_command_list_counts_changes_in_place():
+    lights_on, lights_off, hello, anything = make_manager().commands
+    commands = CommandList([lights_on])
+    commands.append(lights_off)
+    commands.extend([hello])
+    assert commands.version == 0  # appending is noticed by the length
+
+    commands[0] = anything
+    commands.insert(0, lights_on)
+    commands.remove(hello)
+    del commands[0]
+    commands.sort(key=lambda command: command.name)
+    assert commands.version == 5
+
+
+@pytest.mark.parametrize(
+    "string",
+    ["turn on the light", "turn off the light and hello John", "hello", "nothing"],
+)
+async def test_anchor_prefilter_equivalence(string):
+    manager = make_manager()
+    pattern_parser = PatternParser()
+
+    plain = await SearchProcessor().search(string, pattern_parser, manager.commands, [])
+    prefiltered = await SearchProcessor(anchor_prefilter=True).search(
+        string, pattern_parser, manager.commands, [], manager.anchor_index
+    )
+
+    assert [(r.command, r.match_result.substring, r.index) for r in prefiltered] == [
+        (r.command, r.match_result.substring, r.index) for r in plain
+    ]
@@ -0,0 +1,225 @@
+import random
+import time
+
+import anyio
+import pytest
+
+from stark.core import Command, Pattern, Response
+from stark.core.batch import BatchGrammar, search_in_processes
+from stark.core.parsing import PatternParser
+from stark.core.processors import SearchProcessor
+from stark.core.processors.search_processor import batch_results_cache
+from stark.core.types import NLObject
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString
+
+ROOMS = ["kitchen", "bedroom", "garage"]
+runs: list[str] = []
+
+
+class BatchRoom(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern(f"({'|'.join(ROOMS)})")
+
+
+def make_grammar(amount: int = 30) -> BatchGrammar:
+    async def runner(**params):
+        runs.append("run")
+        return Response("ok")
+
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(BatchRoom)
+    commands = [
+        Command(f"lamp{i}", {"base": Pattern(f"turn on lamp{i} in the $room:BatchRoom")}, runner) for i in range(amount)
+    ]
+    commands.append(Command("say", {"base": Pattern("say $text:NLString")}, runner))
+    return BatchGrammar(pattern_parser, commands)
+
+
+def make_corpus(count: int, amount: int = 30, distinct: bool = False) -> list[str]:
+    """Mostly repeated utterances, like real traffic; `distinct` numbers every one of them instead."""
+    rng = random.Random(count)
+    corpus = []
+    for i in range(count):
+        if i % 4 == 3:
+            utterance = "nothing to see here"
+        elif i % 4 == 2:
+            utterance = f"say hello {i % 7}"
+        else:
+            utterance = f"please turn on lamp{rng.randrange(amount)} in the {rng.choice(ROOMS)}"
+        corpus.append(f"{utterance} {i}" if distinct else utterance)
+    return corpus
+
+
+def summarize(results):
+    return [
+        (
+            r.command.name,
+            r.match_result.substring,
+            r.index,
+            {k: v and v.value for k, v in r.match_result.parameters.items()},
+        )
+        for r in results
+    ]
+
+
+async def test_search_batch_equals_search():
+    grammar = make_grammar()
+    corpus = make_corpus(40)
+    processor = SearchProcessor()
+
+    expected = [
+        summarize(await processor.search(string, grammar.pattern_parser, grammar.commands, [])) for string in corpus
+    ]
+    batch = [
+        summarize(results) async for results in processor.search_batch(corpus, grammar.pattern_parser, grammar.commands)
+    ]
+    assert batch == expected
+    assert not runs  # no commands run
+
+
+async def test_search_batch_async_stream_with_concurrency():
+    grammar = make_grammar()
+    corpus = make_corpus(25)
+
+    async def stream():
+        for string in corpus:
+            await anyio.sleep(0)
+            yield LocaleString(string, "en")
+
+    sequential = [
+        summarize(results)
+        async for results in SearchProcessor().search_batch(corpus, grammar.pattern_parser, grammar.commands)
+    ]
+    concurrent = [
+        summarize(results)
+        async for results in SearchProcessor().search_batch(
+            stream(), grammar.pattern_parser, grammar.commands, concurrency=8
+        )
+    ]
+    assert concurrent == sequential
+
+
+async def test_search_batch_repeated_utterances_are_copies():
+    grammar = make_grammar()
+    batch = SearchProcessor().search_batch(
+        ["turn on lamp1 in the garage"] * 3, grammar.pattern_parser, grammar.commands
+    )
+    results = [results async for results in batch]
+
+    assert [summarize(r) for r in results] == [summarize(results[0])] * 3
+    results[0][0].match_result.parameters["room"].value = "attic"
+    assert results[1][0].match_result.parameters["room"].value == "garage"
+    assert results[1][0].match_result is not results[2][0].match_result
+
+
+async def test_search_batch_shared_cache_is_keyed_by_grammar():
+    grammar = make_grammar()
+    results_cache = batch_results_cache()
+    strings = ["turn on lamp1 in the garage"]
+
+    async def search(commands) -> list[list[str]]:
+        batch = SearchProcessor().search_batch(strings, grammar.pattern_parser, commands, results_cache=results_cache)
+        return [[result.command.name for result in results] async for results in batch]
+
+    assert await search(grammar.commands) == [["lamp1"]]
+    assert await search(grammar.commands[2:]) == [[]]  # another command set doesn't reuse the results
+    grammar.pattern_parser.clear_pattern_cache()
+    assert await search(grammar.commands) == [["lamp1"]]
+    assert (results_cache.hits, len(results_cache)) == (0, 3)  # nor does the parser after a change
+    assert await search(grammar.commands) == [["lamp1"]]
+    assert results_cache.hits == 1
+
+
+async def test_match_batch():
+    grammar = make_grammar()
+    pattern = grammar.commands[0].get_pattern("base")
+    strings = ["turn on lamp0 in the kitchen", "turn on lamp1 in the kitchen", "turn on lamp0 in the garage"]
+
+    matches = [matches async for matches in grammar.pattern_parser.match_batch(pattern, strings, concurrency=2)]
+    assert [[match.parameters["room"].value for match in m] for m in matches] == [["kitchen"], [], ["garage"]]
+
+
+async def test_search_in_processes():
+    corpus = make_corpus(60)
+    grammar = make_grammar()
+    expected = [
+        summarize(results)
+        async for results in grammar.processor.search_batch(corpus, grammar.pattern_parser, grammar.commands)
+    ]
+
+    results = [results async for results in search_in_processes(corpus, make_grammar, processes=2, chunk_size=16)]
+    assert [summarize(r) for r in results] == expected
+
+
+async def test_search_in_processes_closes_without_blocking():
+    corpus = make_corpus(60)
+    ticks = 0
+    closed = anyio.Event()
+
+    async def tick():
+        nonlocal ticks
+        while not closed.is_set():
+            ticks += 1
+            await anyio.sleep(0.001)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(tick)
+        results = search_in_processes(corpus, make_grammar, processes=2, chunk_size=4)
+        await anext(results)
+        closing = ticks
+        await results.aclose()  # waits for the chunks still running in the workers
+        closed.set()
+
+    assert ticks > closing
+
+
+# benchmark
+
+
+@pytest.mark.timeout(60.0 * 10)
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=3,
+)
+@pytest.mark.parametrize("corpus_kind", ["distinct", "repeated"])
+@pytest.mark.parametrize("mode", ["sequential", "batch", "processes"])
+def test_benchmark__batch(mode: str, corpus_kind: str, benchmark):
+    """
+    Throughput over a 10k utterance corpus, 100 commands. The distinct corpus measures the batched search itself, the
+    repeated one (about 300 distinct utterances) mostly the results cache, its hit rate is reported for `batch`.
+    """
+    corpus = make_corpus(10_000, amount=100, distinct=corpus_kind == "distinct")
+    grammar = make_grammar(100)
+    results_cache = batch_results_cache()
+
+    async def run_sequential():
+        for string in corpus:
+            await grammar.processor.search(string, grammar.pattern_parser, grammar.commands, [])
+
+    async def run_batch():
+        results_cache.clear()  # every round starts cold
+        results_cache.reset_stats()
+        batch = grammar.processor.search_batch(
+            corpus, grammar.pattern_parser, grammar.commands, results_cache=results_cache
+        )
+        async for _ in batch:
+            pass
+
+    async def run_processes():
+        async for _ in search_in_processes(corpus, make_benchmark_grammar, processes=4):
+            pass
+
+    run = {"sequential": run_sequential, "batch": run_batch, "processes": run_processes}[mode]
+    benchmark(anyio.run, run)
+
+    benchmark.extra_info.update({"utterances": len(corpus), "distinct_utterances": len(set(corpus))})
+    if mode == "batch":
+        benchmark.extra_info["cache_hit_rate"] = results_cache.stats.hit_rate
+    if benchmark.stats:  # None with --benchmark-disable
+        benchmark.extra_info["throughput_per_s"] = len(corpus) / benchmark.stats.stats.mean
+
+
+def make_benchmark_grammar() -> BatchGrammar:
+    return make_grammar(100)
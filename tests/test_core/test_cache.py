@@ -0,0 +1,187 @@
+import anyio
+import pytest
+
+from stark.core.parsing import PatternParser
+from stark.general.cache import CacheRegistry, CacheStats, LRUCache, alru_cache, default_cache_registry
+
+
+@pytest.fixture
+def registry():
+    return CacheRegistry()
+
+
+def test_lru_evicts_least_recently_used():
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # "b" is the least recently used
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats == CacheStats(hits=3, misses=0, size=2, evictions=1, memory=cache.memory)
+
+
+def test_lru_memory_budget():
+    cache: LRUCache[str, str] = LRUCache(maxsize=100, max_memory=100, weigher=lambda key, value: len(value))
+    cache.put("a", "x" * 60)
+    cache.put("b", "x" * 30)
+    assert cache.memory == 90
+
+    cache.put("c", "x" * 30)
+    assert "a" not in cache
+    assert cache.memory == 60
+    assert cache.evictions == 1
+
+
+def test_lru_ttl():
+    now = 0.0
+    cache: LRUCache[str, int] = LRUCache(ttl=10, clock=lambda: now)
+    cache.put("a", 1)
+
+    now = 5.0
+    assert cache.get("a") == 1
+    now = 10.0
+    assert cache.get("a") is None
+    assert cache.stats.evictions == 1
+    assert len(cache) == 0
+
+
+def test_lru_ttl_configured_after_put():
+    now = 0.0
+    cache: LRUCache[str, int] = LRUCache(clock=lambda: now)
+    cache.put("a", 1)
+    cache.configure(ttl=60)
+    cache.put("b", 2)
+
+    now = 30.0
+    assert cache.get("a") == 1  # stored before the TTL, expires 60 seconds after it was configured
+    now = 60.0
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+
+    cache.put("c", 3)
+    cache.configure(ttl=None)  # turns the TTL off
+    assert cache.ttl is None
+    now = 1000.0
+    assert cache.get("c") == 3
+    cache.configure(maxsize=10)  # leaves the TTL unchanged
+    assert cache.ttl is None
+
+
+def test_registry_configures_and_clears_by_name(registry):
+    first: LRUCache[str, int] = LRUCache(maxsize=10, name="test.first", registry=registry)
+    second: LRUCache[str, int] = LRUCache(maxsize=10, name="test.first", registry=registry)
+    other: LRUCache[str, int] = LRUCache(maxsize=10, name="test.other", registry=registry)
+    for cache in (first, second, other):
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+    registry.configure("test.first", maxsize=1)
+    assert (len(first), len(second), len(other)) == (1, 1, 2)
+
+    late: LRUCache[str, int] = LRUCache(maxsize=10, name="test.first", registry=registry)
+    assert late.maxsize == 1  # configuration applies to the caches created later too
+
+    first.get("b")
+    other.get("missing")
+    stats = registry.stats()
+    assert registry.names == ["test.first", "test.other"]
+    assert (stats["test.first"].hits, stats["test.first"].size, stats["test.first"].evictions) == (1, 2, 2)
+    assert stats["test.other"].misses == 1
+
+    registry.clear("test.first")
+    assert (len(first), len(second), len(other)) == (0, 0, 2)
+    registry.clear()
+    assert len(other) == 0
+
+
+def test_registry_disable(registry):
+    cache: LRUCache[str, int] = LRUCache(name="test.disabled", registry=registry)
+    cache.put("a", 1)
+    registry.configure("test.disabled", enabled=False)
+
+    assert len(cache) == 0
+    cache.put("a", 1)
+    assert cache.get("a") is None
+
+
+def test_registry_env_options(registry, monkeypatch):
+    monkeypatch.setenv("STARK_CACHE_TEST_ENV_MAXSIZE", "3")
+    monkeypatch.setenv("STARK_CACHE_TEST_ENV_TTL", "1.5")
+    cache: LRUCache[str, int] = LRUCache(maxsize=10, name="test.env", registry=registry)
+    assert (cache.maxsize, cache.ttl, cache.enabled) == (3, 1.5, True)
+
+    registry.configure("test.env", ttl=None)
+    assert cache.ttl is None
+
+    monkeypatch.setenv("STARK_DISABLE_CACHES", "1")
+    assert not LRUCache(name="test.env", registry=registry).enabled
+
+
+def test_registry_forgets_collected_caches(registry):
+    cache: LRUCache[str, int] = LRUCache(name="test.collected", registry=registry)
+    assert registry.names == ["test.collected"]
+    del cache
+    assert registry.names == []
+
+
+def test_pattern_parser_caches_registered():
+    pattern_parser = PatternParser()
+    assert pattern_parser._compiled_patterns in default_cache_registry.caches("parsing.patterns")
+    assert pattern_parser._pure_results in default_cache_registry.caches("parsing.pure_results")
+
+
+async def test_alru_cache_dedups_in_flight_calls():
+    calls: list[int] = []
+
+    @alru_cache(maxsize=8, ttl=60, name="test.alru")
+    async def slow_square(x: int) -> int:
+        calls.append(x)
+        await anyio.sleep(1)
+        return x * x
+
+    results = []
+
+    async def call(x: int):
+        results.append(await slow_square(x))
+
+    async with anyio.create_task_group() as group:
+        for x in (2, 2, 3, 2):
+            group.start_soon(call, x)
+
+    assert sorted(results) == [4, 4, 4, 9]
+    assert calls == [2, 3]
+    assert await slow_square(2) == 4
+    assert calls == [2, 3]
+    assert slow_square.cache.stats.hits >= 3
+
+
+async def test_alru_cache_expires(autojump_clock):
+    calls: list[int] = []
+
+    @alru_cache(ttl=10, name="test.alru_ttl")
+    async def echo(x: int) -> int | None:
+        calls.append(x)
+        return None  # None results are cached as well
+
+    await echo(1)
+    await echo(1)
+    await anyio.sleep(11)
+    await echo(1)
+    assert calls == [1, 1]
+
+
+async def test_alru_cache_failure_not_cached():
+    calls: list[int] = []
+
+    @alru_cache(name="test.alru_failure")
+    async def fail(x: int) -> int:
+        calls.append(x)
+        raise ValueError(x)
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="1"):
+            await fail(1)
+    assert calls == [1, 1]
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import anyio
+import pytest
+
+from stark.general.channel import OverflowPolicy, ThreadChannel
+
+
+async def consume(channel: ThreadChannel[int], count: int) -> list[int]:
+    items: list[int] = []
+    while len(items) < count:
+        await channel.wait()
+        while (item := channel.get_nowait()) is not None:
+            items.append(item)
+    return items
+
+
+def produce(channel: ThreadChannel[int], count: int, interval: float = 0.001):
+    def run():
+        for i in range(count):
+            channel.put(i)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_thread_to_async_in_order(backend: str):
+    channel: ThreadChannel[int] = ThreadChannel(capacity=16)
+
+    async def main():
+        thread = produce(channel, 50)
+        with anyio.fail_after(5):
+            items = await consume(channel, 50)
+        thread.join()
+        return items
+
+    assert anyio.run(main, backend=backend) == list(range(50))
+    assert (channel.received, channel.dropped) == (50, 0)
+
+
+def test_drop_oldest():
+    channel: ThreadChannel[int] = ThreadChannel(capacity=3)
+    assert all(channel.put(i) for i in range(5))
+    assert [channel.get_nowait() for _ in range(4)] == [2, 3, 4, None]
+    assert channel.dropped == 2
+
+
+def test_block_until_drained():
+    channel: ThreadChannel[int] = ThreadChannel(capacity=1, overflow=OverflowPolicy.BLOCK, block_timeout=5)
+    channel.put(0)
+    thread = produce(channel, 1)  # waits for room
+    time.sleep(0.05)
+    assert len(channel) == 1
+
+    assert channel.get_nowait() == 0
+    thread.join(1)
+    assert channel.get_nowait() == 0
+    assert channel.dropped == 0
+
+    channel.block_timeout = 0.01
+    assert channel.put(1)
+    assert not channel.put(2)  # timed out
+    assert (channel.get_nowait(), channel.dropped) == (1, 1)
+
+
+async def test_wake_ends_wait():
+    channel: ThreadChannel[int] = ThreadChannel()
+
+    async def stop():
+        await anyio.sleep(0.01)
+        channel.wake()
+
+    with anyio.fail_after(1):
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(stop)
+            await channel.wait()
+    assert channel.get_nowait() is None
@@ -0,0 +1,113 @@
+import time
+
+import anyio
+import pytest
+
+from stark.core import Command, Pattern, Response
+from stark.core.anchor_index import CommandsAnchorIndex
+from stark.core.parsing import PatternParser
+from stark.core.processors.dispatch import CombinedCommandsMatcher
+from stark.core.processors.search_processor import SearchProcessor
+from stark.general.localisation import LocaleString
+
+
+def make_commands(amount: int) -> list[Command]:
+    async def runner(**params):
+        return Response("ok")
+
+    commands = []
+    for i in range(amount):
+        if i % 3 == 0:
+            origin = f"turn on (lamp{i}|light{i}) $name:NLWord"
+        elif i % 3 == 1:
+            origin = f"set timer{i} for $time:NLString"
+        else:
+            origin = f"play song{i}*"
+        commands.append(Command(f"cmd{i}", {"base": Pattern(origin)}, runner))
+    return commands
+
+
+def summarize(results):
+    return [
+        (r.command.name, r.match_result.substring, r.index, {k: v and v.value for k, v in r.match_result.parameters.items()})
+        for r in results
+    ]
+
+
+@pytest.mark.parametrize(
+    "string",
+    [
+        "turn on lamp3 kitchen",
+        "set timer4 for ten minutes",
+        "play song5s please",
+        "turn on light0 bedroom and play song2",
+        "nothing here",
+    ],
+)
+async def test_combined_dispatch_equivalence(string):
+    commands = make_commands(12)
+    pattern_parser = PatternParser()
+
+    fanout = await SearchProcessor().search(string, pattern_parser, commands, [])
+    combined = await SearchProcessor(combined_dispatch=True).search(string, pattern_parser, commands, [])
+
+    assert summarize(combined) == summarize(fanout)
+
+
+async def test_combined_dispatch_candidates():
+    commands = make_commands(30)
+    pattern_parser = PatternParser()
+    matcher = CombinedCommandsMatcher()
+
+    candidates = matcher.candidates(LocaleString("turn on lamp9 kitchen"), "base", pattern_parser, commands)
+    assert [c.name for c in candidates] == ["cmd9"]
+
+
+async def test_combined_dispatch_same_position():
+    async def runner(**params):
+        return Response("ok")
+
+    commands = [
+        Command(f"cmd{i}", {"base": Pattern(origin)}, runner)
+        for i, origin in enumerate(["turn on $x:NLString", "lorem", "turn on the light", "turn *", "on the", "light"])
+    ]
+    pattern_parser = PatternParser()
+    matcher = CombinedCommandsMatcher()
+
+    candidates = matcher.candidates("turn on the light", "base", pattern_parser, commands)
+    assert [c.name for c in candidates] == ["cmd0", "cmd2", "cmd3", "cmd4", "cmd5"]
+
+
+async def test_combined_dispatch_rebuilds_on_change():
+    commands = make_commands(3)
+    pattern_parser = PatternParser()
+    matcher = CombinedCommandsMatcher()
+
+    assert not matcher.candidates("open the door", "base", pattern_parser, commands)
+
+    async def open_door():
+        return Response("opened")
+
+    commands.append(Command("open_door", {"base": Pattern("open the door")}, open_door))
+    assert [c.name for c in matcher.candidates("open the door", "base", pattern_parser, commands)] == ["open_door"]
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+@pytest.mark.parametrize("commands_amount", [10, 100, 1_000, 10_000])
+@pytest.mark.parametrize("strategy", ["fanout", "combined", "anchors"])
+def test_benchmark__combined_dispatch(commands_amount: int, strategy: str, benchmark):
+    commands = make_commands(commands_amount)
+    pattern_parser = PatternParser()
+    processor = SearchProcessor(combined_dispatch=strategy == "combined")
+    anchor_index = CommandsAnchorIndex(commands) if strategy == "anchors" else None
+    string = f"turn on lamp{commands_amount - 3 - (commands_amount % 3)} kitchen"
+
+    def search():
+        return anyio.run(processor.search, string, pattern_parser, commands, [], anchor_index)
+
+    search()  # warm up compiled patterns, the dispatch automaton and anchors
+    results = benchmark(search)
+    assert len(results) == 1
@@ -0,0 +1,97 @@
+import anyio
+import asyncer
+import pytest
+
+from stark.core.command import Response
+from stark.core.commands_context import CommandsContext
+from stark.core.commands_manager import CommandsManager
+from stark.core.deadline import Deadline, deadline_scope
+from stark.core.parsing import ParseError, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.types.object import NLObject
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString
+from stark.tools.sliding_window_parser import sliding_window_parse
+
+
+class SlowWord(NLObject[str]):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("*")
+
+    async def did_parse(self, from_string: str) -> str:
+        if from_string.startswith("slow"):
+            await anyio.sleep(10)  # e.g. a remote dictionary lookup
+        self.value = from_string
+        return from_string
+
+
+@pytest.fixture
+def manager():
+    return CommandsManager()
+
+
+@pytest.fixture
+async def context(manager):
+    async with asyncer.create_task_group() as main_task_group:
+        cc = CommandsContext(main_task_group, manager, parse_budget=1)
+        cc.pattern_parser.register_parameter_type(SlowWord)
+        yield cc
+
+
+async def test_deadline_keeps_results_found_in_time(context, manager, autojump_clock):
+    @manager.new("turn off the light")
+    def lights_off():
+        return Response("Lights off!")
+
+    @manager.new("turn off $device:SlowWord")
+    def turn_off(device: SlowWord):
+        return Response(f"{device.value} off!")
+
+    start = anyio.current_time()
+    results = await context.process_string("turn off slowlamp")
+    assert results == []
+    assert anyio.current_time() - start == pytest.approx(1)
+
+    results = await context.process_string("turn off the light")
+    assert [r.command for r in results] == [lights_off]  # overlapping turn_off is dropped
+
+    assert context.timeout_stats.utterances == 1
+    assert context.timeout_stats.by_command == {turn_off.name: 1}
+    assert context.timeout_stats.by_type == {"SlowWord": 1}
+
+
+async def test_no_budget_waits_for_slow_parse(context, manager, autojump_clock):
+    @manager.new("turn off $device:SlowWord")
+    def turn_off(device: SlowWord):
+        return Response(f"{device.value} off!")
+
+    context.parse_budget = None
+    results = await context.process_string("turn off slowlamp")
+
+    assert [r.match_result.parameters["device"].value for r in results] == ["slowlamp"]
+    assert context.timeout_stats.utterances == 0
+
+
+async def test_deadline_stops_match_between_candidates(autojump_clock):
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(SlowWord)
+
+    with deadline_scope(Deadline.after(1)):
+        matches = await pattern_parser.match(Pattern("get $word:SlowWord"), LocaleString("get fast get slow get more"))
+
+    assert [m.substring for m in matches] == ["get fast"]
+
+
+async def test_sliding_window_parse_stops_on_deadline(autojump_clock):
+    async def parser(s: str) -> str:
+        await anyio.sleep(1)
+        if s != "two":
+            raise ParseError("not two")
+        return s
+
+    with deadline_scope(Deadline.after(2.5)), pytest.raises(ParseError):
+        await sliding_window_parse("one two three", parser)
+
+    with deadline_scope(Deadline.after(100)):
+        assert await sliding_window_parse("one two three", parser) == [((4, 7), "two", "two")]
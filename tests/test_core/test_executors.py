@@ -0,0 +1,157 @@
+import threading
+import time
+
+import anyio
+import pytest
+
+from stark.core import CommandsManager, Response, ResponseStatus
+from stark.core.executors import CommandExecutor, ExecutorOverloadedError, ProcessPool, ThreadPool, default_thread_pool
+from stark.general.metrics import MetricsRegistry
+
+manager = CommandsManager()
+
+
+@manager.new("fibonacci", executor=ProcessPool("cpu", max_workers=1))
+def fibonacci(n: int | None = None) -> Response:
+    a, b = 0, 1
+    for _ in range(n or 20):
+        a, b = b, a + b
+    return Response(str(a))
+
+
+class Gate:
+    """Blocks the worker threads until opened, counts how many run at once."""
+
+    def __init__(self):
+        self.opened = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def wait(self):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.opened.wait(5)
+        with self.lock:
+            self.running -= 1
+
+
+async def test_thread_pool_bounded():
+    gate = Gate()
+    pool = ThreadPool("heavy", max_workers=2)
+    commands = CommandsManager()
+
+    @commands.new("heavy", executor=pool)
+    def heavy() -> Response:
+        gate.wait()
+        return Response("heavy")
+
+    @commands.new("light")
+    def light() -> Response:
+        return Response("light")
+
+    responses = []
+
+    async def run_heavy():
+        responses.append(await heavy())
+
+    async with anyio.create_task_group() as task_group:
+        for _ in range(5):
+            task_group.start_soon(run_heavy)
+        await anyio.sleep(0.1)
+        assert (pool.running, pool.queue_depth) == (2, 3)
+
+        assert (await light()).text == "light"  # the default pool isn't affected
+        gate.opened.set()
+
+    assert gate.max_running == 2
+    assert [response.text for response in responses] == ["heavy"] * 5
+    assert heavy.plan.executor is pool
+    assert light.plan.executor is default_thread_pool
+
+
+async def test_thread_pool_rejects_when_full():
+    gate = Gate()
+    metrics = MetricsRegistry(enabled=True)
+    pool = ThreadPool("limited", max_workers=1, max_queue=1, reject_when_full=True, metrics=metrics)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(pool.run, gate.wait, {})
+        task_group.start_soon(pool.run, gate.wait, {})
+        await anyio.sleep(0.1)
+
+        with pytest.raises(ExecutorOverloadedError, match="limited"):
+            await pool.run(gate.wait, {})
+        gate.opened.set()
+
+    snapshot = metrics.snapshot()
+    assert snapshot.counter("stark_executor_rejected", executor="limited") == 1
+    queue = snapshot.histogram("stark_executor_queue_seconds", executor="limited")
+    assert queue is not None
+    assert queue.count == 2
+    run = snapshot.histogram("stark_executor_run_seconds", executor="limited", command="wait")
+    assert run is not None
+    assert run.count == 2
+
+
+async def test_thread_pool_backpressure():
+    gate = Gate()
+    pool = ThreadPool("blocking", max_workers=1, max_queue=0)
+    finished = []
+
+    async def run(name: str):
+        await pool.run(gate.wait, {})
+        finished.append(name)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(run, "first")
+        await anyio.sleep(0.1)
+        task_group.start_soon(run, "second")
+        await anyio.sleep(0.1)
+        assert (pool.running, pool.queue_depth) == (1, 0)  # the second call waits to be admitted
+        gate.opened.set()
+
+    assert finished == ["first", "second"]
+
+
+async def test_overloaded_command_responds_with_error():
+    gate = Gate()
+    commands = CommandsManager()
+
+    @commands.new("busy", executor=ThreadPool("busy", max_workers=1, max_queue=0, reject_when_full=True))
+    def busy() -> Response:
+        gate.wait()
+        return Response("done")
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(busy)
+        await anyio.sleep(0.1)
+        assert (await busy()).status == ResponseStatus.error
+        gate.opened.set()
+
+
+async def test_process_pool():
+    started = time.perf_counter()
+    assert (await fibonacci(n=10)).text == "55"
+    assert (await fibonacci()).text == "6765"
+    assert time.perf_counter() - started < 30
+
+
+def test_executor_misuse():
+    commands = CommandsManager()
+
+    with pytest.raises(TypeError, match="async"):
+
+        @commands.new("async", executor=ThreadPool("async", max_workers=1))
+        async def run_async() -> Response:
+            return Response("async")
+
+    with pytest.raises(ValueError, match="module-level"):
+
+        @commands.new("local", executor=ProcessPool("local", max_workers=1))
+        def run_local() -> Response:
+            return Response("local")
+
+    with pytest.raises(TypeError, match="abstract"):
+        CommandExecutor("bare", max_workers=1)  # type: ignore[abstract]
@@ -0,0 +1,117 @@
+import anyio
+import asyncer
+import pytest
+
+from stark.core import CommandsContextLayer, SearchPolicy
+from stark.core.command import Response
+from stark.core.commands_context import CommandsContext
+from stark.core.commands_manager import CommandsManager
+from stark.core.patterns.pattern import Pattern
+from stark.core.types.object import NLObject
+from stark.general.classproperty import classproperty
+
+parsed: list[str] = []
+
+
+class SlowWord(NLObject[str]):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("*")
+
+    async def did_parse(self, from_string: str) -> str:
+        await anyio.sleep(10)  # e.g. a dictionary lookup
+        parsed.append(from_string)
+        self.value = from_string
+        return from_string
+
+
+@pytest.fixture(autouse=True)
+def reset_parsed():
+    parsed.clear()
+
+
+@pytest.fixture
+def manager():
+    return CommandsManager()
+
+
+@pytest.fixture
+async def context(manager):
+    async with asyncer.create_task_group() as main_task_group:
+        cc = CommandsContext(main_task_group, manager, search_policy=SearchPolicy.FIRST_MATCH)
+        cc.pattern_parser.register_parameter_type(SlowWord)
+        yield cc
+
+
+async def test_first_match_cancels_lower_priority_matches(context, manager, autojump_clock):
+    @manager.new("turn off the light")
+    def lights_off():
+        return Response("Lights off!")
+
+    @manager.new("turn off $device:SlowWord")
+    def turn_off(device: SlowWord):
+        return Response(f"{device.value} off!")
+
+    start = anyio.current_time()
+    results = await context.process_string("turn off the light")
+
+    assert [r.command for r in results] == [lights_off]
+    assert anyio.current_time() - start < 10
+    assert parsed == []
+    assert context.search_stats.early_returns == 1
+    assert context.search_stats.matches_cancelled == 1
+
+
+async def test_first_match_waits_for_higher_priority(context, manager, autojump_clock):
+    @manager.new("turn off $device:SlowWord")
+    def turn_off(device: SlowWord):
+        return Response(f"{device.value} off!")
+
+    @manager.new("turn off the light")
+    def lights_off():
+        return Response("Lights off!")
+
+    results = await context.process_string("turn off lamp")
+    assert [r.command for r in results] == [turn_off]
+    assert results[0].match_result.parameters["device"].value == "lamp"
+
+    results = await context.process_string("turn off the light")
+    assert [r.command for r in results] == [turn_off]  # the first command has the priority, even if it's slower
+    assert context.search_stats.early_returns == 0
+
+
+async def test_first_match_returns_one_command(context, manager):
+    @manager.new("turn off the light")
+    def lights_off():
+        return Response("Lights off!")
+
+    @manager.new("lorem * dolor")
+    def lorem():
+        return Response("lorem!")
+
+    results = await context.process_string("turn off the light lorem ipsum dolor")
+    assert [r.command for r in results] == [lights_off]
+
+    context.search_policy = SearchPolicy.ALL
+    results = await context.process_string("turn off the light lorem ipsum dolor")
+    assert {r.command for r in results} == {lights_off, lorem}
+
+
+async def test_first_match_skips_deeper_layers(context, manager):
+    @manager.new("yes")
+    def root_yes():
+        return Response("Root yes")
+
+    @manager.new("yes", hidden=True)
+    def confirm():
+        return Response("Confirmed")
+
+    context.context_queue.insert(0, CommandsContextLayer(commands=[confirm], parameters={}))
+    results = await context.process_string("yes")
+
+    assert [r.command for r in results] == [confirm]
+    assert context.search_stats.layers_searched == 1
+    assert context.search_stats.layers_skipped == 1
+
+    context.search_stats.reset()
+    assert context.search_stats.layers_searched == 0
@@ -0,0 +1,91 @@
+from stark.core import CommandsManager, Pattern, Response
+from stark.core.parsing import PatternParser
+from stark.core.processors.search_processor import SearchProcessor
+from stark.core.types import NLObject
+from stark.general.classproperty import classproperty
+from stark.general.metrics import MetricsRegistry
+
+
+class Room(NLObject):
+    @classproperty
+    def pattern(cls):
+        return Pattern("(kitchen|bedroom)")
+
+
+def make_parser(metrics: MetricsRegistry) -> PatternParser:
+    pattern_parser = PatternParser(metrics=metrics)
+    pattern_parser.register_parameter_type(Room)
+    return pattern_parser
+
+
+def make_manager() -> CommandsManager:
+    manager = CommandsManager()
+
+    @manager.new("lights on in the $room:Room")
+    async def lights_on(room: Room):
+        return Response(f"lights on in {room.value}")
+
+    @manager.new("make coffee")
+    async def coffee():
+        return Response("coffee")
+
+    return manager
+
+
+async def test_metrics_record_parser_and_search():
+    metrics = MetricsRegistry(enabled=True)
+    manager = make_manager()
+    lights_on, coffee = manager.commands
+
+    results = await SearchProcessor().search("lights on in the kitchen", make_parser(metrics), manager.commands, [])
+    assert [r.command for r in results] == [lights_on]
+
+    snapshot = metrics.snapshot()
+    assert snapshot.counter("stark_command_matches", command=lights_on.name) == 1
+    assert snapshot.counter("stark_command_matches", command=coffee.name) == 0
+    assert snapshot.histogram("stark_command_match_seconds", command=coffee.name).count == 1
+    assert snapshot.counter("stark_pattern_candidates", pattern="lights on in the $room:Room") == 1
+    assert snapshot.counter("stark_pattern_matches", pattern="make coffee") == 0
+    assert snapshot.histogram("stark_pattern_scan_seconds", pattern="make coffee").count == 1
+    # compiled once as is and once with the parsed room prefilled
+    assert snapshot.histogram("stark_pattern_compile_seconds", pattern="lights on in the $room:Room").count == 2
+    assert snapshot.counter("stark_parameter_loop_iterations", pattern="lights on in the $room:Room") == 2
+    assert snapshot.histogram("stark_did_parse_seconds", type="Room").count == 1
+    assert snapshot.histogram("stark_overlap_resolution_seconds").count == 1
+
+    metrics.reset()
+    assert metrics.snapshot().counters == {}
+    assert snapshot.counter("stark_command_matches", command=lights_on.name) == 1  # snapshots are detached
+
+
+async def test_metrics_disabled_records_nothing():
+    metrics = MetricsRegistry(enabled=False)
+    manager = make_manager()
+
+    await SearchProcessor().search("lights on in the kitchen", make_parser(metrics), manager.commands, [])
+
+    snapshot = metrics.snapshot()
+    assert snapshot.counters == {}
+    assert snapshot.histograms == {}
+
+
+def test_metrics_openmetrics_export():
+    metrics = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+    metrics.inc("stark_pattern_matches", 2, pattern='say "hi"')
+    metrics.observe("stark_did_parse_seconds", 0.5, type="Room")
+    metrics.observe("stark_did_parse_seconds", 2.0, type="Room")
+
+    assert metrics.to_openmetrics() == "\n".join(
+        [
+            "# TYPE stark_pattern_matches counter",
+            'stark_pattern_matches_total{pattern="say \\"hi\\""} 2',
+            "# TYPE stark_did_parse_seconds histogram",
+            'stark_did_parse_seconds_bucket{type="Room",le="0.1"} 0',
+            'stark_did_parse_seconds_bucket{type="Room",le="1.0"} 1',
+            'stark_did_parse_seconds_bucket{type="Room",le="+Inf"} 2',
+            'stark_did_parse_seconds_count{type="Room"} 2',
+            'stark_did_parse_seconds_sum{type="Room"} 2.5',
+            "# EOF",
+            "",
+        ]
+    )
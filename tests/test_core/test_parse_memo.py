@@ -0,0 +1,115 @@
+import asyncer
+import pytest
+
+from stark.core.command import Response
+from stark.core.commands_context import CommandsContext
+from stark.core.commands_manager import CommandsManager
+from stark.core.parse_memo import current_parse_memo, parse_memo_scope
+from stark.core.parsing import ParseError, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.types.object import NLObject
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString
+
+parse_calls: list[str] = []
+
+
+class Device(NLObject[str]):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("**")
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(from_string)
+        if from_string == "nothing":
+            raise ParseError("not a device")
+        self.value = from_string
+        return from_string
+
+
+@pytest.fixture(autouse=True)
+def reset_parse_calls():
+    parse_calls.clear()
+
+
+@pytest.fixture
+def pattern_parser():
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(Device)
+    return pattern_parser
+
+
+@pytest.fixture
+def manager():
+    return CommandsManager()
+
+
+@pytest.fixture
+async def context(manager):
+    async with asyncer.create_task_group() as main_task_group:
+        cc = CommandsContext(main_task_group, manager)
+        cc.pattern_parser.register_parameter_type(Device)
+        yield cc
+
+
+async def test_parse_memo_shares_sub_parses_across_commands(context, manager):
+    @manager.new("turn on $device:Device")
+    def turn_on(device: Device):
+        return Response(f"on {device.value}")
+
+    @manager.new("turn on $target:Device")
+    def turn_on_target(target: Device):
+        return Response(f"on {target.value}")
+
+    await context.process_string(LocaleString("turn on lamp"))
+
+    assert parse_calls.count("lamp") == 1
+    memo = context.last_parse_memo
+    assert memo is not None
+    assert not memo.active
+    assert memo.stats.hits >= 1
+    assert 0 < memo.stats.hit_rate < 1
+
+
+async def test_parse_memo_is_per_utterance(context, manager):
+    @manager.new("turn on $device:Device")
+    def turn_on(device: Device):
+        return Response(f"on {device.value}")
+
+    await context.process_string(LocaleString("turn on lamp"))
+    await context.process_string(LocaleString("turn on lamp"))
+
+    assert parse_calls.count("lamp") == 2
+
+
+async def test_parse_memo_returns_independent_objects(pattern_parser):
+    with parse_memo_scope() as memo:
+        first = await pattern_parser.parse_object(Device, LocaleString("lamp"))
+        second = await pattern_parser.parse_object(Device, LocaleString("lamp"))
+
+    assert parse_calls == ["lamp"]
+    assert memo.stats.hits == 1
+    assert memo.stats.misses == 1
+    assert first.obj is not second.obj
+    assert first.obj.value == second.obj.value == "lamp"
+
+
+async def test_parse_memo_stores_failures(pattern_parser):
+    with parse_memo_scope():
+        for _ in range(2):
+            with pytest.raises(ParseError):
+                await pattern_parser.parse_object(Device, LocaleString("nothing"))
+
+    assert parse_calls == ["nothing"]
+
+
+async def test_parse_memo_inactive_outside_scope(pattern_parser):
+    assert current_parse_memo() is None
+
+    with parse_memo_scope() as memo:
+        assert current_parse_memo() is memo
+
+    assert current_parse_memo() is None
+    await pattern_parser.parse_object(Device, LocaleString("lamp"))
+    await pattern_parser.parse_object(Device, LocaleString("lamp"))
+    assert parse_calls == ["lamp", "lamp"]
@@ -0,0 +1,222 @@
+import anyio
+import pytest
+
+from stark.core.deadline import Deadline, current_deadline, deadline_scope
+from stark.core.parse_memo import parse_memo_scope
+from stark.core.parsing import ObjectParser, ParseError, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.types import MakeUnion, NLObject, NLString, NLWord
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString
+from stark.models.transcription_string import TranscriptionString
+
+parse_calls: list[str] = []
+
+
+class Number(NLObject[int]):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(one|two|three)")
+
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(f"number {from_string}")
+        self.value = ["one", "two", "three"].index(from_string) + 1
+        return from_string
+
+
+class Amount(NLObject[int]):
+    number: Number
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$number:Number times")
+
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(f"amount {from_string}")
+        self.value = self.number.value
+        return from_string
+
+
+class Contact(NLObject[str]):
+    """Looks like a pure type, but depends on the injected address book."""
+
+    address_book: dict[str, str]
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("**")
+
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(f"contact {from_string}")
+        if from_string not in self.address_book:
+            raise ParseError("unknown contact")
+        self.value = self.address_book[from_string]
+        return from_string
+
+
+class Mood(NLObject[str]):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(happy|sad)")
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(f"mood {from_string}")
+        self.value = from_string
+        return from_string
+
+
+class Phrase(NLObject[str]):
+    """Parses word by word, keeps the words parsed so far when the time runs out."""
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("**")
+
+    @classproperty
+    def pure(cls) -> bool:
+        return True
+
+    async def did_parse(self, from_string: str) -> str:
+        parse_calls.append(f"phrase {from_string}")
+        words = from_string.split()
+        if (deadline := current_deadline()) is not None:
+            deadline.at = anyio.current_time()  # the budget runs out after the first word
+            words = words[:1]
+        self.value = " ".join(words)
+        return self.value
+
+
+class CustomParser(ObjectParser):
+    pass
+
+
+@pytest.fixture(autouse=True)
+def reset_parse_calls():
+    parse_calls.clear()
+
+
+@pytest.fixture
+def pattern_parser():
+    pattern_parser = PatternParser()
+    for object_type in (Number, Amount, Contact, Mood, Phrase):
+        pattern_parser.register_parameter_type(object_type)
+    return pattern_parser
+
+
+def test_purity_resolution(pattern_parser):
+    assert pattern_parser.is_pure(NLWord)
+    assert pattern_parser.is_pure(NLString)
+    assert pattern_parser.is_pure(Number)
+    assert pattern_parser.is_pure(Amount)
+    assert not pattern_parser.is_pure(Mood)  # not declared
+    assert not pattern_parser.is_pure(Contact)  # injected state
+
+    NumberOrWord = MakeUnion(Number, NLWord)
+    NumberOrMood = MakeUnion(Number, Mood)
+    pattern_parser.register_parameter_type(NumberOrWord)
+    pattern_parser.register_parameter_type(NumberOrMood)
+    assert pattern_parser.is_pure(NumberOrWord)
+    assert not pattern_parser.is_pure(NumberOrMood)
+
+
+def test_custom_parser_is_impure():
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(Number, parser=CustomParser())
+    assert not pattern_parser.is_pure(Number)
+
+
+async def test_pure_results_reused_across_utterances(pattern_parser):
+    for _ in range(3):
+        with parse_memo_scope():  # every utterance has its own memo
+            result = await pattern_parser.parse_object(Amount, "two times")
+            assert result.obj.value == 2
+            assert result.obj.number.value == 2
+
+    assert parse_calls == ["number two", "amount two times"]
+    assert pattern_parser.pure_cache_stats.hits == 2
+
+
+async def test_pure_results_are_copies(pattern_parser):
+    first = await pattern_parser.parse_object(Number, "three")
+    first.obj.value = 42
+
+    second = await pattern_parser.parse_object(Number, "three")
+    assert second.obj is not first.obj
+    assert second.obj.value == 3
+
+
+async def test_pure_failures_cached(pattern_parser):
+    for _ in range(2):
+        with pytest.raises(ParseError):
+            await pattern_parser.parse_object(Number, "four")
+    assert pattern_parser.pure_cache_stats.hits == 1
+
+
+async def test_pure_results_keyed_by_language(pattern_parser):
+    await pattern_parser.parse_object(Number, LocaleString("one", "en"))
+    await pattern_parser.parse_object(Number, LocaleString("one", "uk"))
+    assert parse_calls == ["number one", "number one"]
+
+
+async def test_pure_results_bound_to_the_current_string(pattern_parser):
+    await pattern_parser.parse_object(Number, "one")
+    transcription = TranscriptionString("one", "base", alternative_texts={"uk": LocaleString("odyn", "uk")})
+
+    result = await pattern_parser.parse_object(Number, transcription)
+    assert parse_calls == ["number one"]
+    assert isinstance(result.substring, TranscriptionString)
+
+
+async def test_pure_results_dont_keep_earlier_transcriptions(pattern_parser):
+    pattern_parser.register_parameter_type(NLWord)
+    first = TranscriptionString("hello", "en", alternative_texts={"uk": LocaleString("хелло", "uk")})
+    second = TranscriptionString("hello", "en", alternative_texts={"de": LocaleString("hallo", "de")})
+
+    first_result = await pattern_parser.parse_object(NLWord, first)
+    second_result = await pattern_parser.parse_object(NLWord, second)
+    assert pattern_parser.pure_cache_stats.hits == 1
+
+    assert second_result.obj.value is not first_result.obj.value
+    assert isinstance(second_result.obj.value, TranscriptionString)
+    assert second_result.obj.value.alternative_texts.keys() == {"de"}
+    assert second_result.substring.alternative_texts.keys() == {"de"}
+
+
+async def test_pure_results_found_out_of_time_not_cached(pattern_parser):
+    with deadline_scope(Deadline.after(1)):
+        result = await pattern_parser.parse_object(Phrase, "turn on the light")
+    assert result.obj.value == "turn"
+
+    result = await pattern_parser.parse_object(Phrase, "turn on the light")  # has the time to parse fully
+    assert result.obj.value == "turn on the light"
+    assert parse_calls == ["phrase turn on the light"] * 2
+
+
+async def test_impure_types_parsed_every_time(pattern_parser):
+    Contact.address_book = {"mom": "+100"}
+    for _ in range(2):
+        with parse_memo_scope():
+            result = await pattern_parser.parse_object(Contact, "mom")
+            assert result.obj.value == "+100"
+        await pattern_parser.parse_object(Mood, "happy")
+
+    assert parse_calls == ["contact mom", "mood happy"] * 2
+
+
+async def test_pure_cache_cleared_on_register(pattern_parser):
+    await pattern_parser.parse_object(Number, "one")
+    pattern_parser.register_parameter_type(type("Extra", (NLObject,), {}))
+    await pattern_parser.parse_object(Number, "one")
+    assert parse_calls == ["number one", "number one"]
@@ -0,0 +1,78 @@
+import anyio
+import pytest
+
+from stark.core import Response
+from stark.core.response_queue import ResponseQueue
+
+
+async def test_responses_delivered_without_delay(commands_context_flow, autojump_clock):
+    async with commands_context_flow() as (_manager, context, context_delegate):
+        started = anyio.current_time()
+        for i in range(3):
+            await context.respond(Response(f"response {i}"))
+        while len(context_delegate.responses) < 3:
+            await anyio.sleep(0)
+
+        assert anyio.current_time() == started  # no polling interval
+        assert [response.text for response in context_delegate.responses] == [f"response {i}" for i in range(3)]
+
+
+async def test_unrespond_removes_queued_response(commands_context_flow, autojump_clock):
+    async with commands_context_flow() as (_manager, context, context_delegate):
+        busy = anyio.Event()
+
+        class BusyDelegate(type(context_delegate)):
+            async def commands_context_did_receive_response(self, response: Response):
+                await busy.wait()  # the consumer is busy with the first response
+                await super().commands_context_did_receive_response(response)
+
+        context.delegate = delegate = BusyDelegate()
+        first, second, third = Response("first"), Response("second"), Response("third")
+        for response in (first, second, third):
+            await context.respond(response)
+        await context.unrespond(second)
+        busy.set()
+        await anyio.sleep(1)
+
+        assert [response.text for response in delegate.responses] == ["first", "third"]
+
+
+async def test_stop_wakes_idle_consumer(commands_context_flow):
+    with anyio.fail_after(1):  # the flow stops the context on exit, handle_responses must return
+        async with commands_context_flow() as (_manager, _context, _context_delegate):
+            await anyio.sleep(0.05)
+
+
+async def test_queue_bounded_in_order():
+    queue = ResponseQueue(capacity=2)
+    responses = [Response(str(i)) for i in range(5)]
+
+    async with anyio.create_task_group() as task_group:
+        for response in responses:
+            task_group.start_soon(queue.put, response)
+            await anyio.sleep(0)  # start in order
+        await anyio.sleep(0.01)
+        assert len(queue) == 2  # the other producers wait
+
+        received = []
+        while len(received) < len(responses):
+            await queue.wait()
+            received.append(queue.popleft())
+            await anyio.sleep(0)
+
+    assert received == responses
+
+
+async def test_queue_remove_frees_slot():
+    queue = ResponseQueue(capacity=1)
+    first, second = Response("first"), Response("second")
+    await queue.put(first)
+    assert queue.remove(first)
+    assert not queue.remove(first)
+
+    with anyio.fail_after(1):
+        await queue.put(second)
+    assert list(queue) == [second]
+
+    with pytest.raises(AssertionError):
+        ResponseQueue(capacity=0)
@@ -0,0 +1,129 @@
+import time
+from collections.abc import Sequence
+
+import anyio
+import pytest
+
+from stark.general.localisation import LocaleString
+from stark.interfaces.threaded_recognizer import RecognitionResult, ThreadedSpeechRecognizer
+
+
+class RecordedSpeechRecognizer(ThreadedSpeechRecognizer):
+    """Replays a recorded transcript: the n-th audio block decodes to the n-th result."""
+
+    def __init__(self, transcript: Sequence[RecognitionResult | None], language_code="en", decode_seconds=0.0):
+        super().__init__(language_code)
+        self.transcript = transcript
+        self.decode_seconds = decode_seconds
+        self.decoded = 0
+
+    def decode(self, data: bytes) -> RecognitionResult | None:
+        time.sleep(self.decode_seconds)  # stands for the native decoder, which releases the GIL
+        result = self.transcript[self.decoded]
+        self.decoded += 1
+        return result
+
+
+class RecordingDelegate:
+    def __init__(self):
+        self.events: list[tuple[str, str]] = []
+        self.received = anyio.Event()
+        self.expected = 0
+
+    def _record(self, kind: str, text: str = ""):
+        self.events.append((kind, text))
+        if len(self.events) >= self.expected:
+            self.received.set()
+
+    async def speech_recognizer_did_receive_final_result(self, result: str | LocaleString):
+        self._record("final", str(result))
+
+    async def speech_recognizer_did_receive_partial_result(self, result: str):
+        self._record("partial", result)
+
+    async def speech_recognizer_did_receive_empty_result(self):
+        self._record("empty")
+
+
+async def replay(recognizer: ThreadedSpeechRecognizer, delegate: RecordingDelegate, blocks: int):
+    recognizer.delegate = delegate
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(recognizer.start_listening)
+        await anyio.sleep(0)
+        for _ in range(blocks):
+            recognizer.microphone_did_receive_sample(b"\0" * 16)
+        with anyio.fail_after(5):
+            await delegate.received.wait()
+        recognizer.stop_listening()
+
+
+async def test_recorded_transcript_is_deterministic():
+    transcript = [
+        None,
+        RecognitionResult.partial("hello"),
+        RecognitionResult.partial("hello"),  # unchanged partials aren't repeated
+        RecognitionResult.partial("hello world"),
+        RecognitionResult.final("hello world"),
+        RecognitionResult.empty(),
+    ]
+    for _ in range(3):
+        recognizer = RecordedSpeechRecognizer(transcript)
+        delegate = RecordingDelegate()
+        delegate.expected = 4
+        await replay(recognizer, delegate, len(transcript))
+
+        assert delegate.events == [
+            ("partial", "hello"),
+            ("partial", "hello world"),
+            ("final", "hello world"),
+            ("empty", ""),
+        ]
+        assert recognizer.decoded == len(transcript)
+        assert recognizer.last_result is None
+        assert recognizer.dropped_frames == 0
+
+
+async def test_decoding_doesnt_block_the_loop():
+    recognizer = RecordedSpeechRecognizer([RecognitionResult.final("slow")], decode_seconds=0.3)
+    delegate = RecordingDelegate()
+    delegate.expected = 1
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while not delegate.received.is_set():
+            ticks += 1
+            await anyio.sleep(0.01)
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(tick)
+        await replay(recognizer, delegate, 1)
+
+    assert delegate.events == [("final", "slow")]
+    assert ticks > 10
+
+
+async def test_recognizers_decode_in_parallel():
+    blocks = 4
+    delegates = [RecordingDelegate() for _ in range(3)]
+    recognizers = [
+        RecordedSpeechRecognizer([RecognitionResult.final(language)] * blocks, language, decode_seconds=0.05)
+        for language in ("en", "de", "uk")
+    ]
+
+    started = time.perf_counter()
+    async with anyio.create_task_group() as task_group:
+        for recognizer, delegate in zip(recognizers, delegates, strict=True):
+            delegate.expected = blocks
+            task_group.start_soon(replay, recognizer, delegate, blocks)
+    elapsed = time.perf_counter() - started
+
+    assert [delegate.events for delegate in delegates] == [
+        [("final", language)] * blocks for language in ("en", "de", "uk")
+    ]
+    assert elapsed < 0.05 * blocks * 3 * 0.75  # serial decoding would take 0.6s
+
+
+def test_decode_is_abstract():
+    with pytest.raises(TypeError, match="decode"):
+        ThreadedSpeechRecognizer("en")  # type: ignore[abstract]
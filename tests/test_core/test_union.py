@@ -1,6 +1,6 @@
 import pytest
 
-from stark.core.parsing import PatternParser
+from stark.core.parsing import ParseError, PatternParser
 from stark.core.patterns.pattern import Pattern
 from stark.core.types import MakeUnion, NLObject, Union, any_subclass
 from stark.general.classproperty import classproperty
@@ -338,3 +338,74 @@ async def test_abstract_base_registration_blocked():
     pp = PatternParser()
     with pytest.raises(NotImplementedError):
         pp.register_parameter_type(AbstractUnit)
+
+
+# ── branch index ───────────────────────────────────────────────────────────────
+
+
+class Gadget(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        raise NotImplementedError
+
+
+GADGETS = [
+    type(f"Gadget{i:03}", (Gadget,), {"pattern": classproperty(lambda cls, i=i: Pattern(f"gadget {i:03}"))})
+    for i in range(200)
+]
+
+
+class AnyText(Gadget):
+    """Branch without literal anchors, viable for any string."""
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$text:NLString")
+
+    async def did_parse(self, from_string) -> str:
+        self.value = from_string
+        return from_string
+
+
+async def test_union_index_tries_only_viable_branches():
+    AnyGadget = any_subclass(Gadget)
+    pp = PatternParser()
+    pp.register_parameter_type(AnyGadget)
+    index = pp.union_index(AnyGadget, "base")
+
+    assert len(index.branches) == len(GADGETS) + 1
+    viable = index.viable_branches("gadget 042 please")
+    assert [index.branches[number] for number in viable] == [GADGETS[42], AnyText]
+    assert index.pattern("gadget 042 please").parameters.keys() == {f"m{viable[0]}", f"m{viable[1]}"}
+
+    result = await pp.parse_object(AnyGadget, "gadget 042 please")
+    assert type(result.obj.value) is GADGETS[42]
+    assert str(result.substring) == "gadget 042"
+
+    result = await pp.parse_object(AnyGadget, "hello")
+    assert type(result.obj.value) is AnyText
+
+
+async def test_union_index_no_viable_branch():
+    U = MakeUnion(Num, Word_)
+    U.__name__ = "NumOrWord_index"
+    pp = PatternParser()
+    pp.register_parameter_type(U)
+
+    assert pp.union_index(U, "base").pattern("cherry") is None
+    with pytest.raises(ParseError):
+        await pp.parse_object(U, "cherry")
+
+
+async def test_union_index_caches_per_substring():
+    U = MakeUnion(Num, Word_)
+    U.__name__ = "NumOrWord_cached"
+    pp = PatternParser()
+    pp.register_parameter_type(U)
+
+    await pp.parse_object(U, "two")
+    await pp.parse_object(U, "two")
+    assert pp.union_index(U, "base").stats.hits == 1
+
+    pp.register_parameter_type(Digit)  # invalidates compiled patterns and the indexes built from them
+    assert pp.union_index(U, "base").stats.hits == 0
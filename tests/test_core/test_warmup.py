@@ -0,0 +1,169 @@
+import gc
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from stark.core import Command, Pattern, Response
+from stark.core.anchor_index import CommandsAnchorIndex
+from stark.core.parsing import PatternParser
+from stark.core.types import NLObject, any_subclass
+from stark.core.warmup import grammar_hash, warmup
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString, Localizer
+
+
+class Tool(NLObject):
+    pass
+
+
+class Hammer(Tool):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(hammer|mallet)")
+
+
+class Wrench(Tool):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("@wrench")
+
+
+AnyTool = any_subclass(Tool)
+
+
+def make_commands(amount: int) -> list[Command]:
+    async def runner(**params):
+        return Response("ok")
+
+    commands = [Command("hand", {"base": Pattern("hand me the $tool:AnyTool"), "uk": Pattern("dai $tool:AnyTool")}, runner)]
+    for i in range(amount):
+        origin = f"turn on (lamp{i}|light{i}) $name:NLWord" if i % 2 else f"set timer{i} for $time:NLString"
+        commands.append(Command(f"cmd{i}", {"base": Pattern(origin)}, runner))
+    return commands
+
+
+def make_localizer(root: Path) -> Localizer:
+    for lang, wrench in {"en": "(wrench|spanner)", "uk": "kliuch"}.items():
+        directory = root / "strings" / lang
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "recognizable.strings").write_text(f'"wrench" = "{wrench}";')
+        (directory / "localizable.strings").write_text(f'"wrench" = "{wrench}";')
+    localizer = Localizer(languages={"en", "uk"})
+    localizer.load()
+    return localizer
+
+
+def make_parser(localizer: Localizer) -> PatternParser:
+    pattern_parser = PatternParser(localizer=localizer)
+    pattern_parser.register_parameter_type(AnyTool)
+    return pattern_parser
+
+
+@pytest.fixture
+def localizer(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return make_localizer(tmp_path)
+
+
+async def test_warmup_compiles_every_language(localizer):
+    pattern_parser = make_parser(localizer)
+    commands = make_commands(10)
+    anchor_index = CommandsAnchorIndex(commands)
+
+    stats = warmup(pattern_parser, commands, anchor_index=anchor_index)
+    assert stats.failed == 0
+    assert stats.compiled == pattern_parser.pattern_cache_stats.size > 0
+    assert {key[1] for key, _ in pattern_parser.export_compiled_patterns()} == {"base", "en", "uk"}
+
+    assert await pattern_parser.match(commands[0].get_pattern("uk"), LocaleString("dai kliuch", "uk"))
+    assert await pattern_parser.match(commands[0].get_pattern("en"), LocaleString("hand me the spanner", "en"))
+
+    # narrowed union patterns and prefilled reruns depend on the utterance, everything else is warm
+    warm = {key for key, _ in pattern_parser.export_compiled_patterns()}
+    assert await pattern_parser.match(commands[2].get_pattern("uk"), LocaleString("turn on lamp1 kitchen", "uk"))
+    assert await pattern_parser.match(commands[1].get_pattern("en"), LocaleString("set timer0 for an hour", "en"))
+    compiled = {key for key, _ in pattern_parser.export_compiled_patterns()} - warm
+    assert all(prefill for _origin, _language_code, _group_prefix, prefill in compiled)
+
+
+async def test_snapshot_restores_compiled_patterns(localizer, tmp_path):
+    snapshot = tmp_path / "grammar.json"
+    commands = make_commands(10)
+
+    cold = warmup(make_parser(localizer), commands, snapshot=snapshot)
+    assert cold.loaded == 0
+    assert snapshot.exists()
+
+    pattern_parser = make_parser(localizer)
+    hot = warmup(pattern_parser, commands, snapshot=snapshot)
+    assert hot.loaded == hot.compiled == cold.compiled
+    assert pattern_parser.pattern_cache_stats.misses == 0
+    assert await pattern_parser.match(commands[0].get_pattern("en"), LocaleString("hand me the mallet", "en"))
+
+
+def test_snapshot_invalidated_by_grammar_changes(localizer, tmp_path):
+    snapshot = tmp_path / "grammar.json"
+    commands = make_commands(3)
+    pattern_parser = make_parser(localizer)
+    warmup(pattern_parser, commands, snapshot=snapshot)
+    digest = json.loads(snapshot.read_text())["hash"]
+    languages = ["base", "en", "uk"]
+    assert grammar_hash(pattern_parser, commands, languages) == digest
+
+    assert grammar_hash(pattern_parser, make_commands(4), languages) != digest  # commands
+    assert grammar_hash(pattern_parser, commands, ["base", "en"]) != digest  # languages
+
+    pattern_parser.register_parameter_type(type("Extra", (NLObject,), {}))
+    assert grammar_hash(pattern_parser, commands, languages) != digest  # types
+
+    localizer.recognizable["uk"].strings["wrench"].value = "kliuchyk"
+    assert grammar_hash(make_parser(localizer), commands, languages) != digest  # strings
+
+    stale = warmup(make_parser(localizer), commands, snapshot=snapshot)
+    assert stale.loaded == 0
+    assert json.loads(snapshot.read_text())["hash"] != digest  # rewritten
+
+
+def test_corrupted_snapshot_ignored(localizer, tmp_path):
+    snapshot = tmp_path / "grammar.json"
+    snapshot.write_text("{not json")
+    stats = warmup(make_parser(localizer), make_commands(3), snapshot=snapshot)
+    assert stats.loaded == 0
+    assert stats.compiled > 0
+
+
+def test_failing_patterns_counted():
+    async def runner():
+        return Response("ok")
+
+    commands = [Command("broken", {"base": Pattern("say $what:UnknownType")}, runner)]
+    stats = warmup(PatternParser(), commands)
+    assert stats.failed == 1
+
+
+# benchmark
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_benchmark__warmup(snapshot: bool, benchmark, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    localizer = make_localizer(tmp_path)
+    commands = make_commands(1000)
+    path = tmp_path / "grammar.json"
+    if snapshot:
+        warmup(make_parser(localizer), commands, snapshot=path)
+
+    def run():
+        return warmup(make_parser(localizer), commands, snapshot=path if snapshot else None)
+
+    def collect():
+        gc.collect()  # parsers of the previous rounds would share their compiled regexes with the next one
+
+    stats = benchmark.pedantic(run, setup=collect, rounds=5)
+    assert stats.loaded == (stats.compiled if snapshot else 0)
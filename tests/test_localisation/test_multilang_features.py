@@ -1,5 +1,10 @@
 """Tests for multilanguage features: matrix matching, suggestions expansion, and relay confidence building."""
 
+import time
+from random import Random
+
+import pytest
+
 from stark.core.command import Response
 from stark.core.commands_manager import CommandsManager
 from stark.core.parsing import PatternParser
@@ -152,6 +157,90 @@ def test_build_best_confidence_language_priority():
     assert "привет" in best2.text
 
 
+def test_build_best_confidence_three_languages():
+    from stark.interfaces.recognizer_relay import SpeechRecognizerRelay
+    from stark.models.voice_transcription import Transcription
+
+    relay = SpeechRecognizerRelay([])
+
+    tracks = [
+        _make_track(
+            [
+                _make_word("turn", "en", 0.0, 0.3, 0.9),
+                _make_word("on", "en", 0.3, 0.5, 0.9),
+                _make_word("the", "en", 0.5, 0.6, 0.4),
+                _make_word("lights", "en", 0.6, 1.0, 0.5),
+            ],
+            "en",
+        ),
+        _make_track(
+            [
+                _make_word("tor", "de", 0.0, 0.35, 0.3),
+                _make_word("an", "de", 0.35, 0.5, 0.6),
+                _make_word("die", "de", 0.5, 0.65, 0.8),
+                _make_word("lichter", "de", 0.65, 1.1, 0.4),
+            ],
+            "de",
+        ),
+        _make_track(
+            [
+                _make_word("тарн", "uk", 0.0, 0.5, 0.2),
+                _make_word("зе", "uk", 0.5, 0.6, 0.7),
+                _make_word("лайтс", "uk", 0.6, 1.0, 0.9),
+            ],
+            "uk",
+        ),
+    ]
+    originals = [track.model_copy(deep=True) for track in tracks]
+
+    best = relay._build_best_confidence(tracks, language_priority={"en": 0, "de": 1, "uk": 2})
+    origins = {track.language_code: track for track in tracks}
+    vts = Transcription(best=best, origins=origins).to_voice_transcription_string()
+
+    # "тарн" spans both "turn on" and "tor an", which compete with it as one alternative
+    assert best.text == "turn on die лайтс"
+    assert [(word.word, word.language_code) for word in vts.words] == [
+        ("turn on", "en"),
+        ("die", "de"),
+        ("лайтс", "uk"),
+    ]
+    assert tracks == originals  # the merge reads the tracks without consuming them
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=10,
+)
+def test_benchmark__build_best_confidence(benchmark):
+    """Merges 5 languages x 200 words and attributes the languages, both used to grow quadratically."""
+    from stark.interfaces.recognizer_relay import SpeechRecognizerRelay
+    from stark.models.voice_transcription import Transcription
+
+    random = Random(0)
+    languages = ["en", "de", "uk", "fr", "es"]
+    tracks = []
+    for language in languages:
+        words = []
+        start = 0.0
+        for _ in range(200):
+            duration = random.uniform(0.2, 0.5)
+            word = f"word{random.randrange(50)}"
+            words.append(_make_word(word, language, start, start + duration, random.random()))
+            start += duration + random.uniform(0, 0.05)
+        tracks.append(_make_track(words, language))
+
+    relay = SpeechRecognizerRelay([])
+    priority = {language: i for i, language in enumerate(languages)}
+    origins = {track.language_code: track for track in tracks}
+
+    def run():
+        best = relay._build_best_confidence(tracks, language_priority=priority)
+        return Transcription(best=best, origins=origins).to_voice_transcription_string()
+
+    vts = benchmark(run)
+    assert vts.words
+
+
 # --- CorrectionsProcessor ---
 
 
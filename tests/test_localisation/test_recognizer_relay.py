@@ -0,0 +1,164 @@
+import anyio
+import pytest
+
+from stark.general.localisation import LocaleString
+from stark.general.metrics import MetricsRegistry
+from stark.interfaces.recognizer_relay import SpeechRecognizerRelay
+from stark.models.voice_transcription import VoiceTranscriptionTrack, VoiceTranscriptionWord
+
+
+class LanguageRecognizerMock:
+    is_recognizing: bool = False
+    delegate = None
+
+    def __init__(self, language_code: str):
+        self.language_code = language_code
+
+    def microphone_did_receive_sample(self, data):
+        pass
+
+    async def start_listening(self):
+        pass
+
+    def stop_listening(self):
+        pass
+
+
+class RelayDelegate:
+    def __init__(self):
+        self.results: list[tuple[float, LocaleString]] = []
+
+    async def speech_recognizer_did_receive_final_result(self, result: str | LocaleString):
+        assert isinstance(result, LocaleString)
+        self.results.append((anyio.current_time(), result))
+
+    async def speech_recognizer_did_receive_partial_result(self, result: str):
+        pass
+
+    async def speech_recognizer_did_receive_empty_result(self):
+        pass
+
+
+@pytest.fixture
+def metrics() -> MetricsRegistry:
+    return MetricsRegistry(enabled=True)
+
+
+@pytest.fixture
+def delegate() -> RelayDelegate:
+    return RelayDelegate()
+
+
+def make_relay(delegate: RelayDelegate, metrics: MetricsRegistry, **kwargs) -> SpeechRecognizerRelay:
+    relay = SpeechRecognizerRelay(
+        [LanguageRecognizerMock(language) for language in ("en", "de", "uk")], metrics=metrics, **kwargs
+    )
+    relay.delegate = delegate
+    return relay
+
+
+def final(text: str, language: str, conf: float = 0.5):
+    words = [
+        VoiceTranscriptionWord(
+            word=word, language_code=language, char_start=0, char_end=len(word), start=i, end=i + 1, conf=conf
+        )
+        for i, word in enumerate(text.split())
+    ]
+    return VoiceTranscriptionTrack(text=text, result=words, language_code=language).to_voice_transcription_string()
+
+
+async def report(relay: SpeechRecognizerRelay, *results: tuple[float, str, str]):
+    """Delivers (delay, text, language) final results like concurrent recognizers would."""
+    async with anyio.create_task_group() as task_group:
+        for delay, text, language in results:
+
+            async def deliver(delay=delay, text=text, language=language):
+                await anyio.sleep(delay)
+                await relay.speech_recognizer_did_receive_final_result(final(text, language))
+
+            task_group.start_soon(deliver)
+
+
+async def test_emits_when_all_languages_report(autojump_clock, delegate, metrics):
+    relay = make_relay(delegate, metrics)
+    started = anyio.current_time()
+    await report(relay, (0, "hello", "en"), (0.1, "hallo", "de"), (0.3, "привіт", "uk"))
+
+    [(emitted, result)] = delegate.results
+    assert emitted - started == pytest.approx(0.3)
+    assert result.alternative_texts.keys() == {"en", "de", "uk"}
+
+    snapshot = metrics.snapshot()
+    waits = {
+        language: snapshot.histogram("stark_relay_language_wait_seconds", language=language)
+        for language in ("en", "de", "uk")
+    }
+    assert {language: histogram.sum for language, histogram in waits.items() if histogram} == pytest.approx(
+        {"en": 0, "de": 0.1, "uk": 0.3}
+    )
+    convergence = snapshot.histogram("stark_relay_convergence_seconds", outcome="complete")
+    assert convergence is not None
+    assert convergence.count == 1
+
+
+async def test_emits_after_timeout(autojump_clock, delegate, metrics):
+    relay = make_relay(delegate, metrics, convergence_timeout=1.5)
+    started = anyio.current_time()
+    await report(relay, (0, "hello", "en"), (0.2, "hallo", "de"))
+
+    [(emitted, result)] = delegate.results
+    assert emitted - started == pytest.approx(1.5)
+    assert result.alternative_texts.keys() == {"en", "de"}
+    assert metrics.snapshot().counter("stark_relay_missing_results", language="uk") == 1
+
+
+async def test_early_emit_when_confident(autojump_clock, delegate, metrics):
+    relay = make_relay(delegate, metrics, early_emit_confidence=0.8)
+    started = anyio.current_time()
+
+    async def report_confident():
+        await anyio.sleep(0.5)
+        await relay.speech_recognizer_did_receive_final_result(final("hello", "en", conf=0.9))
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(report, relay, (0, "hallo", "de"))  # below the threshold, waits for the rest
+        task_group.start_soon(report_confident)
+
+    [(emitted, result)] = delegate.results
+    assert emitted - started == pytest.approx(0.5)
+    assert result.alternative_texts.keys() == {"de", "en"}
+    convergence = metrics.snapshot().histogram("stark_relay_convergence_seconds", outcome="confident")
+    assert convergence is not None
+    assert convergence.count == 1
+
+
+async def test_late_result_joins_emitted_utterance(autojump_clock, delegate, metrics):
+    relay = make_relay(delegate, metrics, early_emit_confidence=0.8)
+    await relay.speech_recognizer_did_receive_final_result(final("hello", "en", conf=0.9))
+    await report(relay, (0.2, "hallo", "de"), (0.3, "привіт", "uk"))
+
+    assert len(delegate.results) == 1  # the late results don't open a new utterance
+    assert delegate.results[0][1].alternative_texts.keys() == {"en"}
+    snapshot = metrics.snapshot()
+    assert snapshot.counter("stark_relay_late_results", language="de") == 1
+    assert snapshot.counter("stark_relay_late_results", language="uk") == 1
+
+
+async def test_overlapping_utterances(autojump_clock, delegate, metrics):
+    relay = make_relay(delegate, metrics)
+    await report(
+        relay,
+        (0, "first", "en"),
+        (0.1, "second", "en"),  # en already reported, starts the next utterance
+        (0.2, "erste", "de"),
+        (0.3, "zweite", "de"),
+        (0.4, "перша", "uk"),
+        (0.5, "друга", "uk"),
+    )
+
+    assert [
+        {language: str(text) for language, text in result.alternative_texts.items()} for _, result in delegate.results
+    ] == [
+        {"en": "first", "de": "erste", "uk": "перша"},
+        {"en": "second", "de": "zweite", "uk": "друга"},
+    ]
@@ -1,3 +1,7 @@
+import time
+from random import Random
+
+import numpy as np
 import pytest
 
 from stark.models.voice_transcription import (
@@ -107,3 +111,89 @@ def test_to_voice_transcription_string(transcription_track):
     assert vts.track is transcription_track
     assert len(vts.words) == 6
     assert vts.words[0].word == 'please'
+
+
+def test_position_to_time(transcription_track):
+    times = [transcription_track.position_to_time(position) for position in (0, 6, 7, 9, 31, 32, -1)]
+    assert times == [0.0, 0.5, 0.5, pytest.approx(0.6), 2.2, None, None]
+
+
+def test_time_to_position(transcription_track):
+    positions = [transcription_track.time_to_position(time) for time in (0.0, 0.6, 1.45, 2.2, 2.3)]
+    assert positions == [0, 9, 24, 31, None]
+
+
+def test_slice_shares_columns(transcription_track):
+    columns = transcription_track.columns
+    new_track = transcription_track.get_slice(0.75, 1.5)
+    assert new_track.text == 'jazz music'
+    assert np.shares_memory(new_track.columns.start, columns.start)
+    assert new_track.columns.char_base == 17
+
+    # positions are local to the slice's text
+    assert [new_track.position_to_time(position) for position in (0, 5, 6)] == [0.8, 1.1, pytest.approx(1.24)]
+    assert new_track.time_to_position(1.45) == 7
+
+
+def test_columns_follow_changes(transcription_track):
+    assert len(transcription_track.columns) == 6
+    transcription_track.replace('jazz music', 'rock')
+    assert len(transcription_track.columns) == 5
+    assert transcription_track.position_to_time(transcription_track.text.index('now')) == 1.8
+
+    transcription_track.result = transcription_track.result[:2]
+    assert len(transcription_track.columns) == 2
+
+
+def test_unordered_words():
+    track = VoiceTranscriptionTrack(
+        text='late early',
+        result=[
+            VoiceTranscriptionWord(word='late', language_code='en', char_start=0, char_end=4, start=1.0, end=1.5),
+            VoiceTranscriptionWord(word='early', language_code='en', char_start=5, char_end=10, start=0.0, end=0.5),
+        ],
+    )
+    assert not track.columns.ordered
+    assert track.get_slice(0.9, 2.0).text == 'late'
+    assert track.get_slice(0.0, 2.0).text == 'late early'
+    assert track.get_slice(0.0, 1.0).text == ''  # the scan stops at 'late'
+    assert track.time_to_position(0.2) == 0  # before 'late' starts
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_benchmark__voice_transcription_slicing(benchmark):
+    """Slices a 200-word voice transcription string like parsing does, and translates positions to times and back."""
+    random = Random(0)
+    words = []
+    start = 0.0
+    for _ in range(200):
+        duration = random.uniform(0.2, 0.5)
+        word = f'word{random.randrange(100)}'
+        words.append(
+            VoiceTranscriptionWord(
+                word=word,
+                language_code='en',
+                char_start=0,
+                char_end=len(word),
+                start=start,
+                end=start + duration,
+                conf=random.random(),
+            )
+        )
+        start += duration + 0.02
+    track = VoiceTranscriptionTrack(text=' '.join(word.word for word in words), result=words, language_code='en')
+    string = track.to_voice_transcription_string()
+    spans = []
+    for _ in range(200):
+        first = random.randrange(150)
+        spans.append((string.words[first].char_start, string.words[first + random.randrange(1, 40)].char_end))
+
+    def run():
+        for start, end in spans:
+            string[start:end]  # slices the track too
+            track.time_to_position(track.position_to_time(start) or 0)
+
+    benchmark(run)
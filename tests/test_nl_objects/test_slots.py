@@ -0,0 +1,110 @@
+import time
+
+import anyio
+import pytest
+
+from stark.core.parsing import ParseError, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.types import NLObject
+from stark.core.types.slots import SlotsParser
+from stark.general.classproperty import classproperty
+
+
+class Fruit(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(apple|pear)")
+
+
+class Dessert(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("apple pie")
+
+
+class Drink(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(tea|coffee)")
+
+
+class Order(NLObject):
+    fruit: Fruit
+    dessert: Dessert
+    drink: Drink | None
+
+
+def make_parser() -> PatternParser:
+    pattern_parser = PatternParser()
+    for object_type in (Fruit, Dessert, Drink):
+        pattern_parser.register_parameter_type(object_type)
+    pattern_parser.register_parameter_type(Order, parser=SlotsParser(pattern_parser))
+    return pattern_parser
+
+
+async def test_slots_skip_candidate_for_better_assignment():
+    # the first candidate of `fruit` is "apple", but then `dessert` can't be filled
+    result = await make_parser().parse_object(Order, "apple pie and pear")
+
+    assert result.obj.fruit.value == "pear"
+    assert result.obj.dessert.value == "apple pie"
+    assert result.obj.drink is None
+    assert result.substring == "apple pie and pear"
+
+
+async def test_slots_any_order_with_optional():
+    result = await make_parser().parse_object(Order, "coffee with pear after apple pie")
+
+    assert (result.obj.fruit.value, result.obj.dessert.value, result.obj.drink.value) == ("pear", "apple pie", "coffee")
+    assert result.substring == "coffee with pear after apple pie"
+
+
+async def test_slots_required_missing():
+    with pytest.raises(ParseError):
+        await make_parser().parse_object(Order, "pear and tea")
+
+
+# benchmark
+
+FIELD_WORDS = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india", "juliett"]
+
+
+def make_field_type(index: int) -> type[NLObject]:
+    words = FIELD_WORDS[index]
+    return type(
+        f"Field{index}",
+        (NLObject,),
+        {"pattern": classproperty(lambda cls: Pattern(f"{words} (one|two|three)"))},
+    )
+
+
+FIELD_TYPES = [make_field_type(index) for index in range(len(FIELD_WORDS))]
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+@pytest.mark.parametrize("fields", [5, 10])
+def test_benchmark__slots(fields: int, benchmark):
+    slots_type = type(
+        f"Slots{fields}",
+        (NLObject,),
+        {"__annotations__": {f"field{index}": FIELD_TYPES[index] for index in range(fields)}},
+    )
+    pattern_parser = PatternParser()
+    for object_type in FIELD_TYPES[:fields]:
+        pattern_parser.register_parameter_type(object_type)
+    pattern_parser.register_parameter_type(slots_type, parser=SlotsParser(pattern_parser))
+
+    # fields in reverse order with noise between them and a second, conflicting mention of the first word
+    string = " and ".join(f"{FIELD_WORDS[index]} two" for index in reversed(range(fields))) + " then alpha"
+
+    async def parse():
+        return await pattern_parser.parse_object(slots_type, string)
+
+    def run():
+        return anyio.run(parse)
+
+    result = benchmark(run)
+    assert all(getattr(result.obj, f"field{index}") is not None for index in range(fields))
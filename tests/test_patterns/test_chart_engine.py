@@ -0,0 +1,240 @@
+import time
+
+import anyio
+import pytest
+
+from stark.core.chart_parser import ChartMatcher
+from stark.core.parsing import ParseError, ParsingEngine, PatternParser
+from stark.core.patterns.pattern import Pattern
+from stark.core.types import NLObject, NLWord, any_subclass
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString
+
+
+class Color(NLObject):
+    value: str
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(red|green|blue|warm white)")
+
+
+class Room(NLObject):
+    value: str
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(kitchen|bedroom|living room)")
+
+
+class Lamp(NLObject):
+    color: Color
+    room: Room
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$color:Color lamp in the $room:Room")
+
+    async def did_parse(self, from_string: str) -> str:
+        self.value = f"{self.color.value}@{self.room.value}"
+        return from_string
+
+
+class Scene(NLObject):
+    lamp: Lamp
+    name: NLWord
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("scene $name:NLWord with $lamp:Lamp")
+
+    async def did_parse(self, from_string: str) -> str:
+        self.value = f"{self.name.value}: {self.lamp.value}"
+        return from_string
+
+
+class Device(NLObject):
+    pass
+
+
+class Kettle(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(kettle|teapot)")
+
+
+class Heater(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("(heater|radiator)")
+
+
+class Speaker(Device):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$room:Room speaker")
+
+    async def did_parse(self, from_string: str) -> str:
+        self.value = f"speaker@{self.room.value}"
+        return from_string
+
+
+class FirstWord(NLObject):
+    """Greedy type that takes only the first word of the captured substring."""
+
+    value: str
+
+    @classproperty
+    def greedy(cls) -> bool:
+        return True
+
+    async def did_parse(self, from_string: str) -> str:
+        if not from_string.strip():
+            raise ParseError("empty")
+        self.value = from_string.split()[0]
+        return self.value
+
+
+AnyDevice = any_subclass(Device)
+
+
+def make_parser(engine: ParsingEngine) -> PatternParser:
+    pattern_parser = PatternParser(engine=engine)
+    for object_type in (Color, Room, Lamp, Scene, AnyDevice, FirstWord):
+        pattern_parser.register_parameter_type(object_type)
+    return pattern_parser
+
+
+def summarize(matches):
+    return [
+        (
+            m.substring,
+            m.start,
+            m.end,
+            {name: (type(obj).__name__, obj.value) if obj is not None else None for name, obj in m.parameters.items()},
+        )
+        for m in matches
+    ]
+
+
+@pytest.mark.parametrize(
+    ("pattern", "string"),
+    [
+        ("turn on the $color:Color lamp", "please turn on the warm white lamp"),
+        ("turn on $lamp:Lamp", "turn on red lamp in the living room now"),
+        ("activate $scene:Scene", "activate scene evening with blue lamp in the bedroom"),
+        ("switch $device:AnyDevice on", "switch teapot on and switch kitchen speaker on"),
+        ("switch $device:AnyDevice", "switch radiator"),
+        ("call $name:NLWord", "call mom and call dad"),
+        ("say $text:NLString", "say hello world"),
+        ("say $text:NLString please", "say hello world please"),
+        ("remind $what:FirstWord at $time:NLWord", "remind laundry at noon"),
+        ("remind $what:FirstWord", "remind laundry soon"),
+        ("$first:NLWord and $second:NLString", "tea and biscuits with jam"),
+        ("play song*", "play songs and play songbird"),
+        ("{one|two} more", "one two one more"),
+        ("(turn|switch) off **", "switch off everything in the house"),
+        ("set $color:Color", "set purple"),
+        ("nothing matches", "lorem ipsum"),
+    ],
+)
+async def test_chart_engine_equivalence(pattern: str, string: str):
+    regex_matches = await make_parser(ParsingEngine.REGEX).match(Pattern(pattern), LocaleString(string))
+    chart_parser = make_parser(ParsingEngine.CHART)
+    chart_matches = await chart_parser.match(Pattern(pattern), LocaleString(string))
+
+    assert isinstance(chart_parser.chart_engine.matcher(Pattern(pattern)), ChartMatcher)
+    assert summarize(chart_matches) == summarize(regex_matches)
+
+
+async def test_chart_engine_reuses_type_spans_across_patterns():
+    pattern_parser = make_parser(ParsingEngine.CHART)
+    string = LocaleString("turn on green lamp in the kitchen")
+
+    await pattern_parser.match(Pattern("turn on $lamp:Lamp"), string)
+    chart = pattern_parser.chart_engine.get_chart(str(string))
+    (lamp_node,) = [node for key, node in pattern_parser.chart_engine._types.items() if key[0] == Lamp.__name__]
+    lamp_key = (lamp_node, 0, len("turn on "), None)  # Lamp is a sequence: (node, item index, position, follow)
+    lamp_spans = chart.spans[lamp_key]
+
+    # another pattern over the same string reuses the spans of Lamp instead of recomputing them
+    matches = await pattern_parser.match(Pattern("$lamp:Lamp"), string)
+    assert [m.substring for m in matches] == ["green lamp in the kitchen"]
+    assert chart.spans[lamp_key] is lamp_spans
+    assert pattern_parser.chart_engine.chart_cache_stats.hits
+
+
+async def test_chart_engine_falls_back_to_regex():
+    pattern_parser = make_parser(ParsingEngine.CHART)
+    pattern = Pattern("go++ $color:Color")  # possessive repeats are not modelled by the chart
+
+    assert pattern_parser.chart_engine.matcher(pattern) is None
+    matches = await pattern_parser.match(pattern, LocaleString("gooo red"))
+    assert summarize(matches) == [("gooo red", 0, 8, {"color": ("Color", "red")})]
+
+
+async def test_chart_engine_invalidated_on_register():
+    pattern_parser = make_parser(ParsingEngine.CHART)
+    matcher = pattern_parser.chart_engine.matcher(Pattern("turn on $lamp:Lamp"))
+
+    class Fan(NLObject):
+        @classproperty
+        def pattern(cls) -> Pattern:
+            return Pattern("fan")
+
+    pattern_parser.register_parameter_type(Fan)
+    assert pattern_parser.chart_engine.matcher(Pattern("turn on $lamp:Lamp")) is not matcher
+
+
+# benchmark
+
+
+class Phrase(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$head:NLString and $tail:NLString")
+
+
+class Sentence(NLObject):
+    @classproperty
+    def pattern(cls) -> Pattern:
+        return Pattern("$first:Phrase then $second:Phrase")
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+@pytest.mark.parametrize("grammar", ["nested", "unions"])
+@pytest.mark.parametrize("engine", [ParsingEngine.REGEX, ParsingEngine.CHART])
+def test_benchmark__chart_engine(grammar: str, engine: ParsingEngine, benchmark):
+    pattern_parser = PatternParser(engine=engine)
+
+    if grammar == "nested":
+        pattern_parser.register_parameter_type(Sentence)
+        patterns = [Pattern("do $sentence:Sentence done"), Pattern("do $sentence:Sentence then stop")]
+        words = 32
+        string = LocaleString(
+            "do " + " and ".join(["tea"] * words) + " then " + " and ".join(["jam"] * words) + " then stop"
+        )
+    else:
+        for object_type in (Color, Room, Lamp, Scene, AnyDevice):
+            pattern_parser.register_parameter_type(object_type)
+        patterns = [
+            Pattern(f"{verb} $device:AnyDevice in $room:Room") for verb in ("turn on", "turn off", "toggle", "check")
+        ] + [Pattern("activate $scene:Scene"), Pattern("set $lamp:Lamp")]
+        string = LocaleString(
+            "turn on kitchen speaker in bedroom and activate scene night with red lamp in the kitchen"
+        )
+
+    async def match_all():
+        return [await pattern_parser.match(pattern, string) for pattern in patterns]
+
+    def run():
+        pattern_parser.chart_engine.clear_charts()  # every round is a new utterance
+        return anyio.run(match_all)
+
+    expected = [summarize(matches) for matches in run()]
+    results = benchmark(run)
+    assert [summarize(matches) for matches in results] == expected
+    assert any(expected)
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from stark.core import Pattern
+from stark.core.parsing import PatternParser
+from stark.core.types import NLObject
+from stark.general.classproperty import classproperty
+from stark.general.localisation import LocaleString, Localizer
+
+
+def _create_strings_file(root: Path, lang: str, name: str, content: str):
+    d = root / "strings" / lang
+    d.mkdir(parents=True, exist_ok=True)
+    (d / f"{name}.strings").write_text(content)
+
+
+async def test_steady_state_does_not_compile():
+    pattern_parser = PatternParser()
+    p = Pattern("hello $name:NLWord how are you")
+
+    assert await pattern_parser.match(p, "hello John how are you")
+    misses = pattern_parser.pattern_cache_stats.misses
+
+    for _ in range(3):
+        assert await pattern_parser.match(p, "hello John how are you")
+
+    stats = pattern_parser.pattern_cache_stats
+    assert stats.misses == misses
+    assert stats.hits > 0
+
+
+async def test_compiled_source_is_cached():
+    pattern_parser = PatternParser()
+    p = Pattern("lorem $name:NLWord dolor")
+
+    first = pattern_parser._compile_pattern(p)
+    assert pattern_parser._compile_pattern(p) == first
+    assert pattern_parser._compile_pattern(Pattern("lorem $name:NLWord dolor")) == first
+    assert pattern_parser.pattern_cache_stats.hits >= 2
+
+
+async def test_register_parameter_type_invalidates():
+    pattern_parser = PatternParser()
+    pattern_parser._compile_pattern(Pattern("lorem $name:NLWord dolor"))
+    assert pattern_parser.pattern_cache_stats.size > 0
+
+    class CacheInvalidationType(NLObject):
+        @classproperty
+        def pattern(cls) -> Pattern:
+            return Pattern("foo")
+
+    pattern_parser.register_parameter_type(CacheInvalidationType)
+    assert pattern_parser.pattern_cache_stats.size == 0
+
+
+async def test_localizer_reload_invalidates(tmp_path, monkeypatch):
+    _create_strings_file(tmp_path, "en", "recognizable", '"units" = "hours";')
+    _create_strings_file(tmp_path, "en", "localizable", '"units" = "hours";')
+    monkeypatch.chdir(tmp_path)
+
+    localizer = Localizer(languages={"en"})
+    localizer.load()
+    pattern_parser = PatternParser(localizer=localizer)
+    p = Pattern("five @units")
+
+    assert await pattern_parser.match(p, LocaleString("five hours", "en"))
+
+    _create_strings_file(tmp_path, "en", "recognizable", '"units" = "minutes";')
+    localizer.load()
+
+    assert not await pattern_parser.match(p, LocaleString("five hours", "en"))
+    assert await pattern_parser.match(p, LocaleString("five minutes", "en"))
@@ -0,0 +1,102 @@
+import copy
+import gc
+import pickle
+import time
+
+import anyio
+import pytest
+
+from stark.core import Pattern
+from stark.core.parsing import PatternParser
+from stark.core.types import NLObject, NLWord, any_subclass
+from stark.general.classproperty import classproperty
+
+pattern_accesses: list[str] = []
+
+
+class Greeting(NLObject):
+    name: NLWord
+
+    @classproperty
+    def pattern(cls) -> Pattern:
+        pattern_accesses.append(cls.__name__)
+        return Pattern("hello $name:NLWord")
+
+
+class LocalizedGreeting(NLObject):
+    @classproperty
+    def patterns(cls) -> dict[str, Pattern]:
+        pattern_accesses.append(cls.__name__)
+        return {"base": Pattern("hello"), "uk": Pattern("pryvit")}
+
+
+def test_patterns_interned_by_origin():
+    pattern = Pattern("interned $name:NLWord")
+    assert Pattern("interned $name:NLWord") is pattern
+    assert Pattern("interned $other:NLWord") is not pattern
+    assert copy.deepcopy(pattern) is pattern
+    assert pickle.loads(pickle.dumps(pattern)) is pattern
+
+
+def test_unused_patterns_released():
+    Pattern("short-lived")
+    gc.collect()
+    assert "short-lived" not in Pattern._interned
+
+
+async def test_type_patterns_evaluated_once():
+    pattern_accesses.clear()
+    pattern_parser = PatternParser()
+    pattern_parser.register_parameter_type(Greeting)
+    pattern_parser.register_parameter_type(LocalizedGreeting)
+
+    for _ in range(3):
+        assert (await pattern_parser.parse_object(Greeting, "hello John")).obj.name.value == "John"
+        await pattern_parser.parse_object(LocalizedGreeting, "hello")
+
+    assert pattern_accesses == ["Greeting", "LocalizedGreeting"]
+
+
+def test_get_pattern_by_language():
+    assert LocalizedGreeting.get_pattern("uk") is Pattern("pryvit")
+    assert LocalizedGreeting.get_pattern("en") is Pattern("hello")
+    assert Greeting.get_patterns() == {"base": Pattern("hello $name:NLWord")}
+    assert Greeting.get_patterns() is Greeting.get_patterns()
+
+
+# benchmark
+
+
+class Appliance(NLObject):
+    pass
+
+
+def make_appliance_type(index: int) -> type[NLObject]:
+    return type(
+        f"Appliance{index}",
+        (Appliance,),
+        {"pattern": classproperty(lambda cls: Pattern(f"appliance{index} $name:NLWord"))},
+    )
+
+
+APPLIANCE_TYPES = [make_appliance_type(index) for index in range(1000)]
+
+
+@pytest.mark.benchmark(
+    timer=time.perf_counter,
+    min_rounds=5,
+)
+def test_benchmark__type_hierarchy(benchmark):
+    """Registers and parses a union of 1000 types, pattern access used to dominate both."""
+
+    def run():
+        pattern_parser = PatternParser()
+        pattern_parser.register_parameter_type(any_subclass(Appliance))
+
+        async def parse():
+            for index in range(0, len(APPLIANCE_TYPES), 100):
+                await pattern_parser.parse_object(any_subclass(Appliance), f"turn on appliance{index} kitchen")
+
+        anyio.run(parse)
+
+    benchmark(run)